@@ -24,6 +24,37 @@ type EvalRecord = {
   focused_pokemon?: any;
 };
 
+// Reads a text/event-stream body and calls onEvent for each complete event.
+async function readEventStream(
+  body: ReadableStream<Uint8Array>,
+  onEvent: (event: string, data: any) => void,
+) {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let event = "message";
+      const dataLines: string[] = [];
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+      }
+      if (dataLines.length) onEvent(event, JSON.parse(dataLines.join("\n")));
+    }
+  }
+}
+
 export default function HomePage() {
   const API_BASE = "http://localhost:8000";
 
@@ -109,31 +140,49 @@ export default function HomePage() {
     }
   };
 
+  const setLastMessage = (text: string) => {
+    setMessages((prev) => [...prev.slice(0, -1), text]);
+  };
+
   const handleChat = async (message: string) => {
-    try {
-      setMessages((prev) => [...prev, message]);
+    // The assistant reply starts empty and fills in as tokens arrive.
+    setMessages((prev) => [...prev, message, ""]);
+    let answer = "";
 
+    try {
       const formData = new FormData();
       formData.append("message", message);
 
-      const response = await fetch(`${API_BASE}/chat`, {
+      const response = await fetch(`${API_BASE}/chat/stream`, {
         method: "POST",
         body: formData,
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         const error = await response.text();
         console.error(error);
+        setLastMessage("Something went wrong. Please try again.");
         return;
       }
 
-      const data = await response.json();
-      setMessages((prev) => [...prev, data.content]);
-      if (data.node && data.node.name) {
-        setFocusedNode(data.node.name);
-      }
+      await readEventStream(response.body, (event, data) => {
+        if (event === "metadata") {
+          if (data.node && data.node.name) {
+            setFocusedNode(data.node.name);
+          }
+        } else if (event === "token") {
+          answer += data.text;
+          setLastMessage(answer);
+        } else if (event === "done") {
+          setLastMessage(data.content);
+        } else if (event === "error") {
+          console.error(data.detail);
+          setLastMessage(answer || "Something went wrong. Please try again.");
+        }
+      });
     } catch (error) {
       console.error(error);
+      setLastMessage(answer || "Something went wrong. Please try again.");
     }
   };
 
@@ -383,7 +432,7 @@ export default function HomePage() {
                             : "rounded-bl-none bg-slate-800 text-slate-100",
                         )}
                       >
-                        <p className="text-sm">{msg}</p>
+                        <p className="text-sm">{msg || "…"}</p>
                         <span
                           className={cn(
                             "mt-1 block text-right text-[10px]",
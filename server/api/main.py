@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import (
     FastAPI,
@@ -7,7 +8,9 @@ from fastapi.middleware.cors import (
     CORSMiddleware,
 )
 
-from api.routes import graph, ingest, llm, logs, process
+from api.routes import graph, ingest, jobs, llm, logs, process, records
+from jobs.runner import JOB_RUNNER_ENABLED, JobRunner
+from processing import vector_store
 
 origins = [
     "http://localhost:3000",
@@ -20,7 +23,23 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
 )
 
-app = FastAPI(title="Pokemon Starter RAG API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background jobs run in worker processes owned by this runner. With
+    # several API processes, enable it in exactly one (JOB_RUNNER_ENABLED).
+    runner = JobRunner().start() if JOB_RUNNER_ENABLED else None
+    # Chat requests share one async Qdrant client and its connections.
+    vector_store.open_async_client()
+    try:
+        yield
+    finally:
+        await vector_store.close_async_client()
+        if runner is not None:
+            runner.stop()
+
+
+app = FastAPI(title="Pokemon Starter RAG API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +54,8 @@ app.include_router(process.router)
 app.include_router(llm.router)
 app.include_router(graph.router)
 app.include_router(logs.router)
+app.include_router(records.router)
+app.include_router(jobs.router)
 
 
 @app.get("/health")
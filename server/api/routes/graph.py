@@ -3,6 +3,7 @@ import logging
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
+from processing import graph_store
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,9 @@ GRAPH_JSON = GRAPH_DIR / "graph.json"
 
 @router.get("/graph")
 async def get_graph():
+    if graph_store.GRAPH_BACKEND == "sqlite" and graph_store.GRAPH_DB.exists():
+        return graph_store.load_graph_from_db()
+
     if not GRAPH_JSON.exists():
         raise HTTPException(status_code=404, detail="Graph not built yet")
 
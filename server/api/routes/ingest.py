@@ -1,12 +1,23 @@
+import hashlib
 import logging
+import os
+import tempfile
+from functools import partial
 from pathlib import Path
+from typing import Any, Callable, Collection, Dict, Optional, Tuple
 
+from api.routes.jobs import job_accepted
 from fastapi import (
     APIRouter,
-    File,
     HTTPException,
-    UploadFile,
+    Request,
+    Response,
 )
+from fastapi.concurrency import run_in_threadpool
+from ingestion import manifest
+from jobs.runner import run_locked, submit_job
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
 from scripts.ingest import main as run_full_ingest
 from scripts.ingest_audio_corpus import add_audio as run_add_audio
 from scripts.ingest_images_corpus import add_image as run_add_image
@@ -20,63 +31,295 @@ RAW_AUDIO_DIR = Path("data/raw/audio")
 RAW_IMAGE_DIR = Path("data/raw/images")
 RAW_TEXT_DIR = Path("data/raw/text")
 
+_MB = 1024 * 1024
+MAX_AUDIO_UPLOAD_BYTES = int(os.getenv("MAX_AUDIO_UPLOAD_MB", "500")) * _MB
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_MB", "50")) * _MB
+MAX_TEXT_UPLOAD_BYTES = int(os.getenv("MAX_TEXT_UPLOAD_MB", "100")) * _MB
 
-@router.post("/add/audio")
-async def add_audio(file: UploadFile = File(...)) -> dict:
+# Room for boundaries and part headers when a request's Content-Length is
+# checked against the file size limit.
+UPLOAD_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+TEXT_UPLOAD_SUFFIXES = (".pdf", ".txt")
+
+
+class _FilePart:
+    """
+    MultipartParser callbacks that write the "file" part of a form into a
+    temp file in raw_dir as it is parsed, hashing it on the way. Other parts
+    are discarded. Problems are recorded in `error` for the caller to raise.
+    """
+
+    def __init__(
+        self, raw_dir: Path, max_bytes: int, suffixes: Optional[Collection[str]]
+    ):
+        self.raw_dir = raw_dir
+        self.max_bytes = max_bytes
+        self.suffixes = suffixes
+        self.filename: Optional[str] = None
+        self.tmp_path: Optional[Path] = None
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.error: Optional[HTTPException] = None
+        self._out: Any = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+
+    def callbacks(self) -> Dict[str, Callable[..., None]]:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def _part_begin(self) -> None:
+        self._headers = {}
+
+    def _header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def _headers_finished(self) -> None:
+        _disposition, params = parse_options_header(
+            self._headers.get(b"content-disposition")
+        )
+        if params.get(b"name") != b"file" or self.filename is not None:
+            return
+
+        filename = Path(params.get(b"filename", b"").decode("utf-8", "replace")).name
+        if not filename:
+            self.error = HTTPException(status_code=400, detail="Missing file name")
+            return
+        if self.suffixes and Path(filename).suffix.lower() not in self.suffixes:
+            self.error = HTTPException(
+                status_code=400,
+                detail=f"Only {' and '.join(self.suffixes)} supported",
+            )
+            return
+
+        self.filename = filename
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=self.raw_dir, prefix=".upload-", suffix=".part"
+        )
+        self.tmp_path = Path(tmp_name)
+        self._out = os.fdopen(fd, "wb")
+
+    def _part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._out is None or self.error is not None:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            self.error = HTTPException(
+                status_code=413,
+                detail=f"File exceeds the {self.max_bytes // _MB} MB upload limit",
+            )
+            return
+        chunk = data[start:end]
+        self._out.write(chunk)
+        self.digest.update(chunk)
+
+    def _part_end(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def discard(self) -> None:
+        self.close()
+        if self.tmp_path is not None:
+            self.tmp_path.unlink(missing_ok=True)
+
+
+async def save_upload(
+    request: Request,
+    raw_dir: Path,
+    max_bytes: int,
+    suffixes: Optional[Collection[str]] = None,
+) -> Tuple[Path, str]:
+    """
+    Stream the "file" field of a multipart request into raw_dir, hashing it
+    on the way.
+
+    The request body is parsed as it arrives and the file part written
+    straight to a temp file in raw_dir, which is renamed over the target
+    only once complete, so the corpus never holds a partial file and the
+    upload is never buffered or spooled elsewhere. A Content-Length that is
+    already over max_bytes is rejected with 413 before the body is read;
+    otherwise the limit is enforced as bytes arrive. Returns (path, sha256).
+    """
+    content_length = request.headers.get("content-length", "")
+    if (
+        content_length.isdigit()
+        and int(content_length) > max_bytes + UPLOAD_MULTIPART_OVERHEAD_BYTES
+    ):
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {max_bytes // _MB} MB upload limit",
+        )
+
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=400, detail="Expected a multipart/form-data upload"
+        )
+
+    part = _FilePart(raw_dir, max_bytes, suffixes)
+    parser = MultipartParser(boundary, part.callbacks())
+    target_path: Optional[Path] = None
+    try:
+        async for chunk in request.stream():
+            # Parsing writes the file part to disk; keep that off the loop.
+            await run_in_threadpool(parser.write, chunk)
+            if part.error is not None:
+                raise part.error
+        parser.finalize()
+        if part.filename is None:
+            raise HTTPException(status_code=400, detail="Missing file")
+        part.close()
+        target_path = raw_dir / part.filename
+        # Claimed before the file appears, so a running watcher leaves it to
+        # this request; the ingestion that follows releases it.
+        await run_in_threadpool(manifest.claim, target_path)
+        os.replace(part.tmp_path, target_path)
+    except MultipartParseError as e:
+        part.discard()
+        raise HTTPException(status_code=400, detail=f"Malformed upload: {e}")
+    except BaseException:
+        part.discard()
+        if target_path is not None:
+            await run_in_threadpool(manifest.release, target_path)
+        raise
+
+    logger.info(
+        "Upload saved",
+        extra={"path": str(target_path), "bytes": part.size},
+    )
+    return target_path, part.digest.hexdigest()
+
+
+async def _ingest_upload(
+    request: Request,
+    raw_dir: Path,
+    max_bytes: int,
+    add: Callable[..., Dict[str, Any]],
+    modality: str,
+    background: bool,
+    response: Response,
+    suffixes: Optional[Collection[str]] = None,
+) -> Dict[str, Any]:
+    logger.info("API: starting ingestion of %s file", modality)
+    target_path, content_hash = await save_upload(request, raw_dir, max_bytes, suffixes)
+
+    if background:
+        # The job releases the claim on the file once it has run.
+        try:
+            job = submit_job(
+                "add_file",
+                modality=modality,
+                path=str(target_path),
+                content_hash=content_hash,
+            )
+        except BaseException:
+            await run_in_threadpool(manifest.release, target_path)
+            raise
+        logger.info("API: %s file queued as job %s", modality, job["id"])
+        return job_accepted(response, job)
+
+    # OCR, transcription and embedding are blocking; keep them off the loop.
+    # Runs as an add_file job in this process, so it waits for a running
+    # ingest instead of racing it for the manifest and record store.
     try:
-        logger.info("API: starting ingestion of audio file")
-        RAW_AUDIO_DIR.mkdir(parents=True, exist_ok=True)
-        target_path = RAW_AUDIO_DIR / file.filename
+        record = await run_in_threadpool(
+            run_locked,
+            "add_file",
+            partial(add, target_path, content_hash=content_hash),
+            {
+                "modality": modality,
+                "path": str(target_path),
+                "content_hash": content_hash,
+            },
+        )
+    finally:
+        await run_in_threadpool(manifest.release, target_path)
+    logger.info("API: %s file ingested", modality)
+    return {"message": f"{modality.capitalize()} ingested", "record": record}
 
-        contents = await file.read()
-        target_path.write_bytes(contents)
-        await file.close()
 
-        record = run_add_audio(target_path)
-        logger.info("API: audio file ingested")
-        return {"message": "Audio ingested", "record": record}
+# The upload routes read the multipart body themselves (see save_upload)
+# instead of declaring an UploadFile, which Starlette would spool in full
+# before the handler runs. The form field is still named "file".
+@router.post("/add/audio")
+async def add_audio(
+    request: Request, response: Response, background: bool = False
+) -> dict:
+    try:
+        return await _ingest_upload(
+            request,
+            RAW_AUDIO_DIR,
+            MAX_AUDIO_UPLOAD_BYTES,
+            run_add_audio,
+            "audio",
+            background,
+            response,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error adding audio")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/add/image")
-async def add_image(file: UploadFile = File(...)) -> dict:
+async def add_image(
+    request: Request, response: Response, background: bool = False
+) -> dict:
     try:
-        logger.info("API: starting ingestion of image file")
-        RAW_IMAGE_DIR.mkdir(parents=True, exist_ok=True)
-        target_path = RAW_IMAGE_DIR / file.filename
-
-        contents = await file.read()
-        target_path.write_bytes(contents)
-        await file.close()
-
-        record = run_add_image(target_path)
-        logger.info("API: image file ingested")
-        return {"message": "Image ingested", "record": record}
+        return await _ingest_upload(
+            request,
+            RAW_IMAGE_DIR,
+            MAX_IMAGE_UPLOAD_BYTES,
+            run_add_image,
+            "image",
+            background,
+            response,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error adding image")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/add/text")
-async def add_text(file: UploadFile = File(...)) -> dict:
-    suffix = file.filename.lower().rsplit(".", 1)[-1]
-    if suffix not in {"pdf", "txt"}:
-        raise HTTPException(status_code=400, detail="Only .pdf and .txt supported")
-
+async def add_text(
+    request: Request, response: Response, background: bool = False
+) -> dict:
     try:
-        logger.info("API: starting ingestion of text file")
-        RAW_TEXT_DIR.mkdir(parents=True, exist_ok=True)
-        target_path = RAW_TEXT_DIR / file.filename
-
-        contents = await file.read()
-        target_path.write_bytes(contents)
-        await file.close()
-
-        record = run_add_text(target_path)
-        logger.info("API: text file ingested")
-        return {"message": "Text ingested", "record": record}
+        return await _ingest_upload(
+            request,
+            RAW_TEXT_DIR,
+            MAX_TEXT_UPLOAD_BYTES,
+            run_add_text,
+            "text",
+            background,
+            response,
+            suffixes=TEXT_UPLOAD_SUFFIXES,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -85,16 +328,22 @@ async def add_text(file: UploadFile = File(...)) -> dict:
 
 
 @router.post("/ingest")
-def ingest_corpus() -> dict:
+def ingest_corpus(response: Response, background: bool = False) -> dict:
     """
     Run the full ingestion pipeline:
     - ingest_text_corpus.main()
     - ingest_images_corpus.main()
     - ingest_audio_corpus.main()
+
+    With ?background=true the run is queued as a job and its id returned.
     """
+    if background:
+        return job_accepted(response, submit_job("ingest"))
+
     try:
         logger.info("API: starting full ingestion via /ingest")
-        run_full_ingest()
+        # Waits for running ingest and upload jobs instead of racing them.
+        run_locked("ingest", run_full_ingest)
         logger.info("API: ingestion completed")
         return {"message": "Ingestion process completed."}
     except Exception as e:
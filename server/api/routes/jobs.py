@@ -0,0 +1,67 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Response
+from jobs import store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["jobs"])
+
+
+def job_accepted(response: Response, job: dict) -> dict:
+    """202 body for endpoints that queued their work as a background job."""
+    response.status_code = 202
+    return {"job_id": job["id"], "status": job["status"]}
+
+
+def _get_job_or_404(job_id: str) -> dict:
+    job = store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+def _status(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "cancel_requested": job["cancel_requested"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+@router.get("/jobs")
+def list_jobs(status: Optional[str] = None, limit: int = 50) -> list:
+    return [_status(job) for job in store.list_jobs(status, limit)]
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str) -> dict:
+    """Status and progress of a background job."""
+    return _status(_get_job_or_404(job_id))
+
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str) -> dict:
+    job = _get_job_or_404(job_id)
+    if job["status"] not in store.FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str) -> dict:
+    _get_job_or_404(job_id)
+    logger.info("API: cancelling job %s", job_id)
+    return _status(store.request_cancel(job_id))
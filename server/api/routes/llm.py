@@ -1,62 +1,378 @@
+import asyncio
+import json
 import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
 
-from config import openai_client
 from eval_logging.eval_logger import log_evaluation
-from fastapi import APIRouter, Form
-from processing.graph_store import build_graph_context
-from processing.vector_store import build_vector_context
+from fastapi import APIRouter, Form, HTTPException
+from fastapi.responses import StreamingResponse
+from processing import gazetteer
+from processing.embeddings import embed_text_async
+from processing.graph_store import GraphLookup, build_graph_context, lookup_question
+from processing.llm_providers import get_async_llm_client, get_model
+from processing.semantic_cache import (
+    SEMANTIC_CACHE_ENABLED,
+    SemanticCache,
+    data_version,
+)
+from processing.vector_store import build_vector_context_async
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["llm"])
 
+openai_client = get_async_llm_client("chat")
+CHAT_MODEL = get_model("chat")
 
-@router.post("/chat")
-async def chat(message: str = Form(...)):
-    system_msg = "You are a pokemon expert."
+# Per-stage budgets. A retrieval stage that runs out of time contributes no
+# context; a generation timeout fails the request with 504.
+CHAT_GRAPH_TIMEOUT_SECONDS = float(os.getenv("CHAT_GRAPH_TIMEOUT_SECONDS", "5"))
+CHAT_VECTOR_TIMEOUT_SECONDS = float(os.getenv("CHAT_VECTOR_TIMEOUT_SECONDS", "10"))
+CHAT_LLM_TIMEOUT_SECONDS = float(os.getenv("CHAT_LLM_TIMEOUT_SECONDS", "60"))
 
-    graph_result = build_graph_context(message)
-    vector_result = build_vector_context(message)
+SYSTEM_MSG = "You are a pokemon expert."
 
-    graph_context_str = graph_result.get("context", "")
-    node = graph_result.get("node")
-    vector_context_str = vector_result.get("context", "")
+# Answers for paraphrases of recent questions, per API process.
+semantic_cache = SemanticCache()
+
+
+async def _retrieval_stage(
+    stage: str, work: Awaitable[Dict[str, Any]], timeout: float
+) -> Dict[str, Any]:
+    try:
+        return await asyncio.wait_for(work, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(
+            "Chat retrieval stage timed out",
+            extra={"stage": stage, "timeout_s": timeout},
+        )
+        return {}
+
+
+async def embed_query(message: str) -> Optional[List[float]]:
+    """Query embedding for the semantic cache; None if disabled or failed."""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    try:
+        return await asyncio.wait_for(
+            embed_text_async(message), CHAT_VECTOR_TIMEOUT_SECONDS
+        )
+    except Exception:
+        logger.warning("Query embedding failed", exc_info=True)
+        return None
+
+
+def question_lookup(message: str) -> tuple[GraphLookup, frozenset]:
+    """
+    Graph lookup for message and the Pokémon it is about (graph nodes and
+    known names it mentions).
+    """
+    lookup = lookup_question(message)
+    candidates, _ = lookup
+    entities = frozenset(p["name"] for p in candidates) | frozenset(
+        gazetteer.mentioned_pokemon(message)
+    )
+    return lookup, entities
+
+
+async def cache_lookup_key(
+    message: str,
+) -> tuple[Optional[List[float]], Optional[frozenset], Optional[GraphLookup]]:
+    """
+    Query embedding and entity key for the semantic cache, computed
+    concurrently, plus the graph lookup behind the key so retrieval can
+    reuse it. All None when the cache is disabled; no key if either fails.
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        return None, None, None
+    query_vector, looked_up = await asyncio.gather(
+        embed_query(message),
+        asyncio.wait_for(
+            asyncio.to_thread(question_lookup, message), CHAT_GRAPH_TIMEOUT_SECONDS
+        ),
+        return_exceptions=True,
+    )
+    if isinstance(looked_up, BaseException):
+        logger.warning("Question entity lookup failed", exc_info=looked_up)
+        return None, None, None
+    lookup, entities = looked_up
+    return query_vector, entities, lookup
 
-    logger.info(f"Vector Context: {vector_context_str}")
 
+def cached_answer(
+    query_vector: Optional[List[float]], version: Any, entities: Optional[frozenset]
+) -> Optional[Dict[str, Any]]:
+    if query_vector is None or entities is None:
+        return None
+    return semantic_cache.lookup(query_vector, version, key=entities)
+
+
+def cache_answer(
+    query_vector: Optional[List[float]],
+    version: Any,
+    entities: Optional[frozenset],
+    answer: str,
+    graph_result: Dict[str, Any],
+    vector_result: Dict[str, Any],
+) -> None:
+    if query_vector is None or entities is None or not answer:
+        return
+    semantic_cache.store(
+        query_vector,
+        version,
+        {
+            "answer": answer,
+            "graph_result": graph_result,
+            "vector_result": vector_result,
+        },
+        key=entities,
+    )
+
+
+async def retrieve_context(
+    message: str,
+    query_vector: Optional[List[float]] = None,
+    lookup: Optional[GraphLookup] = None,
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """Graph and vector retrieval for message, run concurrently."""
+    # Without a lookup the graph stage reads graph.json / graph.db; keep
+    # that file I/O off the event loop.
+    return await asyncio.gather(
+        _retrieval_stage(
+            "graph",
+            asyncio.to_thread(build_graph_context, message, lookup),
+            CHAT_GRAPH_TIMEOUT_SECONDS,
+        ),
+        _retrieval_stage(
+            "vector",
+            build_vector_context_async(message, query_vector),
+            CHAT_VECTOR_TIMEOUT_SECONDS,
+        ),
+    )
+
+
+def build_chat_input(
+    message: str, graph_context_str: str, vector_context_str: str
+) -> List[Dict[str, str]]:
     user_content = (
         f"{message}\n\n"
         f"Graph Context:\n{graph_context_str}\n\n"
         f"Vector Context:\n{vector_context_str}"
     )
+    return [
+        {"role": "system", "content": SYSTEM_MSG},
+        {"role": "user", "content": user_content},
+    ]
 
-    response = openai_client.responses.create(
-        model="gpt-4o-mini",
-        input=[
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": user_content},
-        ],
-        temperature=0.1,
-        max_output_tokens=100,
-    )
+
+@router.post("/chat")
+async def chat(message: str = Form(...)):
+    started = time.perf_counter()
+
+    # The version is read before retrieval, so an answer built while the
+    # corpus changes is stored under the old version and never served.
+    query_vector, entities, lookup = await cache_lookup_key(message)
+    version = data_version()
+    hit = cached_answer(query_vector, version, entities)
+    if hit is not None:
+        cached = hit["value"]
+        await _log_chat(
+            message,
+            cached["answer"],
+            cached["graph_result"],
+            cached["vector_result"],
+            started,
+            cache_similarity=hit["similarity"],
+        )
+        return {"content": cached["answer"], "node": cached["graph_result"].get("node")}
+
+    graph_result, vector_result = await retrieve_context(message, query_vector, lookup)
+
+    graph_context_str = graph_result.get("context", "")
+    node = graph_result.get("node")
+    vector_context_str = vector_result.get("context", "")
+
+    logger.info(f"Vector Context: {vector_context_str}")
+
+    try:
+        response = await asyncio.wait_for(
+            openai_client.responses.create(
+                model=CHAT_MODEL,
+                input=build_chat_input(message, graph_context_str, vector_context_str),
+                temperature=0.1,
+                max_output_tokens=100,
+            ),
+            CHAT_LLM_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Chat model timed out")
 
     answer = response.output[0].content[0].text
 
+    cache_answer(query_vector, version, entities, answer, graph_result, vector_result)
+    await _log_chat(message, answer, graph_result, vector_result, started)
+
+    return {"content": answer, "node": node}
+
+
+async def _log_chat(
+    message: str,
+    answer: str,
+    graph_result: Dict[str, Any],
+    vector_result: Dict[str, Any],
+    started: float,
+    first_token_ms: Optional[float] = None,
+    cache_similarity: Optional[float] = None,
+) -> None:
+    graph_context_str = graph_result.get("context", "")
     retrieved_context = {
         "graph_context": graph_context_str,
-        "vector_context": vector_context_str,
+        "vector_context": vector_result.get("context", ""),
     }
 
     evaluation_scores = {
         "grounded_in_graph": bool(graph_context_str),
-        "latency_ms": None,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
     }
+    if first_token_ms is not None:
+        evaluation_scores["first_token_ms"] = first_token_ms
+    evaluation_scores["cache_hit"] = cache_similarity is not None
+    if cache_similarity is not None:
+        evaluation_scores["cache_similarity"] = round(cache_similarity, 4)
 
-    log_evaluation(
+    await asyncio.to_thread(
+        log_evaluation,
         query=message,
         answer=answer,
         retrieved_context=retrieved_context,
         evaluation_scores=evaluation_scores,
-        focused_pokemon=node,
+        focused_pokemon=graph_result.get("node"),
     )
 
-    return {"content": answer, "node": node}
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _event_stream(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _replay_cached(
+    message: str, hit: Dict[str, Any], started: float
+) -> AsyncIterator[str]:
+    cached = hit["value"]
+    graph_result, vector_result = cached["graph_result"], cached["vector_result"]
+    yield _sse(
+        "metadata",
+        {
+            "node": graph_result.get("node"),
+            "sources": vector_result.get("sources", []),
+            "cached": True,
+        },
+    )
+    yield _sse("token", {"text": cached["answer"]})
+    yield _sse("done", {"content": cached["answer"], "node": graph_result.get("node")})
+    await _log_chat(
+        message,
+        cached["answer"],
+        graph_result,
+        vector_result,
+        started,
+        cache_similarity=hit["similarity"],
+    )
+
+
+@router.post("/chat/stream")
+async def chat_stream(message: str = Form(...)):
+    """
+    /chat as Server-Sent Events: a "metadata" event with the focused node and
+    the vector sources, a "token" event per text delta, then "done" with the
+    full answer ("error" if generation times out). A semantic cache hit is
+    sent as a single token.
+    """
+    started = time.perf_counter()
+
+    query_vector, entities, lookup = await cache_lookup_key(message)
+    version = data_version()
+    hit = cached_answer(query_vector, version, entities)
+    if hit is not None:
+        return _event_stream(_replay_cached(message, hit, started))
+
+    graph_result, vector_result = await retrieve_context(message, query_vector, lookup)
+    node = graph_result.get("node")
+    chat_input = build_chat_input(
+        message, graph_result.get("context", ""), vector_result.get("context", "")
+    )
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse(
+            "metadata", {"node": node, "sources": vector_result.get("sources", [])}
+        )
+
+        parts: List[str] = []
+        first_token_ms: Optional[float] = None
+        stream = None
+        try:
+            stream = await asyncio.wait_for(
+                openai_client.responses.create(
+                    model=CHAT_MODEL,
+                    input=chat_input,
+                    temperature=0.1,
+                    max_output_tokens=100,
+                    stream=True,
+                ),
+                CHAT_LLM_TIMEOUT_SECONDS,
+            )
+            # __aiter__/__anext__ rather than aiter()/anext() (Python 3.10+).
+            stream_events = stream.__aiter__()
+            while True:
+                # The budget applies to each wait, so a long answer that keeps
+                # producing tokens is not cut off.
+                try:
+                    event = await asyncio.wait_for(
+                        stream_events.__anext__(), CHAT_LLM_TIMEOUT_SECONDS
+                    )
+                except StopAsyncIteration:
+                    break
+                if event.type != "response.output_text.delta":
+                    continue
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                parts.append(event.delta)
+                yield _sse("token", {"text": event.delta})
+        except asyncio.TimeoutError:
+            logger.warning("Chat model stream timed out")
+            yield _sse("error", {"detail": "Chat model timed out"})
+            return
+        except Exception:
+            # Headers are already sent; report the failure in the stream.
+            logger.exception("Chat model stream failed")
+            yield _sse("error", {"detail": "Chat model failed"})
+            return
+        finally:
+            # Also runs when the client disconnects (the generator is closed),
+            # so the upstream HTTP connection is always released.
+            if stream is not None:
+                await stream.close()
+
+        answer = "".join(parts)
+        cache_answer(
+            query_vector, version, entities, answer, graph_result, vector_result
+        )
+        yield _sse("done", {"content": answer, "node": node})
+        await _log_chat(
+            message, answer, graph_result, vector_result, started, first_token_ms
+        )
+
+    return _event_stream(events())
+
+
+@router.get("/chat/cache/metrics")
+async def chat_cache_metrics():
+    return {"enabled": SEMANTIC_CACHE_ENABLED, **semantic_cache.metrics()}
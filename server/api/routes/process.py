@@ -1,9 +1,12 @@
 import logging
 
+from api.routes.jobs import job_accepted
 from fastapi import (
     APIRouter,
     HTTPException,
+    Response,
 )
+from jobs.runner import run_locked, submit_job
 from scripts.process import main as run_build_graph
 
 logger = logging.getLogger(__name__)
@@ -12,14 +15,20 @@ router = APIRouter(tags=["process"])
 
 
 @router.post("/process")
-def process_graph() -> dict:
+def process_graph(response: Response, background: bool = False) -> dict:
     """
     Run the graph-building pipeline:
     - build_graph_and_export_to_csv_and_json()
+
+    With ?background=true the build is queued as a job and its id returned.
     """
+    if background:
+        return job_accepted(response, submit_job("process"))
+
     try:
         logger.info("API: starting graph build via /process")
-        run_build_graph()
+        # Waits for a running graph build job instead of racing it.
+        run_locked("process", run_build_graph)
         logger.info("API: graph built and exported")
         return {"message": "Graph built and exported to CSV and JSON successfully."}
     except Exception as e:
@@ -0,0 +1,17 @@
+import logging
+
+from fastapi import APIRouter, HTTPException
+from ingestion import record_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["records"])
+
+
+@router.get("/records/{media_id}")
+def get_record(media_id: str) -> dict:
+    """Processed record for one media id, e.g. to show the sources of an answer."""
+    record = record_store.get_record(media_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown media id: {media_id}")
+    return record
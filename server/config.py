@@ -2,24 +2,40 @@ import os
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
-from openai import OpenAI
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as qm
 
 load_dotenv()
 
-openai_client = OpenAI(
-    api_key=os.environ["OPENAI_API_KEY"],
-)
-
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "pokemon_corpus")
 EMBED_DIM = 1536
 
+# LLM provider selection: "openai", "openai_compatible" (any server speaking the
+# OpenAI API, e.g. Ollama at http://localhost:11434/v1) or "fake" (deterministic,
+# in-process, no network). Each stage can override the provider and model with
+# LLM_PROVIDER_<STAGE> / LLM_MODEL_<STAGE>, where STAGE is EXTRACTION, CHAT or
+# EMBEDDING.
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "ollama")
+DEFAULT_MODELS = {
+    "extraction": "gpt-4o-mini",
+    "chat": "gpt-4o-mini",
+    "embedding": "text-embedding-3-small",
+}
+
 
 def get_qdrant_client() -> QdrantClient:
     return QdrantClient(
         url=QDRANT_URL,
         api_key=QDRANT_API_KEY,
     )
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    return AsyncQdrantClient(
+        url=QDRANT_URL,
+        api_key=QDRANT_API_KEY,
+    )
@@ -1,48 +1,37 @@
-import json
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
-import whisper
+from ingestion import dedupe, record_store
+from ingestion.media_cache import cached_extraction
+from ingestion.transcription import asr_version, get_transcription_pool
 from processing.embeddings import embed_text
 from processing.vector_store import upsert_document
 
 logger = logging.getLogger(__name__)
 
-AUDIO_JSONL = Path("data/processed/audio.jsonl")
-_model = None
-
-
-def _get_whisper_model():
-    global _model
-
-    if _model is None:
-        logger.info(
-            "_get_whisper_model loading model",
-            extra={"model_name": "small"},
-        )
-        _model = whisper.load_model("small")
-        logger.info(
-            "_get_whisper_model finished loading",
-            extra={"model_name": "small"},
-        )
-
-    return _model
-
 
 def extract_text_from_audio(
-    path: str, model=None
+    path: str, model=None, content_hash: Optional[str] = None
 ) -> str:  # test purposes: fake model can be passed to avoid loading whisper on tests
     logger.info(
         "extract_text_from_audio started",
         extra={"path": str(path)},
     )
 
-    if model is None:
-        model = _get_whisper_model()
-
     try:
-        result = model.transcribe(path, fp16=False)
+        if model is None:
+            # Segmented, parallel transcription on the warm worker pool,
+            # skipped entirely when these bytes were transcribed before.
+            text = cached_extraction(
+                str(path),
+                "asr",
+                asr_version(),
+                lambda: get_transcription_pool().transcribe(str(path)),
+                content_hash=content_hash,
+            )
+        else:
+            text = model.transcribe(path, fp16=False)["text"].strip()
     except Exception:
         logger.exception(
             "Error during audio transcription",
@@ -50,8 +39,6 @@ def extract_text_from_audio(
         )
         raise
 
-    text = result["text"].strip() or ""
-
     if not text:
         logger.debug(
             "Empty or whitespace-only transcription",
@@ -69,8 +56,28 @@ def extract_text_from_audio(
     return text
 
 
+def build_audio_record(
+    path: Path, text: str, pokemon: str, generation: int, types: list[str]
+) -> Dict:
+    return {
+        "id": record_store.make_record_id("audio", path),
+        "modality": "audio",
+        "source_path": str(path),
+        "text": text,
+        "pokemon": pokemon,
+        "generation": generation,
+        "types": types,
+        "tags": ["starter", "audio", pokemon.lower()],
+    }  # dataset is all starter pokemon, default tag "starter"
+
+
 def ingest_audio(
-    audio_path_string: str, pokemon: str, generation: int, types: list[str], model=None
+    audio_path_string: str,
+    pokemon: str,
+    generation: int,
+    types: list[str],
+    model=None,
+    content_hash: Optional[str] = None,
 ) -> Dict[str, str]:
     audio_path = Path(audio_path_string)
 
@@ -79,27 +86,20 @@ def ingest_audio(
         extra={"path": str(audio_path)},
     )
 
-    text = extract_text_from_audio(str(audio_path), model)
+    text = extract_text_from_audio(str(audio_path), model, content_hash)
 
-    record: Dict = {
-        "id": audio_path.stem,
-        "modality": "audio",
-        "source_path": str(audio_path),
-        "text": text,
-        "pokemon": pokemon,
-        "generation": generation,
-        "types": types,
-        "tags": ["starter", "audio", pokemon.lower()],
-    }  # dataset is all starter pokemon, default tag "starter"
+    record = build_audio_record(audio_path, text, pokemon, generation, types)
 
-    vector = embed_text(record["text"])
-    metadata = {
-        "media_id": record["id"],
-        "media_type": "text",
-        "pokemon": record.get("pokemon"),
-        "source_path": str(audio_path),
-    }
-    upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
+    # Near-duplicates are linked to their canonical record, not indexed.
+    if not dedupe.link_duplicate(record):
+        vector = embed_text(record["text"])
+        metadata = {
+            "media_id": record["id"],
+            "media_type": "text",
+            "pokemon": record.get("pokemon"),
+            "source_path": str(audio_path),
+        }
+        upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
 
     logger.debug(
         "ingest_audio finished",
@@ -113,16 +113,12 @@ def ingest_audio(
 
 
 def write_audio_record(record: Dict) -> None:
-    AUDIO_JSONL.parent.mkdir(parents=True, exist_ok=True)
-
-    with AUDIO_JSONL.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False))
-        f.write("\n")
+    record_store.upsert_records([record])
 
     logger.info(
         "write_audio_record finished",
         extra={
             "id": record["id"],
-            "path": str(AUDIO_JSONL),
+            "path": str(record_store.RECORD_DB),
         },
     )
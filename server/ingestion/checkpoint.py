@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DB = Path(
+    os.getenv("INGEST_CHECKPOINT_PATH", "data/processed/ingest_wal.db")
+)
+
+# Per-file stage completion, in pipeline order. A file's entry only counts
+# for the content hash it was written with, so an edited file starts over.
+EXTRACTED = "extracted"
+EMBEDDED = "embedded"
+UPSERTED = "upserted"
+WRITTEN = "written"
+STAGES = (EXTRACTED, EMBEDDED, UPSERTED, WRITTEN)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_wal (
+    path TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    record TEXT,
+    vector TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def connect_checkpoints(path: Optional[Path] = None) -> sqlite3.Connection:
+    db_path = path or CHECKPOINT_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    set_journal_mode(conn, db_path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+# record_stage runs for every file at every stage, from all pipeline threads;
+# they share one connection per process instead of opening one per call.
+_shared_conn: Optional[sqlite3.Connection] = None
+_shared_key: Optional[tuple] = None
+_shared_lock = threading.Lock()
+
+
+def _shared_connection() -> sqlite3.Connection:
+    """
+    This process's connection to CHECKPOINT_DB. Call with _shared_lock held.
+    A forked child opens its own rather than using the parent's.
+    """
+    global _shared_conn, _shared_key
+    key = (os.getpid(), CHECKPOINT_DB)
+    if _shared_key != key:
+        if _shared_conn is not None and _shared_key[0] == key[0]:
+            _shared_conn.close()
+        _shared_conn = connect_checkpoints()
+        _shared_key = key
+    return _shared_conn
+
+
+@contextmanager
+def checkpoint_db(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    conn = connect_checkpoints(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def reached(entry: Optional[Dict[str, Any]], stage: str) -> bool:
+    """True when the checkpoint entry has completed stage (or a later one)."""
+    return entry is not None and STAGES.index(entry["stage"]) >= STAGES.index(stage)
+
+
+def record_stage(
+    path: str,
+    content_hash: Optional[str],
+    stage: str,
+    record: Optional[Dict[str, Any]] = None,
+    vector: Optional[List[float]] = None,
+) -> None:
+    """
+    Log that a file completed stage. record and vector are kept from earlier
+    stages of the same content when not given; a new content hash replaces
+    the entry.
+    """
+    if content_hash is None:
+        return
+    params = (
+        path,
+        content_hash,
+        stage,
+        json.dumps(record, ensure_ascii=False) if record is not None else None,
+        json.dumps(vector) if vector is not None else None,
+        time.time(),
+    )
+    with _shared_lock:
+        conn = _shared_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO ingest_wal (path, content_hash, stage, record, vector, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET "
+                "stage = excluded.stage, "
+                "record = CASE WHEN ingest_wal.content_hash = excluded.content_hash "
+                "THEN COALESCE(excluded.record, ingest_wal.record) "
+                "ELSE excluded.record END, "
+                "vector = CASE WHEN ingest_wal.content_hash = excluded.content_hash "
+                "THEN COALESCE(excluded.vector, ingest_wal.vector) "
+                "ELSE excluded.vector END, "
+                "content_hash = excluded.content_hash, "
+                "updated_at = excluded.updated_at",
+                params,
+            )
+
+
+def load_checkpoints(jobs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Checkpoint entries for jobs whose content hash still matches, by path."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    with checkpoint_db() as conn:
+        for job in jobs:
+            row = conn.execute(
+                "SELECT * FROM ingest_wal WHERE path = ? AND content_hash = ?",
+                (job["path"], job.get("content_hash")),
+            ).fetchone()
+            if row is None:
+                continue
+            entries[job["path"]] = {
+                "stage": row["stage"],
+                "record": json.loads(row["record"]) if row["record"] else None,
+                "vector": json.loads(row["vector"]) if row["vector"] else None,
+            }
+    return entries
+
+
+def clear(paths: Iterable[str]) -> None:
+    with checkpoint_db() as conn, conn:
+        conn.executemany(
+            "DELETE FROM ingest_wal WHERE path = ?", [(str(p),) for p in paths]
+        )
+
+
+def legacy_paths() -> List[str]:
+    """Paths whose logged record still has a bare-stem id."""
+    with checkpoint_db() as conn:
+        rows = conn.execute(
+            "SELECT path FROM ingest_wal WHERE record IS NOT NULL "
+            "AND instr(json_extract(record, '$.id'), ':') = 0"
+        ).fetchall()
+    return [r["path"] for r in rows]
+
+
+def purge_written() -> int:
+    """Drop entries of fully written files; the manifest now covers them."""
+    with checkpoint_db() as conn, conn:
+        return conn.execute(
+            "DELETE FROM ingest_wal WHERE stage = ?", (WRITTEN,)
+        ).rowcount
@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+DEDUPE_DB = Path(os.getenv("DEDUPE_DB_PATH", "data/processed/dedupe.db"))
+DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "1") != "0"
+
+# Estimated Jaccard similarity of character shingles above which a record is
+# linked to an existing canonical record instead of being indexed itself.
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.85"))
+# Texts shorter than this (after normalization) are never deduplicated: short
+# OCR snippets and captions overlap too easily to be called duplicates.
+DEDUPE_MIN_CHARS = int(os.getenv("DEDUPE_MIN_CHARS", "200"))
+
+# Character k-grams survive OCR noise better than word shingles: one wrong
+# letter only touches k shingles instead of a whole word's worth of them.
+SHINGLE_SIZE = 5
+MINHASH_PERMUTATIONS = 128
+# 32 bands of 4 rows: pairs at similarity 0.85 collide in at least one band
+# with probability > 0.9999, pairs at 0.3 with probability ~0.23.
+LSH_BANDS = 32
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHINGLE_BLOCK = 4096
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+# The dedupe stage decides which record is canonical; serializing it keeps two
+# near-identical files from both becoming canonical at the same time.
+_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    media_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,
+    duplicate_of TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_signatures_duplicate_of ON signatures (duplicate_of);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    media_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_bucket ON lsh_buckets (band, bucket);
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_media ON lsh_buckets (media_id);
+"""
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[str]:
+    normalized = normalize(text)
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MINHASH_PERMUTATIONS-long MinHash signature of the text's shingles."""
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "big")
+            for s in shingles(text)
+        ),
+        dtype=np.uint64,
+    )
+    signature = np.full(MINHASH_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+    # Blocks bound memory at _SHINGLE_BLOCK x MINHASH_PERMUTATIONS values.
+    for start in range(0, len(hashes), _SHINGLE_BLOCK):
+        block = hashes[start : start + _SHINGLE_BLOCK, None]
+        permuted = ((block * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+        signature = np.minimum(signature, permuted.min(axis=0))
+    return signature
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Fraction of equal MinHash values, an unbiased Jaccard estimate."""
+    return float(np.mean(a == b))
+
+
+def band_keys(signature: np.ndarray) -> List[str]:
+    return [
+        hashlib.blake2b(band.tobytes(), digest_size=8).hexdigest()
+        for band in np.array_split(signature, LSH_BANDS)
+    ]
+
+
+def connect_dedupe(path: Optional[Path] = None) -> sqlite3.Connection:
+    db_path = path or DEDUPE_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    set_journal_mode(conn, db_path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+@contextmanager
+def dedupe_db(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    conn = connect_dedupe(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _drop(conn: sqlite3.Connection, media_ids: List[str]) -> None:
+    rows = [(media_id,) for media_id in media_ids]
+    conn.executemany("DELETE FROM signatures WHERE media_id = ?", rows)
+    conn.executemany("DELETE FROM lsh_buckets WHERE media_id = ?", rows)
+
+
+def find_duplicate(
+    conn: sqlite3.Connection, media_id: str, signature: np.ndarray
+) -> Optional[Tuple[str, float]]:
+    """
+    Most similar canonical record at or above DEDUPE_THRESHOLD, as
+    (media_id, estimated similarity), or None.
+    """
+    candidates: set[str] = set()
+    for band, key in enumerate(band_keys(signature)):
+        candidates.update(
+            row["media_id"]
+            for row in conn.execute(
+                "SELECT media_id FROM lsh_buckets WHERE band = ? AND bucket = ?",
+                (band, key),
+            )
+        )
+    candidates.discard(media_id)
+    if not candidates:
+        return None
+
+    placeholders = ", ".join("?" for _ in candidates)
+    rows = conn.execute(
+        f"SELECT media_id, signature FROM signatures WHERE media_id IN ({placeholders})",
+        sorted(candidates),
+    ).fetchall()
+
+    best: Optional[Tuple[str, float]] = None
+    for row in rows:
+        other = np.frombuffer(row["signature"], dtype=np.uint64)
+        similarity = estimated_similarity(signature, other)
+        if similarity >= DEDUPE_THRESHOLD and (best is None or similarity > best[1]):
+            best = (row["media_id"], similarity)
+    return best
+
+
+def link_duplicate(record: Dict[str, Any], path: Optional[Path] = None) -> bool:
+    """
+    Check record["text"] against the index of canonical records.
+
+    A near-duplicate gets "duplicate_of" (the canonical media_id) and
+    "duplicate_similarity" set and True is returned: it should not be
+    embedded or sent to extraction. Otherwise the record becomes a canonical
+    entry of the index and False is returned.
+    """
+    record.pop("duplicate_of", None)
+    record.pop("duplicate_similarity", None)
+    media_id = record["id"]
+    text = record.get("text") or ""
+
+    if not DEDUPE_ENABLED or len(normalize(text)) < DEDUPE_MIN_CHARS:
+        if DEDUPE_ENABLED:
+            with _lock, dedupe_db(path) as conn, conn:
+                _drop(conn, [media_id])
+        return False
+
+    signature = minhash_signature(text)
+    with _lock, dedupe_db(path) as conn, conn:
+        # Take the write lock before reading candidates: _lock only covers
+        # this process, and distributed ingest workers share the database.
+        conn.execute("BEGIN IMMEDIATE")
+        # A changed file is re-checked from scratch under the same id.
+        _drop(conn, [media_id])
+        match = find_duplicate(conn, media_id, signature)
+
+        conn.execute(
+            "INSERT INTO signatures (media_id, signature, duplicate_of) "
+            "VALUES (?, ?, ?)",
+            (media_id, signature.tobytes(), match[0] if match else None),
+        )
+        if match is None:
+            conn.executemany(
+                "INSERT INTO lsh_buckets (band, bucket, media_id) VALUES (?, ?, ?)",
+                [
+                    (band, key, media_id)
+                    for band, key in enumerate(band_keys(signature))
+                ],
+            )
+            return False
+
+    record["duplicate_of"], similarity = match
+    record["duplicate_similarity"] = round(similarity, 3)
+    logger.info(
+        "Near-duplicate record linked",
+        extra={
+            "id": media_id,
+            "duplicate_of": match[0],
+            "similarity": record["duplicate_similarity"],
+        },
+    )
+    return True
+
+
+def forget(media_ids: Iterable[str], path: Optional[Path] = None) -> List[str]:
+    """
+    Remove deleted records from the index. Returns the ids of duplicates
+    whose canonical record was among them; they have to be re-ingested so
+    one of them can become the new canonical record.
+    """
+    ids = list(dict.fromkeys(media_ids))
+    if not ids:
+        return []
+
+    placeholders = ", ".join("?" for _ in ids)
+    with _lock, dedupe_db(path) as conn, conn:
+        orphans = [
+            row["media_id"]
+            for row in conn.execute(
+                f"SELECT media_id FROM signatures WHERE duplicate_of IN ({placeholders})",
+                ids,
+            )
+            if row["media_id"] not in ids
+        ]
+        _drop(conn, ids + orphans)
+    return orphans
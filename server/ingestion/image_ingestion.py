@@ -1,25 +1,18 @@
-import json
 import logging
 from pathlib import Path
+from typing import Optional
 
-import pytesseract
+from ingestion import dedupe, record_store
+from ingestion.media_cache import cached_extraction
+from ingestion.ocr import ocr_image, ocr_version
 from PIL import Image
 from processing.embeddings import embed_text
 from processing.vector_store import upsert_document
 
 logger = logging.getLogger(__name__)
 
-PROCESSED_DIR = Path("data/processed")
-IMAGES_JSONL = PROCESSED_DIR / "images.jsonl"
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-
-
-def extract_text_from_image(image_path_string: str) -> str:
-    image_path = Path(image_path_string)
-    logger.info(
-        "extract_text_from_image started", extra={"image_path": str(image_path)}
-    )
 
+def _ocr_file(image_path: Path) -> str:
     try:
         image = Image.open(image_path)
     except Exception as e:
@@ -30,7 +23,7 @@ def extract_text_from_image(image_path_string: str) -> str:
         raise e
 
     try:
-        raw_text = pytesseract.image_to_string(image)
+        return ocr_image(image)
     except Exception as e:
         logger.exception(
             "Error running OCR",
@@ -38,7 +31,22 @@ def extract_text_from_image(image_path_string: str) -> str:
         )
         raise e
 
-    text = raw_text.strip()
+
+def extract_text_from_image(
+    image_path_string: str, content_hash: Optional[str] = None
+) -> str:
+    image_path = Path(image_path_string)
+    logger.info(
+        "extract_text_from_image started", extra={"image_path": str(image_path)}
+    )
+
+    text = cached_extraction(
+        str(image_path),
+        "image_ocr",
+        ocr_version(),
+        lambda: _ocr_file(image_path),
+        content_hash=content_hash,
+    )
 
     logger.info(
         "extract_text_from_image finished",
@@ -50,8 +58,31 @@ def extract_text_from_image(image_path_string: str) -> str:
     return text
 
 
+def build_image_record(
+    path: Path, text: str, pokemon: str, generation: int, types: list[str]
+) -> dict:
+    return {
+        "id": record_store.make_record_id("image", path),
+        "modality": "image",
+        "source_path": str(path),
+        "text": text,
+        "pokemon": pokemon,
+        "generation": generation,
+        "types": types,
+        "tags": [
+            "starter",
+            "image",
+            pokemon.lower(),
+        ],
+    }  # dataset is all starter pokemon, default tag "starter"
+
+
 def ingest_image(
-    image_path_string: str, pokemon: str, generation: int, types: list[str]
+    image_path_string: str,
+    pokemon: str,
+    generation: int,
+    types: list[str],
+    content_hash: Optional[str] = None,
 ):
     image_path = Path(image_path_string)
 
@@ -64,31 +95,20 @@ def ingest_image(
         },
     )
 
-    text = extract_text_from_image(image_path_string)
+    text = extract_text_from_image(image_path_string, content_hash)
 
-    record = {
-        "id": image_path.stem,
-        "modality": "image",
-        "source_path": str(image_path),
-        "text": text,
-        "pokemon": pokemon,
-        "generation": generation,
-        "types": types,
-        "tags": [
-            "starter",
-            "image",
-            pokemon.lower(),
-        ],
-    }  # dataset is all starter pokemon, default tag "starter"
+    record = build_image_record(image_path, text, pokemon, generation, types)
 
-    vector = embed_text(record["text"])
-    metadata = {
-        "media_id": record["id"],
-        "media_type": "text",
-        "pokemon": record.get("pokemon"),
-        "source_path": str(image_path),
-    }
-    upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
+    # Near-duplicates are linked to their canonical record, not indexed.
+    if not dedupe.link_duplicate(record):
+        vector = embed_text(record["text"])
+        metadata = {
+            "media_id": record["id"],
+            "media_type": "text",
+            "pokemon": record.get("pokemon"),
+            "source_path": str(image_path),
+        }
+        upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
 
     logger.debug(
         "ingest_image record created",
@@ -103,12 +123,9 @@ def ingest_image(
 
 
 def write_image_record(record: dict) -> None:
-    IMAGES_JSONL.parent.mkdir(parents=True, exist_ok=True)
-    with IMAGES_JSONL.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False))
-        f.write("\n")
+    record_store.upsert_records([record])
 
     logger.info(
         "write_image_record finished",
-        extra={"id": record["id"], "path": str(IMAGES_JSONL)},
+        extra={"id": record["id"], "path": str(record_store.RECORD_DB)},
     )
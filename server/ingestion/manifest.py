@@ -0,0 +1,239 @@
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ingestion.hashing import file_sha256
+from ingestion.metadata import sidecar_path
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_DB = Path(os.getenv("INGEST_MANIFEST_PATH", "data/processed/manifest.db"))
+
+# Bump when extraction or the record format changes; every file whose entry
+# was written by another version is re-ingested on the next run.
+PIPELINE_VERSION = "1"
+
+# Files an API upload is ingesting itself are claimed so the watcher does not
+# ingest them a second time. A claim left by a crashed request lapses after
+# INGEST_CLAIM_TTL_SECONDS.
+INGEST_CLAIM_TTL_SECONDS = float(os.getenv("INGEST_CLAIM_TTL_SECONDS", "3600"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    modality TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    pipeline_version TEXT NOT NULL,
+    ingested_at REAL NOT NULL,
+    sidecar_mtime_ns INTEGER,
+    sidecar_hash TEXT
+);
+
+CREATE TABLE IF NOT EXISTS claimed_files (
+    path TEXT PRIMARY KEY,
+    claimed_at REAL NOT NULL
+);
+"""
+
+# Columns added since the table was first created; older manifests get them
+# with NULLs (no sidecar) on connect.
+_ADDED_COLUMNS = {"sidecar_mtime_ns": "INTEGER", "sidecar_hash": "TEXT"}
+
+
+def connect_manifest(path: Optional[Path] = None) -> sqlite3.Connection:
+    db_path = path or MANIFEST_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    set_journal_mode(conn, db_path)
+    conn.executescript(_SCHEMA)
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(ingested_files)")}
+    with conn:
+        for name, kind in _ADDED_COLUMNS.items():
+            if name not in columns:
+                conn.execute(f"ALTER TABLE ingested_files ADD COLUMN {name} {kind}")
+    return conn
+
+
+@contextmanager
+def manifest_db(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    conn = connect_manifest(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_entry(conn: sqlite3.Connection, path: Path) -> Optional[Dict[str, Any]]:
+    row = conn.execute(
+        "SELECT * FROM ingested_files WHERE path = ?", (str(path),)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def file_state(path: Path, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    What the manifest stores about path: its size and mtime, content hash,
+    and the mtime and hash of its metadata sidecar (None without one).
+
+    Each stat is taken before the bytes it describes are hashed, so a write
+    that races the hashing leaves a newer mtime on disk than in the manifest
+    and the file is checked again, instead of being recorded as unchanged.
+    """
+    stat = path.stat()
+    sidecar = sidecar_path(path)
+    try:
+        sidecar_mtime_ns: Optional[int] = sidecar.stat().st_mtime_ns
+    except FileNotFoundError:
+        sidecar_mtime_ns = None
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": content_hash or file_sha256(path),
+        "sidecar_mtime_ns": sidecar_mtime_ns,
+        "sidecar_hash": (
+            file_sha256(sidecar) if sidecar_mtime_ns is not None else None
+        ),
+    }
+
+
+def check_file(conn: sqlite3.Connection, path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Return the file_state of path if it needs ingesting, or None if the
+    manifest already has it at the current pipeline version. Pass the state
+    on to mark_ingested, so the manifest records the stat that goes with the
+    hashed content rather than a later one.
+
+    size + mtime of the file and of its metadata sidecar are checked first so
+    unchanged files are never read; a file that was only touched (same bytes)
+    gets its stat refreshed and is skipped. Adding, editing or removing a
+    sidecar re-ingests the file, since it changes the record's metadata.
+    """
+    entry = get_entry(conn, path)
+    stat = path.stat()
+    sidecar = sidecar_path(path)
+    sidecar_mtime_ns = sidecar.stat().st_mtime_ns if sidecar.exists() else None
+    current = entry is not None and entry["pipeline_version"] == PIPELINE_VERSION
+    if (
+        current
+        and entry["size"] == stat.st_size
+        and entry["mtime_ns"] == stat.st_mtime_ns
+        and entry["sidecar_mtime_ns"] == sidecar_mtime_ns
+    ):
+        return None
+
+    state = file_state(path)
+    if (
+        current
+        and entry["content_hash"] == state["content_hash"]
+        and entry["sidecar_hash"] == state["sidecar_hash"]
+    ):
+        with conn:
+            conn.execute(
+                "UPDATE ingested_files SET size = ?, mtime_ns = ?, "
+                "sidecar_mtime_ns = ? WHERE path = ?",
+                (
+                    state["size"],
+                    state["mtime_ns"],
+                    state["sidecar_mtime_ns"],
+                    str(path),
+                ),
+            )
+        return None
+    return state
+
+
+def mark_ingested(
+    path: Path,
+    modality: str,
+    record_id: str,
+    content_hash: Optional[str] = None,
+    db_path: Optional[Path] = None,
+    state: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Record path as ingested. state is the file_state check_file returned
+    when the file was planned; without it the file is stat'd now.
+    """
+    state = state or file_state(path, content_hash)
+    with manifest_db(db_path) as conn, conn:
+        conn.execute(
+            "INSERT INTO ingested_files (path, modality, record_id, size, mtime_ns, "
+            "content_hash, pipeline_version, ingested_at, sidecar_mtime_ns, "
+            "sidecar_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET "
+            "modality = excluded.modality, "
+            "record_id = excluded.record_id, "
+            "size = excluded.size, "
+            "mtime_ns = excluded.mtime_ns, "
+            "content_hash = excluded.content_hash, "
+            "pipeline_version = excluded.pipeline_version, "
+            "ingested_at = excluded.ingested_at, "
+            "sidecar_mtime_ns = excluded.sidecar_mtime_ns, "
+            "sidecar_hash = excluded.sidecar_hash",
+            (
+                str(path),
+                modality,
+                record_id,
+                state["size"],
+                state["mtime_ns"],
+                state["content_hash"],
+                PIPELINE_VERSION,
+                time.time(),
+                state["sidecar_mtime_ns"],
+                state["sidecar_hash"],
+            ),
+        )
+
+
+def claim(path: Path) -> None:
+    with manifest_db() as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO claimed_files (path, claimed_at) VALUES (?, ?)",
+            (str(path), time.time()),
+        )
+
+
+def release(path: Path) -> None:
+    with manifest_db() as conn, conn:
+        conn.execute("DELETE FROM claimed_files WHERE path = ?", (str(path),))
+
+
+def is_claimed(
+    conn: sqlite3.Connection, path: Path, now: Optional[float] = None
+) -> bool:
+    now = time.time() if now is None else now
+    row = conn.execute(
+        "SELECT claimed_at FROM claimed_files WHERE path = ?", (str(path),)
+    ).fetchone()
+    return row is not None and now - row["claimed_at"] < INGEST_CLAIM_TTL_SECONDS
+
+
+def missing_entries(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Manifest entries whose source file no longer exists."""
+    rows = conn.execute("SELECT * FROM ingested_files").fetchall()
+    return [dict(r) for r in rows if not Path(r["path"]).exists()]
+
+
+def legacy_entries(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Entries whose record id is a bare file stem (see make_record_id)."""
+    rows = conn.execute(
+        "SELECT * FROM ingested_files WHERE instr(record_id, ':') = 0"
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def forget(conn: sqlite3.Connection, paths: Iterable[str]) -> None:
+    with conn:
+        conn.executemany(
+            "DELETE FROM ingested_files WHERE path = ?", [(p,) for p in paths]
+        )
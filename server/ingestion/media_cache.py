@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from ingestion.hashing import file_sha256
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_DB = Path(os.getenv("MEDIA_CACHE_PATH", "data/cache/media_extraction.db"))
+MEDIA_CACHE_MAX_ENTRIES = int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", "50000"))
+MEDIA_CACHE_ENABLED = os.getenv("MEDIA_CACHE_ENABLED", "1") != "0"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media_cache (
+    content_hash TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    extractor_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (content_hash, extractor, extractor_version)
+);
+CREATE INDEX IF NOT EXISTS idx_media_cache_last_used ON media_cache (last_used);
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    MEDIA_CACHE_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(MEDIA_CACHE_DB), timeout=30)
+    set_journal_mode(conn, MEDIA_CACHE_DB)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def get_cached_result(content_hash: str, extractor: str, version: str) -> Any:
+    """Cached extractor output for these file bytes, or None."""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT result FROM media_cache "
+            "WHERE content_hash = ? AND extractor = ? AND extractor_version = ?",
+            (content_hash, extractor, version),
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE media_cache SET last_used = ? "
+                "WHERE content_hash = ? AND extractor = ? AND extractor_version = ?",
+                (time.time(), content_hash, extractor, version),
+            )
+    finally:
+        conn.close()
+    return json.loads(row[0])
+
+
+def put_cached_result(
+    content_hash: str, extractor: str, version: str, result: Any
+) -> None:
+    now = time.time()
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO media_cache (content_hash, extractor, extractor_version, "
+                "result, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(content_hash, extractor, extractor_version) DO UPDATE SET "
+                "result = excluded.result, last_used = excluded.last_used",
+                (
+                    content_hash,
+                    extractor,
+                    version,
+                    json.dumps(result, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM media_cache").fetchone()
+            overflow = count - MEDIA_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM media_cache WHERE rowid IN ("
+                    "SELECT rowid FROM media_cache ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+    finally:
+        conn.close()
+
+
+def cached_extraction(
+    path: str,
+    extractor: str,
+    version: str,
+    compute: Callable[[], Any],
+    content_hash: Optional[str] = None,
+) -> Any:
+    """
+    Return compute()'s result for the file at path, reusing an earlier
+    result for the same bytes and extractor version. File names play no
+    part, so a renamed or re-uploaded copy is a hit.
+    """
+    if not MEDIA_CACHE_ENABLED:
+        return compute()
+
+    content_hash = content_hash or file_sha256(path)
+    cached = get_cached_result(content_hash, extractor, version)
+    if cached is not None:
+        logger.info(
+            "Media cache hit",
+            extra={"path": str(path), "extractor": extractor},
+        )
+        return cached
+
+    result = compute()
+    put_cached_result(content_hash, extractor, version, result)
+    return result
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from data.pokemon_mappings import POKEMON_MAPPING
+from processing.entity_resolution import mapping_aliases
+from processing.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# Where the key -> (pokemon, generation, types) mapping comes from: empty for
+# the built-in POKEMON_MAPPING, a .json file ({key: [pokemon, generation,
+# types]}) or a SQLite database with a pokemon_mapping table.
+METADATA_MAPPING_PATH = os.getenv("METADATA_MAPPING_PATH", "")
+
+# "<file>.meta.json" next to a raw file overrides what its name resolves to.
+SIDECAR_SUFFIX = ".meta.json"
+
+_SEPARATORS_RE = re.compile(r"[_\-.]+")
+
+Metadata = Tuple[str, int, list]
+
+
+def load_mapping(source: Optional[str] = None) -> Dict[str, tuple]:
+    source = METADATA_MAPPING_PATH if source is None else source
+    if not source:
+        return dict(POKEMON_MAPPING)
+
+    path = Path(source)
+    if path.suffix.lower() == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return {
+            key: (name, int(gen), list(types))
+            for key, (name, gen, types) in data.items()
+        }
+
+    conn = sqlite3.connect(str(path))
+    try:
+        rows = conn.execute(
+            "SELECT key, pokemon, generation, types FROM pokemon_mapping"
+        ).fetchall()
+    finally:
+        conn.close()
+    return {key: (name, int(gen), json.loads(types)) for key, name, gen, types in rows}
+
+
+def sidecar_path(path: Path) -> Path:
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def raw_path(path: Path) -> Path:
+    """The raw file a sidecar describes; any other path is returned as is."""
+    if path.name.endswith(SIDECAR_SUFFIX):
+        return path.with_name(path.name[: -len(SIDECAR_SUFFIX)])
+    return path
+
+
+def read_sidecar(path: Path) -> Optional[Dict[str, Any]]:
+    sidecar = sidecar_path(path)
+    if not sidecar.is_file():
+        return None
+    return json.loads(sidecar.read_text(encoding="utf-8"))
+
+
+class MetadataResolver:
+    """
+    Resolves a raw file to (pokemon, generation, types).
+
+    Mapping keys, canonical names and their aliases are compiled into one
+    keyword automaton, so a file name is scanned once however large the
+    mapping is. The longest matching name wins ("ivysaur_vs_venusaur" is a
+    Venusaur file, "pidgeotto_1" a Pidgeotto one); a sidecar file takes
+    precedence over the name.
+    """
+
+    def __init__(self, mapping: Optional[Mapping[str, tuple]] = None):
+        mapping = POKEMON_MAPPING if mapping is None else mapping
+        self._entries = {entry[0]: entry for entry in mapping.values()}
+        self._matcher = KeywordMatcher(
+            mapping_aliases(mapping).items(), word_boundaries=False
+        )
+
+    @classmethod
+    def from_source(cls, source: Optional[str] = None) -> "MetadataResolver":
+        return cls(load_mapping(source))
+
+    def match(self, text: str) -> Optional[Metadata]:
+        """Entry of the longest name in text (leftmost on ties), or None."""
+        matches = self._matcher.find_longest(_SEPARATORS_RE.sub(" ", text))
+        if not matches:
+            return None
+        _start, _end, name = max(matches, key=lambda m: (m[1] - m[0], -m[0]))
+        return self._entries[name]
+
+    def resolve(self, path: Path) -> Metadata:
+        sidecar = read_sidecar(path)
+        if sidecar is not None:
+            return self._from_sidecar(path, sidecar)
+
+        entry = self.match(path.stem)
+        if entry is None:
+            raise ValueError(f"Could not resolve metadata for {path}")
+        pokemon, generation, types = entry
+        return pokemon, generation, list(types)
+
+    def _from_sidecar(self, path: Path, sidecar: Dict[str, Any]) -> Metadata:
+        # A known name fills in whatever the sidecar leaves out.
+        known = self.match(sidecar.get("pokemon") or path.stem)
+        pokemon, generation, types = known or (sidecar.get("pokemon"), None, [])
+        generation = sidecar.get("generation", generation)
+        types = sidecar.get("types", types)
+        if not pokemon or generation is None:
+            raise ValueError(f"Could not resolve metadata for {path}")
+        return pokemon, int(generation), list(types)
+
+
+@lru_cache(maxsize=1)
+def default_resolver() -> MetadataResolver:
+    return MetadataResolver.from_source()
+
+
+def resolve_metadata(path: Path) -> Metadata:
+    return default_resolver().resolve(path)
@@ -0,0 +1,164 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+import pytesseract
+from ingestion.hashing import fingerprint
+from ingestion.pipeline import cpu_budget
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# One Tesseract configuration for every call (image files and PDF page
+# images), so results do not depend on which path produced them.
+TESSERACT_LANG = os.getenv("OCR_LANG", "eng")
+TESSERACT_CONFIG = os.getenv("OCR_TESSERACT_CONFIG", "--oem 1 --psm 3")
+
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "1") != "0"
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+# Images without DPI metadata are downscaled so their long side fits here.
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "3500"))
+
+# Adaptive threshold: a pixel is ink if it is darker than the mean of its
+# OCR_THRESHOLD_BLOCK x OCR_THRESHOLD_BLOCK neighbourhood minus the offset.
+OCR_THRESHOLD_BLOCK = int(os.getenv("OCR_THRESHOLD_BLOCK", "31"))
+OCR_THRESHOLD_OFFSET = int(os.getenv("OCR_THRESHOLD_OFFSET", "10"))
+
+# Images taller than OCR_TILE_HEIGHT are cut into overlapping horizontal
+# strips that are OCR'd in parallel (each Tesseract call is a subprocess).
+# Tile threads default to the process's CPU budget, so an extract worker or
+# PDF page worker only starts as many Tesseracts as its share of the CPUs.
+OCR_TILE_HEIGHT = int(os.getenv("OCR_TILE_HEIGHT", "1600"))
+OCR_TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", "80"))
+OCR_TILE_WORKERS = int(os.getenv("OCR_TILE_WORKERS", "0"))
+
+# Bump when preprocessing or merging changes in a way the settings above do
+# not capture; cached OCR results from older versions are then ignored.
+OCR_CODE_VERSION = "1"
+
+
+def ocr_version() -> str:
+    """Identifies everything that affects OCR output (media cache key)."""
+    return fingerprint(
+        OCR_CODE_VERSION,
+        TESSERACT_LANG,
+        TESSERACT_CONFIG,
+        OCR_PREPROCESS,
+        OCR_TARGET_DPI,
+        OCR_MAX_SIDE,
+        OCR_THRESHOLD_BLOCK,
+        OCR_THRESHOLD_OFFSET,
+        OCR_TILE_HEIGHT,
+        OCR_TILE_OVERLAP,
+    )
+
+
+def _downscale(image: Image.Image) -> Image.Image:
+    dpi = image.info.get("dpi")
+    scale = 1.0
+    if dpi and dpi[0] and float(dpi[0]) > OCR_TARGET_DPI:
+        scale = OCR_TARGET_DPI / float(dpi[0])
+    elif max(image.size) > OCR_MAX_SIDE:
+        scale = OCR_MAX_SIDE / max(image.size)
+
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def _box_mean(pixels: np.ndarray, block: int) -> np.ndarray:
+    """Mean over a block x block window around each pixel (edge-padded)."""
+    half = block // 2
+    padded = np.pad(pixels, half, mode="edge")
+
+    rows = np.cumsum(padded, axis=0)
+    rows = np.vstack([np.zeros((1, rows.shape[1])), rows])
+    vertical = rows[block:] - rows[:-block]
+
+    cols = np.cumsum(vertical, axis=1)
+    cols = np.hstack([np.zeros((cols.shape[0], 1)), cols])
+    return (cols[:, block:] - cols[:, :-block]) / (block * block)
+
+
+def adaptive_threshold(
+    gray: Image.Image,
+    block: int = OCR_THRESHOLD_BLOCK,
+    offset: int = OCR_THRESHOLD_OFFSET,
+) -> Image.Image:
+    """
+    Binarize against the local mean, so text on coloured or unevenly lit
+    backgrounds survives. Returns dark text on a white background.
+    """
+    block = max(3, block | 1)  # odd, so the window is centred
+    pixels = np.asarray(gray, dtype=np.float64)
+    ink = pixels < _box_mean(pixels, block) - offset
+
+    # Light text on a dark card: the "ink" is the background, flip it so
+    # Tesseract always sees dark glyphs on white.
+    if ink.mean() > 0.5:
+        ink = ~ink
+    return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8), mode="L")
+
+
+def preprocess_image(image: Image.Image) -> Image.Image:
+    """EXIF orientation, downscale to OCR_TARGET_DPI, grayscale, threshold."""
+    image = ImageOps.exif_transpose(image)
+    image = _downscale(image)
+    gray = image.convert("L")
+    return adaptive_threshold(gray)
+
+
+def _tesseract(image: Image.Image) -> str:
+    return pytesseract.image_to_string(
+        image, lang=TESSERACT_LANG, config=TESSERACT_CONFIG
+    ).strip()
+
+
+def _tiles(image: Image.Image) -> List[Image.Image]:
+    if image.height <= OCR_TILE_HEIGHT:
+        return [image]
+    step = max(1, OCR_TILE_HEIGHT - OCR_TILE_OVERLAP)
+    tiles = []
+    for top in range(0, image.height, step):
+        bottom = min(top + OCR_TILE_HEIGHT, image.height)
+        tiles.append(image.crop((0, top, image.width, bottom)))
+        if bottom == image.height:
+            break
+    return tiles
+
+
+def merge_tile_texts(texts: List[str]) -> str:
+    """
+    Join strip texts in order. A line cut by a strip boundary can be read
+    by both strips; drop leading lines of a strip that repeat the end of the
+    previous one.
+    """
+    merged: List[str] = []
+    for text in texts:
+        lines = [line for line in text.splitlines() if line.strip()]
+        while lines and merged and lines[0].strip() in (m.strip() for m in merged[-3:]):
+            lines.pop(0)
+        merged.extend(lines)
+    return "\n".join(merged)
+
+
+def ocr_image(image: Image.Image) -> str:
+    """
+    OCR an in-memory image: preprocess it, then OCR it whole or as
+    overlapping strips in parallel for very tall images.
+    """
+    if OCR_PREPROCESS:
+        image = preprocess_image(image)
+
+    tiles = _tiles(image)
+    if len(tiles) == 1:
+        return _tesseract(image)
+
+    workers = min(OCR_TILE_WORKERS or cpu_budget(), len(tiles))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = list(pool.map(_tesseract, tiles))
+    logger.debug("Tiled OCR", extra={"tiles": len(tiles), "size": image.size})
+    return merge_tile_texts(texts)
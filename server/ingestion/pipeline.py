@@ -0,0 +1,195 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+# CPUs this process may spend on parallelism of its own (PDF page pools, OCR
+# tiles). Workers of a process stage get an equal share of their parent's
+# budget, so nested pools never add up to more processes than CPUs.
+_cpu_budget: Optional[int] = None
+
+
+def cpu_budget() -> int:
+    return _cpu_budget or os.cpu_count() or 1
+
+
+def set_cpu_budget(cpus: int) -> None:
+    global _cpu_budget
+    _cpu_budget = max(1, cpus)
+
+
+class Stage:
+    """
+    One step of a StagedPipeline.
+
+    kind="process" runs fn in a shared process pool (CPU-bound work such as PDF
+    parsing, OCR or transcription; fn and its items must be picklable).
+    kind="thread" runs fn on pipeline threads (I/O-bound work such as embedding
+    requests or vector store upserts). fn may return None to drop an item.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        workers: int = 1,
+        kind: str = "thread",
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown stage kind: {kind}")
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.kind = kind
+
+
+class StageStats:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.busy_seconds += seconds
+            if ok:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+    def as_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": (
+                round(self.processed / wall_seconds, 3) if wall_seconds else 0.0
+            ),
+        }
+
+
+class StagedPipeline:
+    """
+    Runs items through stages connected by bounded queues.
+
+    Each stage has its own worker threads; a full downstream queue blocks the
+    upstream workers (backpressure), so memory stays bounded by queue_size per
+    stage while CPU-bound and I/O-bound stages overlap.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 16):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(s.name, s.workers) for s in stages]
+        self.errors: List[Dict[str, Any]] = []
+        self._errors_lock = threading.Lock()
+
+    def _run_stage(
+        self,
+        index: int,
+        inbox: "queue.Queue[Any]",
+        outbox: Optional["queue.Queue[Any]"],
+        pool: Optional[Executor],
+        remaining: List[int],
+        lock: threading.Lock,
+    ) -> None:
+        stage = self.stages[index]
+        stats = self.stats[index]
+
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                inbox.put(_DONE)  # let sibling workers see it too
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and outbox is not None:
+                    outbox.put(_DONE)
+                return
+
+            started = time.perf_counter()
+            try:
+                if stage.kind == "process" and pool is not None:
+                    result = pool.submit(stage.fn, item).result()
+                else:
+                    result = stage.fn(item)
+            except Exception as e:
+                stats.record(time.perf_counter() - started, ok=False)
+                logger.exception(
+                    "Pipeline stage failed",
+                    extra={"stage": stage.name, "item": repr(item)[:200]},
+                )
+                with self._errors_lock:
+                    self.errors.append(
+                        {"stage": stage.name, "item": item, "error": str(e)}
+                    )
+                continue
+
+            stats.record(time.perf_counter() - started, ok=True)
+            if result is not None and outbox is not None:
+                outbox.put(result)
+
+    def run(self, items: Iterable[Any]) -> Dict[str, Any]:
+        queues: List["queue.Queue[Any]"] = [
+            queue.Queue(maxsize=self.queue_size) for _ in self.stages
+        ]
+        process_workers = sum(s.workers for s in self.stages if s.kind == "process")
+        pool = (
+            ProcessPoolExecutor(
+                max_workers=process_workers,
+                initializer=set_cpu_budget,
+                initargs=(cpu_budget() // process_workers,),
+            )
+            if process_workers
+            else None
+        )
+
+        threads: List[threading.Thread] = []
+        started = time.perf_counter()
+        try:
+            for index, stage in enumerate(self.stages):
+                outbox = queues[index + 1] if index + 1 < len(queues) else None
+                remaining = [stage.workers]
+                lock = threading.Lock()
+                for n in range(stage.workers):
+                    thread = threading.Thread(
+                        target=self._run_stage,
+                        args=(index, queues[index], outbox, pool, remaining, lock),
+                        name=f"pipeline-{stage.name}-{n}",
+                        daemon=True,
+                    )
+                    thread.start()
+                    threads.append(thread)
+
+            for item in items:
+                queues[0].put(item)  # blocks while the first stage is saturated
+            queues[0].put(_DONE)
+
+            for thread in threads:
+                thread.join()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        wall_seconds = time.perf_counter() - started
+        summary = {
+            "wall_seconds": round(wall_seconds, 3),
+            "stages": [s.as_dict(wall_seconds) for s in self.stats],
+            "errors": len(self.errors),
+        }
+        logger.info("Pipeline finished: %s", summary)
+        return summary
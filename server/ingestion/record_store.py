@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+RECORD_DB = Path(os.getenv("RECORD_DB_PATH", "data/processed/records.db"))
+RECORD_BATCH_SIZE = int(os.getenv("RECORD_BATCH_SIZE", "200"))
+
+# Append-only files used before the record store; imported once by
+# migrate_legacy_jsonl and then renamed to *.jsonl.migrated.
+LEGACY_JSONL = [
+    Path("data/processed/text.jsonl"),
+    Path("data/processed/images.jsonl"),
+    Path("data/processed/audio.jsonl"),
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    modality TEXT NOT NULL,
+    source_path TEXT,
+    pokemon TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_modality ON records (modality);
+"""
+
+
+def make_record_id(modality: str, path: Path) -> str:
+    """
+    Record id of a raw file: its modality and file name ("text:bulbasaur.pdf"),
+    so files that share a stem never overwrite each other's record, vector
+    point or graph mentions.
+    """
+    return f"{modality}:{Path(path).name}"
+
+
+def connect_record_store(path: Optional[Path] = None) -> sqlite3.Connection:
+    db_path = path or RECORD_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    set_journal_mode(conn, db_path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+@contextmanager
+def record_db(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    conn = connect_record_store(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _row(record: Dict[str, Any], now: float) -> tuple:
+    return (
+        record["id"],
+        record.get("modality", ""),
+        record.get("source_path"),
+        record.get("pokemon"),
+        json.dumps(record, ensure_ascii=False),
+        now,
+    )
+
+
+def upsert_records(
+    records: Iterable[Dict[str, Any]], path: Optional[Path] = None
+) -> int:
+    """
+    Insert or replace records by id in a single transaction.
+    Returns the number of records written.
+    """
+    now = time.time()
+    rows = [_row(record, now) for record in records]
+    if not rows:
+        return 0
+
+    with record_db(path) as conn, conn:
+        conn.executemany(
+            "INSERT INTO records (id, modality, source_path, pokemon, data, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET "
+            "modality = excluded.modality, "
+            "source_path = excluded.source_path, "
+            "pokemon = excluded.pokemon, "
+            "data = excluded.data, "
+            "updated_at = excluded.updated_at",
+            rows,
+        )
+    return len(rows)
+
+
+def get_record(media_id: str, path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    with record_db(path) as conn:
+        row = conn.execute(
+            "SELECT data FROM records WHERE id = ?", (media_id,)
+        ).fetchone()
+    return json.loads(row["data"]) if row else None
+
+
+def get_records(
+    media_ids: Iterable[str], path: Optional[Path] = None
+) -> Dict[str, Dict[str, Any]]:
+    ids = list(dict.fromkeys(media_ids))
+    if not ids:
+        return {}
+
+    placeholders = ", ".join("?" for _ in ids)
+    with record_db(path) as conn:
+        rows = conn.execute(
+            f"SELECT id, data FROM records WHERE id IN ({placeholders})", ids
+        ).fetchall()
+    return {r["id"]: json.loads(r["data"]) for r in rows}
+
+
+def iter_records(
+    modality: Optional[str] = None, path: Optional[Path] = None
+) -> Iterator[Dict[str, Any]]:
+    """Records in insertion order, optionally restricted to one modality."""
+    with record_db(path) as conn:
+        if modality is None:
+            cursor = conn.execute("SELECT data FROM records ORDER BY rowid")
+        else:
+            cursor = conn.execute(
+                "SELECT data FROM records WHERE modality = ? ORDER BY rowid",
+                (modality,),
+            )
+        for row in cursor:
+            yield json.loads(row["data"])
+
+
+def legacy_records(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """id and source_path of records still keyed by a bare file stem."""
+    with record_db(path) as conn:
+        rows = conn.execute(
+            "SELECT id, source_path FROM records WHERE instr(id, ':') = 0"
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def delete_records(media_ids: Iterable[str], path: Optional[Path] = None) -> int:
+    ids = [(media_id,) for media_id in media_ids]
+    if not ids:
+        return 0
+    with record_db(path) as conn, conn:
+        before = conn.total_changes
+        conn.executemany("DELETE FROM records WHERE id = ?", ids)
+        return conn.total_changes - before
+
+
+class RecordWriter:
+    """
+    Buffers records and upserts them batch_size at a time, one transaction
+    per batch. on_commit is called with each committed batch.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = RECORD_BATCH_SIZE,
+        on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        path: Optional[Path] = None,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.on_commit = on_commit
+        self.path = path
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+        return record
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        upsert_records(batch, self.path)
+        if self.on_commit is not None:
+            self.on_commit(batch)
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.flush()
+
+
+def migrate_legacy_jsonl(
+    jsonl_paths: Optional[List[Path]] = None, path: Optional[Path] = None
+) -> int:
+    """
+    Import records from the old append-only JSONL files. Later lines win
+    for duplicate ids, matching what re-ingesting produced before.
+    Each file is renamed to *.jsonl.migrated so the import runs once.
+    """
+    imported = 0
+    for jsonl_path in jsonl_paths or LEGACY_JSONL:
+        if not jsonl_path.exists():
+            continue
+
+        records: Dict[str, Dict[str, Any]] = {}
+        with jsonl_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    records[record["id"]] = record
+
+        imported += upsert_records(records.values(), path)
+        os.replace(jsonl_path, jsonl_path.with_suffix(".jsonl.migrated"))
+        logger.info(
+            "Migrated legacy JSONL records",
+            extra={"path": str(jsonl_path), "records": len(records)},
+        )
+    return imported
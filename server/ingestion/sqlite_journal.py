@@ -0,0 +1,75 @@
+import logging
+import os
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Journal mode of the SQLite stores. WAL keeps its index in shared memory,
+# which only works between processes on one host, so on a network filesystem
+# a store must use a rollback journal instead. "auto" picks "delete" for
+# paths on a network filesystem and "wal" otherwise; "wal" or "delete" force
+# one mode everywhere.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "auto").lower()
+
+NETWORK_FILESYSTEMS = frozenset(
+    {
+        "9p",
+        "afs",
+        "ceph",
+        "cifs",
+        "fuse.glusterfs",
+        "fuse.sshfs",
+        "gfs2",
+        "glusterfs",
+        "gpfs",
+        "lustre",
+        "nfs",
+        "nfs4",
+        "ocfs2",
+        "smb3",
+        "smbfs",
+    }
+)
+
+
+def _unescape(field: str) -> str:
+    # /proc/mounts escapes spaces, tabs, newlines and backslashes as \ooo.
+    return field.encode().decode("unicode_escape")
+
+
+@lru_cache(maxsize=64)
+def filesystem_type(directory: str) -> Optional[str]:
+    """Type of the filesystem directory lives on, from /proc/self/mounts."""
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            mounts = [line.split() for line in f]
+    except OSError:
+        return None
+
+    best: Optional[tuple] = None
+    for fields in mounts:
+        if len(fields) < 3:
+            continue
+        mount_point = _unescape(fields[1])
+        if directory == mount_point or directory.startswith(
+            mount_point.rstrip("/") + "/"
+        ):
+            if best is None or len(mount_point) > len(best[0]):
+                best = (mount_point, fields[2])
+    return best[1] if best else None
+
+
+def journal_mode(path: Path) -> str:
+    if SQLITE_JOURNAL_MODE in ("wal", "delete"):
+        return SQLITE_JOURNAL_MODE
+    fs_type = filesystem_type(str(Path(path).resolve().parent))
+    return "delete" if fs_type in NETWORK_FILESYSTEMS else "wal"
+
+
+def set_journal_mode(conn: sqlite3.Connection, path: Path) -> None:
+    """WAL on local disk, a rollback journal on network filesystems."""
+    mode = journal_mode(path)
+    conn.execute(f"PRAGMA journal_mode={mode.upper()}")
@@ -1,75 +1,214 @@
-import json
 import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Optional
 
+import pypdf
+from ingestion import dedupe, record_store
+from ingestion.hashing import fingerprint
+from ingestion.media_cache import cached_extraction
+from ingestion.ocr import ocr_image, ocr_version
+from ingestion.pipeline import cpu_budget, set_cpu_budget
 from processing.embeddings import embed_text
 from processing.vector_store import upsert_document
 from pypdf import PdfReader
 
 logger = logging.getLogger(__name__)
-PROCESSED_DIR = Path("data/processed")
-TEXT_JSONL = PROCESSED_DIR / "text.jsonl"
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    logger.info("extract_text_from_pdf started", extra={"path": str(pdf_path)})
+# Pages are extracted in a process pool once a PDF has at least
+# PDF_PARALLEL_MIN_PAGES pages; smaller files are not worth the pool startup.
+# The pool defaults to the process's CPU budget, which inside an ingestion
+# extract worker is its share of the machine rather than every CPU.
+PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_OCR_FALLBACK = os.getenv("PDF_OCR_FALLBACK", "1") != "0"
+PDF_CODE_VERSION = "1"
+
 
+def _ocr_page(pdf_path: str, page_idx: int, page: Any) -> str:
+    """
+    OCR the images embedded in a page with no text layer. Scanned PDFs
+    store each page as one full-page image, so this recovers their text
+    without a rasterizer.
+    """
+    texts: list[str] = []
     try:
-        reader = PdfReader(pdf_path)
-    except Exception as e:
-        logger.exception("Error reading PDF", extra={"path": str(pdf_path)})
-        raise e
+        images = list(page.images)
+    except Exception:
+        logger.exception(
+            "Failed to read page images",
+            extra={"path": pdf_path, "page": page_idx},
+        )
+        return ""
+
+    for image in images:
+        try:
+            text = ocr_image(image.image)
+        except Exception:
+            logger.exception(
+                "OCR failed for page image",
+                extra={"path": pdf_path, "page": page_idx, "image": image.name},
+            )
+            continue
+        if text:
+            texts.append(text)
+    return "\n".join(texts)
+
 
-    chunks: list[str] = []
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list[dict]:
+    """Extract pages [start, stop) of one PDF; runs inside a pool worker."""
+    reader = PdfReader(pdf_path)
+    pages: list[dict] = []
 
-    for page_idx, page in enumerate(reader.pages):
+    for page_idx in range(start, stop):
+        page = reader.pages[page_idx]
         try:
-            page_text = page.extract_text() or ""
+            text = (page.extract_text() or "").strip()
         except Exception:
             logger.exception(
                 "Failed to extract text from page",
-                extra={"path": str(pdf_path), "page": page_idx},
+                extra={"path": pdf_path, "page": page_idx},
             )
-            continue
+            text = ""
+
+        ocr = False
+        if not text and PDF_OCR_FALLBACK:
+            text = _ocr_page(pdf_path, page_idx, page)
+            ocr = bool(text)
 
-        clean = page_text.strip()
-        if not clean:
+        if not text:
             logger.debug(
                 "Empty or whitespace-only page text",
-                extra={"path": str(pdf_path), "page": page_idx},
+                extra={"path": pdf_path, "page": page_idx},
             )
-            continue
+        pages.append({"page": page_idx + 1, "text": text, "ocr": ocr})
 
-        chunks.append(clean)
+    return pages
 
-    text = "\n\n".join(chunks).strip()
-    logger.info(
-        "extract_text_from_pdf finished",
-        extra={"path": str(pdf_path), "chars": len(text), "pages": len(reader.pages)},
+
+def _page_ranges(num_pages: int, workers: int) -> list[tuple[int, int]]:
+    # A few ranges per worker keeps the pool busy when page costs are uneven
+    # (OCR pages are far slower than text pages) without reopening the PDF
+    # for every single page.
+    chunk = max(1, math.ceil(num_pages / (workers * 4)))
+    return [(i, min(i + chunk, num_pages)) for i in range(0, num_pages, chunk)]
+
+
+def pdf_version() -> str:
+    """Identifies everything that affects PDF page output (media cache key)."""
+    return fingerprint(
+        PDF_CODE_VERSION,
+        pypdf.__version__,
+        PDF_OCR_FALLBACK,
+        ocr_version() if PDF_OCR_FALLBACK else None,
     )
-    return text
 
 
-def ingest_pdf(
-    pdf_path_string: str, pokemon: str, generation: int, types: list[str]
-) -> dict:
-    pdf_path = Path(pdf_path_string)
+def extract_pdf_pages(pdf_path: str, content_hash: Optional[str] = None) -> list[dict]:
+    """
+    Per-page text of a PDF, in page order: [{"page", "text", "ocr"}].
+
+    Pages without a text layer fall back to OCR of their embedded images.
+    Large PDFs are split into page ranges extracted in parallel processes.
+    Results are cached by file content, so identical bytes are parsed once.
+    """
+    pdf_path = str(pdf_path)
+    return cached_extraction(
+        pdf_path,
+        "pdf_pages",
+        pdf_version(),
+        lambda: _extract_pdf_pages(pdf_path),
+        content_hash=content_hash,
+    )
+
+
+def _extract_pdf_pages(pdf_path: str) -> list[dict]:
+    try:
+        num_pages = len(PdfReader(pdf_path).pages)
+    except Exception as e:
+        logger.exception("Error reading PDF", extra={"path": pdf_path})
+        raise e
+
+    budget = cpu_budget()
+    workers = min(PDF_PAGE_WORKERS or budget, num_pages)
+    if workers <= 1 or num_pages < PDF_PARALLEL_MIN_PAGES:
+        return _extract_page_range(pdf_path, 0, num_pages)
+
+    ranges = _page_ranges(num_pages, workers)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=set_cpu_budget,
+        initargs=(budget // workers,),
+    ) as pool:
+        results = pool.map(
+            _extract_page_range,
+            [pdf_path] * len(ranges),
+            [start for start, _stop in ranges],
+            [stop for _start, stop in ranges],
+        )
+        return [page for pages in results for page in pages]
+
+
+def join_pages(pages: list[dict]) -> tuple[str, list[dict]]:
+    """
+    Join page texts into one document text, returning it with page spans
+    ({"page", "start", "end", "ocr"} character offsets into the text) so
+    chunks and citations can be mapped back to pages.
+    """
+    parts: list[str] = []
+    spans: list[dict] = []
+    offset = 0
+    for page in pages:
+        if not page["text"]:
+            continue
+        if parts:
+            offset += 2  # "\n\n" separator
+        spans.append(
+            {
+                "page": page["page"],
+                "start": offset,
+                "end": offset + len(page["text"]),
+                "ocr": page["ocr"],
+            }
+        )
+        parts.append(page["text"])
+        offset += len(page["text"])
+    return "\n\n".join(parts), spans
+
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    logger.info("extract_text_from_pdf started", extra={"path": str(pdf_path)})
+
+    pages = extract_pdf_pages(str(pdf_path))
+    text, spans = join_pages(pages)
+
     logger.info(
-        "ingest_pdf started",
+        "extract_text_from_pdf finished",
         extra={
             "path": str(pdf_path),
-            "pokemon": pokemon,
-            "generation": generation,
+            "chars": len(text),
+            "pages": len(pages),
+            "ocr_pages": sum(1 for s in spans if s["ocr"]),
         },
     )
+    return text
 
-    text = extract_text_from_pdf(str(pdf_path))
 
+def build_text_record(
+    path: Path,
+    text: str,
+    pokemon: str,
+    generation: int,
+    types: list[str],
+    pages: Optional[list[dict]] = None,
+) -> dict:
     record = {
-        "id": pdf_path.stem,
+        "id": record_store.make_record_id("text", path),
         "modality": "text",
-        "source_path": str(pdf_path),
+        "source_path": str(path),
         "text": text,
         "pokemon": pokemon,
         "generation": generation,
@@ -79,15 +218,42 @@ def ingest_pdf(
             pokemon.lower(),
         ],  # dataset is all starter pokemon, default tag "starter"
     }
+    if pages is not None:
+        record["pages"] = pages
+    return record
 
-    vector = embed_text(record["text"])
-    metadata = {
-        "media_id": record["id"],
-        "media_type": "text",
-        "pokemon": record.get("pokemon"),
-        "source_path": str(pdf_path),
-    }
-    upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
+
+def ingest_pdf(
+    pdf_path_string: str,
+    pokemon: str,
+    generation: int,
+    types: list[str],
+    content_hash: Optional[str] = None,
+) -> dict:
+    pdf_path = Path(pdf_path_string)
+    logger.info(
+        "ingest_pdf started",
+        extra={
+            "path": str(pdf_path),
+            "pokemon": pokemon,
+            "generation": generation,
+        },
+    )
+
+    text, pages = join_pages(extract_pdf_pages(str(pdf_path), content_hash))
+
+    record = build_text_record(pdf_path, text, pokemon, generation, types, pages)
+
+    # Near-duplicates are linked to their canonical record, not indexed.
+    if not dedupe.link_duplicate(record):
+        vector = embed_text(record["text"])
+        metadata = {
+            "media_id": record["id"],
+            "media_type": "text",
+            "pokemon": record.get("pokemon"),
+            "source_path": str(pdf_path),
+        }
+        upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
 
     logger.debug(
         "ingest_pdf record created",
@@ -117,25 +283,18 @@ def ingest_txt(
 
     text = txt_path.read_text(encoding="utf-8")
 
-    record = {
-        "id": txt_path.stem,
-        "modality": "text",
-        "source_path": str(txt_path),
-        "text": text.strip(),
-        "pokemon": pokemon,
-        "generation": generation,
-        "types": types,
-        "tags": ["starter", pokemon.lower()],
-    }
+    record = build_text_record(txt_path, text.strip(), pokemon, generation, types)
 
-    vector = embed_text(record["text"])
-    metadata = {
-        "media_id": record["id"],
-        "media_type": "text",
-        "pokemon": record.get("pokemon"),
-        "source_path": str(txt_path),
-    }
-    upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
+    # Near-duplicates are linked to their canonical record, not indexed.
+    if not dedupe.link_duplicate(record):
+        vector = embed_text(record["text"])
+        metadata = {
+            "media_id": record["id"],
+            "media_type": "text",
+            "pokemon": record.get("pokemon"),
+            "source_path": str(txt_path),
+        }
+        upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
 
     logger.debug(
         "ingest_txt record created",
@@ -150,12 +309,9 @@ def ingest_txt(
 
 
 def write_text_record(record: dict) -> None:
-    TEXT_JSONL.parent.mkdir(parents=True, exist_ok=True)
-    with TEXT_JSONL.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False))
-        f.write("\n")
+    record_store.upsert_records([record])
 
     logger.info(
         "write_text_record finished",
-        extra={"id": record["id"], "path": str(TEXT_JSONL)},
+        extra={"id": record["id"], "path": str(record_store.RECORD_DB)},
     )
@@ -0,0 +1,270 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from ingestion.hashing import fingerprint
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Transcription backend: model size ("tiny", "base", "small", "medium",
+# ...), optional int8 dynamic quantization of the Linear layers, and torch
+# intra-op threads per worker. Smaller / quantized models trade accuracy
+# for speed; scripts/benchmark_whisper.py measures both.
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
+WHISPER_QUANTIZE = os.getenv("WHISPER_QUANTIZE", "none")  # "none" or "int8"
+
+# Long-lived transcription processes, each holding one loaded model.
+WHISPER_WORKERS = int(
+    os.getenv("WHISPER_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+WHISPER_THREADS = int(
+    os.getenv("WHISPER_THREADS", str(max(1, (os.cpu_count() or 1) // WHISPER_WORKERS)))
+)
+
+# Energy-based VAD used to cut long audio into segments on silence.
+# Segments stay under Whisper's 30 s window so none is truncated.
+VAD_FRAME_SECONDS = 0.03
+VAD_SILENCE_DB = float(os.getenv("VAD_SILENCE_DB", "-35"))
+VAD_ABSOLUTE_FLOOR = 1e-4  # RMS below this is silence even in a quiet file
+VAD_MIN_SILENCE_SECONDS = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "0.3"))
+SEGMENT_MAX_SECONDS = float(os.getenv("SEGMENT_MAX_SECONDS", "28"))
+SEGMENT_MIN_SECONDS = float(os.getenv("SEGMENT_MIN_SECONDS", "5"))
+
+Segment = Tuple[int, int]  # [start, end) in samples
+
+# Bump when segmentation or stitching changes in a way the settings above do
+# not capture; cached transcripts from older versions are then ignored.
+ASR_CODE_VERSION = "1"
+
+
+def asr_version() -> str:
+    """Identifies everything that affects transcripts (media cache key)."""
+    return fingerprint(
+        ASR_CODE_VERSION,
+        WHISPER_MODEL_NAME,
+        WHISPER_QUANTIZE,
+        VAD_SILENCE_DB,
+        VAD_MIN_SILENCE_SECONDS,
+        SEGMENT_MAX_SECONDS,
+        SEGMENT_MIN_SECONDS,
+    )
+
+
+def split_on_silence(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    max_seconds: float = SEGMENT_MAX_SECONDS,
+    min_seconds: float = SEGMENT_MIN_SECONDS,
+    silence_db: float = VAD_SILENCE_DB,
+    min_silence_seconds: float = VAD_MIN_SILENCE_SECONDS,
+) -> List[Segment]:
+    """
+    Cut audio into segments of at most max_seconds, preferring to cut in
+    the middle of silences (frames whose RMS is silence_db below the
+    loudest frame). Audio with no usable silence is cut at max_seconds.
+    Leading and trailing silence is dropped.
+    """
+    frame = max(1, int(sample_rate * VAD_FRAME_SECONDS))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    frames = audio[: n_frames * frame].reshape(n_frames, frame).astype(np.float64)
+    rms = np.sqrt(np.mean(frames**2, axis=1)) + 1e-10
+    db = 20 * np.log10(rms / rms.max())
+    voiced = (db > silence_db) & (rms > VAD_ABSOLUTE_FLOOR)
+    if not voiced.any():
+        return []
+
+    # Midpoints of silences long enough to cut at, in frames.
+    min_run = max(1, int(min_silence_seconds / VAD_FRAME_SECONDS))
+    cut_points: List[int] = []
+    run_start: Optional[int] = None
+    for i, is_voiced in enumerate(list(voiced) + [True]):
+        if not is_voiced and run_start is None:
+            run_start = i
+        elif is_voiced and run_start is not None:
+            if i - run_start >= min_run:
+                cut_points.append((run_start + i) // 2)
+            run_start = None
+
+    first = int(np.argmax(voiced))
+    last = n_frames - int(np.argmax(voiced[::-1]))
+    max_frames = max(1, int(max_seconds / VAD_FRAME_SECONDS))
+    min_frames = int(min_seconds / VAD_FRAME_SECONDS)
+
+    segments: List[Segment] = []
+    start = first
+    while start < last:
+        limit = start + max_frames
+        if limit >= last:
+            end = last
+        else:
+            candidates = [
+                c for c in cut_points if start + max(1, min_frames) <= c <= limit
+            ]
+            end = candidates[-1] if candidates else limit
+        segments.append((start * frame, min(end * frame, len(audio))))
+        start = end
+    return segments
+
+
+def stitch(texts: List[str]) -> str:
+    return " ".join(t.strip() for t in texts if t and t.strip())
+
+
+# --- Worker processes ---------------------------------------------------------
+
+_worker_model: Any = None
+
+
+def quantize_linear_layers(model: Any) -> Any:
+    """
+    int8 dynamic quantization of every Linear layer (weights stored as int8,
+    activations quantized on the fly). CPU only.
+    """
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    # Whisper subclasses nn.Linear only to cast dtypes in forward; the
+    # quantizer matches exact types, so present them as plain nn.Linear.
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_whisper_model(
+    name: str = WHISPER_MODEL_NAME,
+    quantize: str = WHISPER_QUANTIZE,
+    threads: int = WHISPER_THREADS,
+) -> Any:
+    import torch
+    import whisper
+
+    if quantize not in ("none", "int8"):
+        raise ValueError(f"Unknown WHISPER_QUANTIZE value: {quantize!r}")
+
+    torch.set_num_threads(max(1, threads))
+    model = whisper.load_model(name, device="cpu")
+    if quantize == "int8":
+        model = quantize_linear_layers(model)
+    return model
+
+
+def configure_pool(workers: int, threads: int) -> None:
+    """
+    Size the process-wide pool before its first use, for processes that
+    share the machine with other ingest processes. The spawned workers pick
+    threads up through WHISPER_THREADS.
+    """
+    global WHISPER_WORKERS, WHISPER_THREADS
+    WHISPER_WORKERS, WHISPER_THREADS = max(1, workers), max(1, threads)
+    os.environ["WHISPER_WORKERS"] = str(WHISPER_WORKERS)
+    os.environ["WHISPER_THREADS"] = str(WHISPER_THREADS)
+
+
+def _init_worker(name: str, quantize: str) -> None:
+    global _worker_model
+    _worker_model = load_whisper_model(name, quantize, WHISPER_THREADS)
+    logger.info(
+        "Transcription worker ready",
+        extra={
+            "pid": os.getpid(),
+            "model_name": name,
+            "quantize": quantize,
+            "threads": WHISPER_THREADS,
+        },
+    )
+
+
+def _worker_ready(_: int) -> int:
+    return os.getpid()
+
+
+def _transcribe_segment(segment: np.ndarray) -> str:
+    result = _worker_model.transcribe(segment, fp16=False)
+    return result["text"].strip()
+
+
+class TranscriptionPool:
+    """
+    Transcribes audio on long-lived worker processes that keep a Whisper
+    model loaded. Each file is split on silence and its segments are
+    transcribed in parallel, then stitched back in order. The model defaults
+    to WHISPER_MODEL / WHISPER_QUANTIZE.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        model_name: Optional[str] = None,
+        quantize: Optional[str] = None,
+    ):
+        self.workers = max(1, workers or WHISPER_WORKERS)
+        self.model_name = model_name or WHISPER_MODEL_NAME
+        self.quantize = quantize or WHISPER_QUANTIZE
+        self._executor = executor
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            # spawn, not fork: workers load torch themselves instead of
+            # inheriting a copy of the parent's (possibly threaded) state.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.quantize),
+            )
+        return self._executor
+
+    def warm_up(self) -> None:
+        """Start the workers and load their models now, not on first use."""
+        list(self._pool().map(_worker_ready, range(self.workers)))
+
+    def transcribe_array(self, audio: np.ndarray) -> str:
+        segments = split_on_silence(audio)
+        if not segments:
+            return ""
+        chunks = [audio[start:end] for start, end in segments]
+        texts = list(self._pool().map(_transcribe_segment, chunks))
+        logger.info(
+            "Transcribed audio",
+            extra={
+                "seconds": round(len(audio) / SAMPLE_RATE, 1),
+                "segments": len(segments),
+            },
+        )
+        return stitch(texts)
+
+    def transcribe(self, path: str) -> str:
+        import whisper
+
+        return self.transcribe_array(whisper.load_audio(path, sr=SAMPLE_RATE))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+_pool: Optional[TranscriptionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_transcription_pool() -> TranscriptionPool:
+    """Process-wide pool, started on first use and shut down at exit."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TranscriptionPool()
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,176 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "auto" uses inotify where the kernel provides it and falls back to polling
+# (other platforms, network filesystems that never deliver events).
+WATCH_BACKEND = os.getenv("WATCH_BACKEND", "auto")
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "2"))
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Files are only picked up once fully written (close after write) or renamed
+# into place, so half-copied files never reach extraction.
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+_READ_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """Reports changed files in a set of directories via Linux inotify."""
+
+    def __init__(self, dirs: Iterable[Path]):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._dirs: Dict[int, Path] = {}
+        self.needs_rescan = False
+        try:
+            for directory in dirs:
+                directory.mkdir(parents=True, exist_ok=True)
+                wd = self._libc.inotify_add_watch(
+                    self._fd, os.fsencode(str(directory)), _WATCH_MASK
+                )
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+                self._dirs[wd] = directory
+        except Exception:
+            self.close()
+            raise
+
+    def poll(self, timeout: float) -> Set[Path]:
+        """Paths created, modified or removed within timeout seconds."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            changed |= self._parse(data)
+        return changed
+
+    def _parse(self, data: bytes) -> Set[Path]:
+        changed: Set[Path] = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size : offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # The kernel dropped events; the caller has to rescan.
+                logger.warning("inotify queue overflowed")
+                self.needs_rescan = True
+                continue
+            directory = self._dirs.get(wd)
+            name = name.rstrip(b"\0")
+            if directory is not None and name:
+                changed.add(directory / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Fallback watcher: diffs (size, mtime) snapshots of the directories."""
+
+    def __init__(self, dirs: Iterable[Path], interval: float = WATCH_POLL_SECONDS):
+        self.dirs = list(dirs)
+        self.interval = interval
+        self.needs_rescan = False
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        for directory in self.dirs:
+            if not directory.exists():
+                continue
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout: float) -> Set[Path]:
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {
+            path
+            for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(dirs: Iterable[Path], backend: Optional[str] = None):
+    backend = backend or WATCH_BACKEND
+    dirs = list(dirs)
+    if backend in ("auto", "inotify"):
+        try:
+            watcher = InotifyWatcher(dirs)
+            logger.info("Watching %d directories with inotify", len(dirs))
+            return watcher
+        except (OSError, AttributeError):
+            if backend == "inotify":
+                raise
+            logger.warning("inotify unavailable, polling for changes", exc_info=True)
+    logger.info("Polling %d directories every %ss", len(dirs), WATCH_POLL_SECONDS)
+    return PollingWatcher(dirs)
+
+
+class Debouncer:
+    """
+    Holds changed paths until they have been quiet for quiet_seconds, so a
+    file written in several bursts (or replaced twice) is ingested once.
+    """
+
+    def __init__(self, quiet_seconds: float):
+        self.quiet_seconds = quiet_seconds
+        self._last_seen: Dict[Path, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def add(self, paths: Iterable[Path], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            self._last_seen[path] = now
+
+    def ready(self, now: Optional[float] = None) -> List[Path]:
+        now = time.monotonic() if now is None else now
+        settled = [
+            path
+            for path, seen in self._last_seen.items()
+            if now - seen >= self.quiet_seconds
+        ]
+        for path in settled:
+            del self._last_seen[path]
+        return sorted(settled)
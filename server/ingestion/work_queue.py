@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+# Distributed ingestion: a coordinator enqueues raw files, worker processes
+# on the same host lease them. A lease that is not completed or extended within its
+# visibility timeout expires and the item is handed to another worker.
+WORK_QUEUE_BACKEND = os.getenv("WORK_QUEUE_BACKEND", "sqlite")
+WORK_QUEUE_PATH = Path(os.getenv("WORK_QUEUE_PATH", "data/queue/ingest_queue.db"))
+WORK_QUEUE_VISIBILITY_SECONDS = float(os.getenv("WORK_QUEUE_VISIBILITY_SECONDS", "300"))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3"))
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    version TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_id TEXT,
+    leased_by TEXT,
+    lease_expires REAL,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_status
+    ON work_items (status, lease_expires);
+"""
+
+
+class SqliteWorkQueue:
+    """
+    Work queue in a SQLite file; SQLite's file locks serialize leases, so
+    any number of worker processes on one host can share it. SQLite's
+    locking is not reliable across hosts on a network filesystem, so
+    multi-node runs need a networked backend in WORK_QUEUE_BACKENDS,
+    which this project does not ship yet.
+
+    Every backend provides enqueue, lease, extend, complete, fail and
+    stats with these semantics; leases are identified by the lease_id
+    returned from lease(), so a worker whose lease expired cannot
+    complete an item another worker now holds.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS,
+    ):
+        self.path = Path(path or WORK_QUEUE_PATH)
+        self.max_attempts = max(1, max_attempts)
+        with self._db():
+            pass
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=60)
+        conn.row_factory = sqlite3.Row
+        set_journal_mode(conn, self.path)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(
+        self, items: Iterable[tuple[str, Dict[str, Any], Optional[str]]]
+    ) -> int:
+        """
+        Add (key, payload, version) items. Re-enqueueing a key that is
+        pending or leased at the same version is a no-op; a new version, or
+        a finished item, is reset to pending. Returns the number queued.
+        """
+        now = time.time()
+        queued = 0
+        with self._db() as conn, conn:
+            for key, payload, version in items:
+                queued += conn.execute(
+                    "INSERT INTO work_items (key, payload, version, status, "
+                    "enqueued_at, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "payload = excluded.payload, version = excluded.version, "
+                    "status = excluded.status, attempts = 0, lease_id = NULL, "
+                    "leased_by = NULL, lease_expires = NULL, error = NULL, "
+                    "enqueued_at = excluded.enqueued_at, "
+                    "updated_at = excluded.updated_at "
+                    "WHERE work_items.status NOT IN (?, ?) "
+                    "OR work_items.version IS NOT excluded.version",
+                    (
+                        key,
+                        json.dumps(payload),
+                        version,
+                        PENDING,
+                        now,
+                        now,
+                        PENDING,
+                        LEASED,
+                    ),
+                ).rowcount
+        return queued
+
+    def lease(
+        self,
+        worker: str,
+        visibility_seconds: float = WORK_QUEUE_VISIBILITY_SECONDS,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest available item: pending, or leased with an expired
+        lease. Returns {"key", "payload", "lease_id", "attempts"} or None.
+        """
+        now = time.time()
+        lease_id = uuid.uuid4().hex
+        with self._db() as conn, conn:
+            # Take the write lock before choosing an item so two workers
+            # cannot pick the same one (UPDATE ... RETURNING would need
+            # SQLite 3.35).
+            conn.execute("BEGIN IMMEDIATE")
+            # Items whose leases keep expiring (a worker crashing on them)
+            # are given up on instead of being handed out forever.
+            conn.execute(
+                "UPDATE work_items SET status = ?, error = ?, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "lease expired", now, LEASED, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT key, payload, attempts FROM work_items WHERE status = ? "
+                "OR (status = ? AND lease_expires < ?) "
+                "ORDER BY enqueued_at, key LIMIT 1",
+                (PENDING, LEASED, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE work_items SET status = ?, lease_id = ?, "
+                    "leased_by = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE key = ?",
+                    (
+                        LEASED,
+                        lease_id,
+                        worker,
+                        now + visibility_seconds,
+                        now,
+                        row["key"],
+                    ),
+                )
+        if row is None:
+            return None
+        return {
+            "key": row["key"],
+            "payload": json.loads(row["payload"]),
+            "lease_id": lease_id,
+            "attempts": row["attempts"] + 1,
+        }
+
+    def extend(
+        self,
+        key: str,
+        lease_id: str,
+        visibility_seconds: float = WORK_QUEUE_VISIBILITY_SECONDS,
+    ) -> bool:
+        """Push a held lease's expiry out; False if the lease was lost."""
+        now = time.time()
+        with self._db() as conn, conn:
+            return bool(
+                conn.execute(
+                    "UPDATE work_items SET lease_expires = ?, updated_at = ? "
+                    "WHERE key = ? AND lease_id = ? AND status = ?",
+                    (now + visibility_seconds, now, key, lease_id, LEASED),
+                ).rowcount
+            )
+
+    def complete(self, key: str, lease_id: str) -> bool:
+        with self._db() as conn, conn:
+            return bool(
+                conn.execute(
+                    "UPDATE work_items SET status = ?, lease_id = NULL, "
+                    "lease_expires = NULL, error = NULL, updated_at = ? "
+                    "WHERE key = ? AND lease_id = ? AND status = ?",
+                    (DONE, time.time(), key, lease_id, LEASED),
+                ).rowcount
+            )
+
+    def fail(self, key: str, lease_id: str, error: str) -> bool:
+        """Release a lease after an error: retried until max_attempts."""
+        with self._db() as conn, conn:
+            return bool(
+                conn.execute(
+                    "UPDATE work_items SET "
+                    "status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                    "lease_id = NULL, lease_expires = NULL, error = ?, "
+                    "updated_at = ? "
+                    "WHERE key = ? AND lease_id = ? AND status = ?",
+                    (
+                        self.max_attempts,
+                        FAILED,
+                        PENDING,
+                        error,
+                        time.time(),
+                        key,
+                        lease_id,
+                        LEASED,
+                    ),
+                ).rowcount
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Item counts by status; expired leases count as pending."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._db() as conn:
+            rows = conn.execute(
+                "SELECT CASE WHEN status = ? AND lease_expires < ? THEN ? "
+                "ELSE status END AS state, COUNT(*) AS n "
+                "FROM work_items GROUP BY state",
+                (LEASED, time.time(), PENDING),
+            ).fetchall()
+        counts.update({row["state"]: row["n"] for row in rows})
+        return counts
+
+
+WORK_QUEUE_BACKENDS: Dict[str, Callable[..., Any]] = {
+    "sqlite": SqliteWorkQueue,
+}
+
+
+def make_work_queue(backend: Optional[str] = None, **options: Any):
+    """Work queue for backend (default WORK_QUEUE_BACKEND)."""
+    backend = backend or WORK_QUEUE_BACKEND
+    try:
+        factory = WORK_QUEUE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown work queue backend: {backend}") from None
+    return factory(**options)
@@ -0,0 +1,233 @@
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ingestion import manifest
+from jobs import store
+from scripts.ingest import main as run_full_ingest
+from scripts.ingest_audio_corpus import add_audio
+from scripts.ingest_images_corpus import add_image
+from scripts.ingest_text_corpus import add_text
+from scripts.process import main as run_build_graph
+
+logger = logging.getLogger(__name__)
+
+# Each job runs in its own worker process, so OCR, Whisper and graph builds
+# never compete with request handling for the API process's GIL, and a
+# running job can be cancelled by terminating its process group.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+JOB_RUNNER_ENABLED = os.getenv("JOB_RUNNER_ENABLED", "1") != "0"
+
+_ADDERS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "audio": add_audio,
+    "image": add_image,
+    "text": add_text,
+}
+
+
+def ingest_job() -> Dict[str, Any]:
+    return run_full_ingest()
+
+
+def process_job() -> Dict[str, Any]:
+    run_build_graph()
+    return {"message": "Graph built and exported to CSV and JSON successfully."}
+
+
+def add_file_job(
+    modality: str, path: str, content_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    try:
+        return _ADDERS[modality](Path(path), content_hash=content_hash)
+    finally:
+        # Claimed by the upload route that saved the file (see save_upload).
+        manifest.release(Path(path))
+
+
+JOB_KINDS: Dict[str, Callable[..., Any]] = {
+    "ingest": ingest_job,
+    "process": process_job,
+    "add_file": add_file_job,
+}
+
+# Jobs that write the same stores hold the same lock: at most one job per
+# lock runs at a time, counting synchronous requests run through run_locked.
+# Ingests and uploads share the manifest, the record store and the Qdrant
+# collection; graph builds rewrite the graph.
+JOB_LOCKS: Dict[str, str] = {
+    "ingest": "corpus",
+    "add_file": "corpus",
+    "process": "graph",
+}
+
+
+def submit_job(kind: str, **params: Any) -> Dict[str, Any]:
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return store.create_job(kind, params)
+
+
+def run_locked(
+    kind: str, fn: Callable[[], Any], params: Optional[Dict[str, Any]] = None
+) -> Any:
+    """
+    Run fn() in this thread as a job of kind, once no running job holds
+    kind's JOB_LOCKS lock; the runner starts no job sharing the lock until fn
+    returns. For synchronous API requests. params are recorded as the job's
+    parameters, so an interrupted call is requeued like any other job.
+    """
+    while True:
+        job = store.start_job(kind, params, JOB_LOCKS)
+        if job is not None:
+            break
+        time.sleep(JOB_POLL_SECONDS)
+    try:
+        result = fn()
+    except BaseException as e:
+        store.finish_job(job["id"], store.FAILED, error=str(e) or type(e).__name__)
+        raise
+    store.finish_job(job["id"], store.SUCCEEDED, result=result)
+    return result
+
+
+def run_job(job_id: str, kind: str, params: Dict[str, Any]) -> None:
+    """Worker process entry point: run one job and record its outcome."""
+    # Lead a new process group, so the pools the job starts (extract
+    # workers, the Whisper pool, PDF page pools) are terminated with it.
+    os.setsid()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+    store.set_current_job(job_id)
+    try:
+        result = JOB_KINDS[kind](**params)
+    except Exception as e:
+        logger.exception("Job failed", extra={"job_id": job_id, "kind": kind})
+        store.finish_job(job_id, store.FAILED, error=str(e))
+        return
+    store.finish_job(job_id, store.SUCCEEDED, result=result)
+
+
+def _signal_group(proc: BaseProcess, sig: int) -> None:
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        # The group is gone, or the job has not called setsid yet.
+        if proc.is_alive():
+            os.kill(proc.pid, sig)
+
+
+def terminate_job_process(proc: BaseProcess, timeout: float = 5.0) -> None:
+    """SIGTERM a job's process group, then SIGKILL whatever is left of it."""
+    _signal_group(proc, signal.SIGTERM)
+    proc.join(timeout)
+    _signal_group(proc, signal.SIGKILL)
+    proc.join(timeout)
+
+
+class JobRunner:
+    """
+    Dispatches queued jobs to at most `workers` concurrent worker processes,
+    and at most one running job per JOB_LOCKS lock.
+
+    A background thread polls the job store: it starts queued jobs, records
+    crashed workers as failed and terminates jobs whose cancellation was
+    requested. Run one runner per jobs database.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        mp_context: Optional[BaseContext] = None,
+    ):
+        self.workers = max(1, workers)
+        self.poll_seconds = poll_seconds
+        # spawn: the API process holds threads and network clients that a
+        # forked child must not inherit.
+        self._ctx = mp_context or multiprocessing.get_context("spawn")
+        self._running: Dict[str, BaseProcess] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "JobRunner":
+        store.requeue_interrupted()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="job-runner", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop dispatching; running jobs are terminated and requeued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for proc in self._running.values():
+            terminate_job_process(proc, timeout)
+        self._running.clear()
+        store.requeue_interrupted()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Job runner poll failed")
+            self._stop.wait(self.poll_seconds)
+
+    def poll(self) -> None:
+        self._reap()
+        self._cancel()
+        self._dispatch()
+
+    def _reap(self) -> None:
+        for job_id, proc in list(self._running.items()):
+            if proc.is_alive():
+                continue
+            proc.join()
+            del self._running[job_id]
+            # A crashed job leaves its pool workers behind.
+            _signal_group(proc, signal.SIGKILL)
+            if proc.exitcode != 0:
+                store.finish_job(
+                    job_id,
+                    store.FAILED,
+                    error=f"Worker process exited with code {proc.exitcode}",
+                )
+
+    def _cancel(self) -> None:
+        for job_id in store.cancel_requested_jobs():
+            proc = self._running.pop(job_id, None)
+            if proc is None:
+                continue  # owned by another runner or run in-process
+            terminate_job_process(proc)
+            store.finish_job(job_id, store.CANCELLED)
+
+    def _dispatch(self) -> None:
+        while len(self._running) < self.workers:
+            job = store.claim_next_job(locks=JOB_LOCKS)
+            if job is None:
+                return
+            proc = self._ctx.Process(
+                target=run_job,
+                args=(job["id"], job["kind"], job["params"]),
+                name=f"job-{job['id'][:8]}",
+            )
+            proc.start()
+            store.set_worker_pid(job["id"], proc.pid)
+            self._running[job["id"]] = proc
+            logger.info(
+                "Job started",
+                extra={"job_id": job["id"], "kind": job["kind"], "pid": proc.pid},
+            )
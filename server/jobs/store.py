@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB = Path(os.getenv("JOBS_DB_PATH", "data/jobs/jobs.db"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = {SUCCEEDED, FAILED, CANCELLED}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+# Set inside a job's worker process so report_progress knows which row to
+# update; None everywhere else, which makes report_progress a no-op.
+_current_job_id: Optional[str] = None
+
+
+def connect_jobs(path: Optional[Path] = None) -> sqlite3.Connection:
+    db_path = path or JOBS_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    set_journal_mode(conn, db_path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+@contextmanager
+def jobs_db(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    conn = connect_jobs(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def create_job(kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    job_id = uuid.uuid4().hex
+    with jobs_db() as conn, conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params or {}), QUEUED, time.time()),
+        )
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    logger.info("Job queued", extra={"job_id": job_id, "kind": kind})
+    return _job(row)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with jobs_db() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job(row) if row else None
+
+
+def list_jobs(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    with jobs_db() as conn:
+        if status is None:
+            rows = conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                (status, limit),
+            ).fetchall()
+    return [_job(r) for r in rows]
+
+
+def _locked_kinds(conn: sqlite3.Connection, locks: Mapping[str, str]) -> List[str]:
+    """Kinds whose lock is held by a running job."""
+    running = {
+        row["kind"]
+        for row in conn.execute(
+            "SELECT DISTINCT kind FROM jobs WHERE status = ?", (RUNNING,)
+        )
+    }
+    held = {locks[kind] for kind in running if kind in locks}
+    return [kind for kind, lock in locks.items() if lock in held]
+
+
+def claim_next_job(
+    worker_pid: Optional[int] = None, locks: Optional[Mapping[str, str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Atomically move the oldest queued job to running and return it, skipping
+    jobs whose lock (kind -> lock name in locks) a running job holds.
+    """
+    with jobs_db() as conn, conn:
+        # The write lock is taken before the job is chosen, so two runners
+        # cannot claim the same job (UPDATE ... RETURNING needs SQLite 3.35).
+        conn.execute("BEGIN IMMEDIATE")
+        excluded = _locked_kinds(conn, locks or {})
+        placeholders = ", ".join("?" for _ in excluded)
+        row = conn.execute(
+            f"SELECT id FROM jobs WHERE status = ? AND kind NOT IN ({placeholders}) "
+            "ORDER BY created_at LIMIT 1",
+            (QUEUED, *excluded),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = ?, started_at = ?, worker_pid = ? WHERE id = ?",
+            (RUNNING, time.time(), worker_pid, row["id"]),
+        )
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+    return _job(row)
+
+
+def start_job(
+    kind: str,
+    params: Optional[Dict[str, Any]] = None,
+    locks: Optional[Mapping[str, str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Record a job the calling process runs itself as running, unless a running
+    job holds its lock; None in that case.
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with jobs_db() as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if kind in _locked_kinds(conn, locks or {}):
+            return None
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, status, worker_pid, created_at, "
+            "started_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params or {}), RUNNING, os.getpid(), now, now),
+        )
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    logger.info("Job started in process", extra={"job_id": job_id, "kind": kind})
+    return _job(row)
+
+
+def set_worker_pid(job_id: str, worker_pid: int) -> None:
+    with jobs_db() as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET worker_pid = ? WHERE id = ?", (worker_pid, job_id)
+        )
+
+
+def update_progress(job_id: str, progress: float, message: str = "") -> None:
+    with jobs_db() as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET progress = ?, message = ? WHERE id = ? AND status = ?",
+            (max(0.0, min(1.0, progress)), message, job_id, RUNNING),
+        )
+
+
+def finish_job(
+    job_id: str,
+    status: str,
+    result: Any = None,
+    error: Optional[str] = None,
+) -> None:
+    """Record a job's outcome. A job that already finished keeps its status."""
+    with jobs_db() as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+            "progress = CASE WHEN ? = ? THEN 1 ELSE progress END "
+            "WHERE id = ? AND status IN (?, ?)",
+            (
+                status,
+                json.dumps(result, default=str) if result is not None else None,
+                error,
+                time.time(),
+                status,
+                SUCCEEDED,
+                job_id,
+                QUEUED,
+                RUNNING,
+            ),
+        )
+    logger.info("Job finished", extra={"job_id": job_id, "status": status})
+
+
+def request_cancel(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cancel a job. Queued jobs are cancelled at once; running jobs are flagged
+    and stopped by the runner. Returns the updated job, or None if unknown.
+    """
+    with jobs_db() as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, QUEUED),
+        )
+        conn.execute(
+            "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+            (job_id, RUNNING),
+        )
+    return get_job(job_id)
+
+
+def cancel_requested_jobs() -> List[str]:
+    with jobs_db() as conn:
+        rows = conn.execute(
+            "SELECT id FROM jobs WHERE status = ? AND cancel_requested = 1",
+            (RUNNING,),
+        ).fetchall()
+    return [r["id"] for r in rows]
+
+
+def requeue_interrupted() -> int:
+    """
+    Put jobs that were running when the server stopped back in the queue.
+    Ingestion jobs are idempotent (manifest, keyed upserts), so rerunning
+    them is safe. Jobs with a pending cancel are cancelled instead.
+    """
+    now = time.time()
+    with jobs_db() as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ? "
+            "WHERE status = ? AND cancel_requested = 1",
+            (CANCELLED, now, RUNNING),
+        )
+        requeued = conn.execute(
+            "UPDATE jobs SET status = ?, progress = 0, message = NULL, "
+            "started_at = NULL, worker_pid = NULL WHERE status = ?",
+            (QUEUED, RUNNING),
+        ).rowcount
+    if requeued:
+        logger.info("Requeued %d interrupted jobs", requeued)
+    return requeued
+
+
+def set_current_job(job_id: Optional[str]) -> None:
+    global _current_job_id
+    _current_job_id = job_id
+
+
+def report_progress(progress: float, message: str = "") -> None:
+    """Report progress of the job running in this process, if any."""
+    if _current_job_id is None:
+        return
+    try:
+        update_progress(_current_job_id, progress, message)
+    except sqlite3.Error:
+        logger.warning("Failed to report job progress", exc_info=True)
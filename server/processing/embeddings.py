@@ -1,13 +1,27 @@
 from typing import List
 
-from config import openai_client
+from processing.llm_providers import get_async_llm_client, get_llm_client, get_model
+
+openai_client = get_llm_client("embedding")
+async_openai_client = get_async_llm_client("embedding")
+EMBEDDING_MODEL = get_model("embedding")
 
 
 def embed_text(text: str) -> List[float]:
     if len(text) > 3000:
         text = text[:3000]
     resp = openai_client.embeddings.create(
-        model="text-embedding-3-small",
+        model=EMBEDDING_MODEL,
+        input=text,
+    )
+    return resp.data[0].embedding
+
+
+async def embed_text_async(text: str) -> List[float]:
+    if len(text) > 3000:
+        text = text[:3000]
+    resp = await async_openai_client.embeddings.create(
+        model=EMBEDDING_MODEL,
         input=text,
     )
     return resp.data[0].embedding
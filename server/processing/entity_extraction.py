@@ -1,18 +1,68 @@
 import json
 import logging
-from typing import Any, Union, cast
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Union, cast
 
-from config import openai_client
-
-from processing.graph_schema import JSON_GRAPH_SCHEMA
+from ingestion.hashing import fingerprint
+from processing.entity_resolution import normalize_name
+from processing.graph_schema import (
+    FRAGMENT_KEYS,
+    JSON_GRAPH_SCHEMA,
+    JSON_PACKED_GRAPH_SCHEMA,
+    empty_fragment,
+)
+from processing.llm_cache import (
+    get_cached_extraction,
+    make_cache_key,
+    put_cached_extraction,
+)
+from processing.llm_providers import get_llm_client, get_model
+from processing.tokens import count_tokens, split_into_windows
 
 logger = logging.getLogger(__name__)
 
+openai_client = get_llm_client("extraction")
+
+EXTRACTION_MODEL = get_model("extraction")
+EXTRACTION_TEMPERATURE = 0.1
+
+# Documents longer than this are extracted chunk-wise (map) and the per-chunk
+# fragments merged (reduce).
+EXTRACTION_CHUNK_TOKENS = int(os.getenv("EXTRACTION_CHUNK_TOKENS", "6000"))
+EXTRACTION_CHUNK_OVERLAP = int(os.getenv("EXTRACTION_CHUNK_OVERLAP", "200"))
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+
+SYSTEM_MSG = (
+    "You extract structured Pokémon knowledge graph data from text. "
+    "Return ONLY a single JSON object with the following top-level keys: "
+    "'pokemon_nodes', 'type_nodes', 'pokemon_type_edges', "
+    "'evolution_edges', 'mentions_edges'. "
+    "Do not include explanations, comments, or any text outside the JSON object."
+)
+
+PACKED_SYSTEM_MSG = SYSTEM_MSG + (
+    " The input contains several documents. Tag every node and edge with the "
+    "'media_id' of the document it was extracted from; a Pokémon or type that "
+    "appears in several documents must be listed once per document."
+)
+
+
+# Changes to the schema or prompt change the fingerprint, which invalidates
+# every cached extraction produced under the old version. Fragments split out
+# of packed calls share the cache with single-document results, so the packed
+# schema and prompt are part of the same fingerprint: the cache keeps entries
+# of one fingerprint only, and a separate packed one would purge the rest.
+SCHEMA_FINGERPRINT = fingerprint(
+    JSON_GRAPH_SCHEMA, SYSTEM_MSG, JSON_PACKED_GRAPH_SCHEMA, PACKED_SYSTEM_MSG
+)
+
 
 def extract_entities(text: str, media_id: str, pokemon_hint: Union[str, None] = None):
     """
     Call the OpenAI Responses API to extract Pokémon entities and relations
-    from a single document's text.
+    from a single document's text. Responses are cached on disk, keyed by
+    text, hint, model, temperature and schema fingerprint.
 
     Returns a dict with keys:
     - pokemon_nodes
@@ -21,13 +71,17 @@ def extract_entities(text: str, media_id: str, pokemon_hint: Union[str, None] =
     - evolution_edges
     - mentions_edges
     """
-    system_msg = (
-        "You extract structured Pokémon knowledge graph data from text. "
-        "Return ONLY a single JSON object with the following top-level keys: "
-        "'pokemon_nodes', 'type_nodes', 'pokemon_type_edges', "
-        "'evolution_edges', 'mentions_edges'. "
-        "Do not include explanations, comments, or any text outside the JSON object."
+    cache_key = make_cache_key(
+        text,
+        pokemon_hint,
+        EXTRACTION_MODEL,
+        EXTRACTION_TEMPERATURE,
+        SCHEMA_FINGERPRINT,
     )
+    cached = get_cached_extraction(cache_key, media_id, SCHEMA_FINGERPRINT)
+    if cached is not None:
+        return cached
+
     user_content = (
         f"Media ID: {media_id}\n\n"
         f"Text:\n{text}\n\n"
@@ -39,12 +93,12 @@ def extract_entities(text: str, media_id: str, pokemon_hint: Union[str, None] =
         user_content += f"\n\nPrimary Pokémon for this media is: {pokemon_hint}."
 
     response = openai_client.responses.create(
-        model="gpt-4o-mini",
+        model=EXTRACTION_MODEL,
         input=[
-            {"role": "system", "content": system_msg},
+            {"role": "system", "content": SYSTEM_MSG},
             {"role": "user", "content": user_content},
         ],
-        temperature=0.1,
+        temperature=EXTRACTION_TEMPERATURE,
         text=cast(
             Any,
             {
@@ -60,13 +114,225 @@ def extract_entities(text: str, media_id: str, pokemon_hint: Union[str, None] =
 
     data = json.loads(response.output[0].content[0].text)
 
-    for key in [
-        "pokemon_nodes",
-        "type_nodes",
-        "pokemon_type_edges",
-        "evolution_edges",
-        "mentions_edges",
-    ]:
+    for key in FRAGMENT_KEYS:
         data.setdefault(key, [])
 
+    put_cached_extraction(cache_key, media_id, SCHEMA_FINGERPRINT, data)
     return data
+
+
+def _node_completeness(node: Dict[str, Any]) -> int:
+    return sum(1 for v in node.values() if v not in (None, "", 0))
+
+
+def merge_fragments(fragments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Deterministically merge and dedupe fragments extracted from one document.
+
+    Pokémon nodes are keyed by normalized name; when chunks disagree the most
+    complete node wins, ties going to the earliest chunk. Output lists are
+    sorted so the result does not depend on chunk completion order.
+    """
+    pokemon_nodes: Dict[str, Dict[str, Any]] = {}
+    type_nodes: Dict[str, Dict[str, Any]] = {}
+    edges: Dict[str, set] = {
+        "pokemon_type_edges": set(),
+        "evolution_edges": set(),
+        "mentions_edges": set(),
+    }
+
+    for fragment in fragments:
+        for p in fragment.get("pokemon_nodes", []):
+            key = normalize_name(p["name"]) or p["name"]
+            current = pokemon_nodes.get(key)
+            if current is None or _node_completeness(p) > _node_completeness(current):
+                pokemon_nodes[key] = p
+
+        for t in fragment.get("type_nodes", []):
+            type_nodes.setdefault(normalize_name(t["name"]) or t["name"], t)
+
+        for key in edges:
+            for e in fragment.get(key, []):
+                edges[key].add(tuple(sorted(e.items())))
+
+    return {
+        "pokemon_nodes": [pokemon_nodes[k] for k in sorted(pokemon_nodes)],
+        "type_nodes": [type_nodes[k] for k in sorted(type_nodes)],
+        **{key: [dict(items) for items in sorted(edges[key])] for key in edges},
+    }
+
+
+def extract_entities_chunked(
+    text: str, media_id: str, pokemon_hint: Union[str, None] = None
+) -> Dict[str, Any]:
+    """
+    Map-reduce extraction for documents too long for a single prompt.
+
+    The text is split into token-bounded, overlapping windows which are
+    extracted in parallel (each window is cached by extract_entities like any
+    other text), then reduced with merge_fragments. Short documents go straight
+    to extract_entities.
+    """
+    windows = split_into_windows(
+        text, EXTRACTION_CHUNK_TOKENS, EXTRACTION_CHUNK_OVERLAP, EXTRACTION_MODEL
+    )
+    if len(windows) == 1:
+        return extract_entities(text=text, media_id=media_id, pokemon_hint=pokemon_hint)
+
+    logger.info(
+        "extract_entities_chunked started",
+        extra={"media_id": media_id, "chunks": len(windows)},
+    )
+
+    with ThreadPoolExecutor(
+        max_workers=min(EXTRACTION_MAX_WORKERS, len(windows))
+    ) as pool:
+        fragments = list(
+            pool.map(
+                lambda window: extract_entities(
+                    text=window, media_id=media_id, pokemon_hint=pokemon_hint
+                ),
+                windows,
+            )
+        )
+
+    return merge_fragments(fragments)
+
+
+def pack_documents(
+    documents: Iterable[Dict[str, Any]], token_budget: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Greedily group documents, in order, into packs whose text fits token_budget.
+
+    Each document is a dict with keys media_id, text and (optional) pokemon_hint.
+    A document larger than the budget on its own forms a single-document pack.
+    """
+    current: List[Dict[str, Any]] = []
+    used = 0
+
+    for doc in documents:
+        tokens = count_tokens(doc["text"], EXTRACTION_MODEL)
+        if current and used + tokens > token_budget:
+            yield current
+            current, used = [], 0
+        current.append(doc)
+        used += tokens
+
+    if current:
+        yield current
+
+
+def _split_packed_response(
+    data: Dict[str, Any], media_ids: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    fragments = {media_id: empty_fragment() for media_id in media_ids}
+
+    for key in FRAGMENT_KEYS:
+        for item in data.get(key, []):
+            item = dict(item)
+            media_id = item.pop("media_id", None)
+            if media_id not in fragments:
+                logger.warning(
+                    "Dropping packed extraction item with unknown media_id",
+                    extra={"media_id": media_id, "key": key},
+                )
+                continue
+            fragments[media_id][key].append(item)
+
+    return fragments
+
+
+def extract_entities_packed(
+    documents: List[Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Extract several small documents with a single structured-output call.
+
+    Documents already in the extraction cache are served from it; only the
+    misses are sent to the model. The packed response is split back into one
+    fragment per media_id, and each fragment is cached as if it had been
+    extracted on its own.
+
+    Returns {media_id: fragment}.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    misses: List[Dict[str, Any]] = []
+    cache_keys: Dict[str, str] = {}
+
+    for doc in documents:
+        media_id = doc["media_id"]
+        cache_keys[media_id] = make_cache_key(
+            doc["text"],
+            doc.get("pokemon_hint"),
+            EXTRACTION_MODEL,
+            EXTRACTION_TEMPERATURE,
+            SCHEMA_FINGERPRINT,
+        )
+        cached = get_cached_extraction(
+            cache_keys[media_id], media_id, SCHEMA_FINGERPRINT
+        )
+        if cached is not None:
+            results[media_id] = cached
+        else:
+            misses.append(doc)
+
+    if not misses:
+        return results
+    if len(misses) == 1:
+        doc = misses[0]
+        results[doc["media_id"]] = extract_entities_chunked(
+            text=doc["text"],
+            media_id=doc["media_id"],
+            pokemon_hint=doc.get("pokemon_hint"),
+        )
+        return results
+
+    sections: List[str] = []
+    for doc in misses:
+        header = f"=== Media ID: {doc['media_id']}"
+        if doc.get("pokemon_hint"):
+            header += f" (primary Pokémon: {doc['pokemon_hint']})"
+        sections.append(f"{header} ===\n{doc['text']}")
+
+    sections.append(
+        "For each document above, extract Pokémon entities, their types, "
+        "evolutions, and cross-references to other Pokémon mentioned in it."
+    )
+    user_content = "\n\n".join(sections)
+
+    logger.info(
+        "extract_entities_packed calling model",
+        extra={"documents": len(misses)},
+    )
+
+    response = openai_client.responses.create(
+        model=EXTRACTION_MODEL,
+        input=[
+            {"role": "system", "content": PACKED_SYSTEM_MSG},
+            {"role": "user", "content": user_content},
+        ],
+        temperature=EXTRACTION_TEMPERATURE,
+        text=cast(
+            Any,
+            {
+                "format": {
+                    "type": "json_schema",
+                    "name": "PackedPokemonGraphExtraction",
+                    "strict": True,
+                    "schema": JSON_PACKED_GRAPH_SCHEMA,
+                }
+            },
+        ),
+    )
+
+    data = json.loads(response.output[0].content[0].text)
+    fragments = _split_packed_response(data, [doc["media_id"] for doc in misses])
+
+    for media_id, fragment in fragments.items():
+        put_cached_extraction(
+            cache_keys[media_id], media_id, SCHEMA_FINGERPRINT, fragment
+        )
+        results[media_id] = fragment
+
+    return results
@@ -0,0 +1,238 @@
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+from data.pokemon_mappings import POKEMON_MAPPING
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 3
+
+_PARENTHETICAL_RE = re.compile(r"\([^)]*\)")
+_NON_NAME_CHARS_RE = re.compile(r"[^0-9a-z♀♂]+")
+_GENDER_ALIASES = {
+    "♀": ["f", "female"],
+    "♂": ["m", "male"],
+}
+
+
+def normalize_name(name: str) -> str:
+    """
+    Reduce an extracted entity name to a comparison key.
+
+    "Charmander", "charmander " and "Charmander (Pokémon)" all normalize to
+    "charmander".
+    """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _PARENTHETICAL_RE.sub(" ", text)
+    text = text.casefold()
+    return _NON_NAME_CHARS_RE.sub("", text)
+
+
+def normalize_type_name(name: str) -> str:
+    key = normalize_name(name)
+    return key.capitalize() if key else (name or "").strip()
+
+
+def mapping_aliases(mapping: Mapping[str, tuple] = POKEMON_MAPPING) -> Dict[str, str]:
+    """Surface forms (keys, names, spelled-out gender marks) -> canonical name."""
+    aliases: Dict[str, str] = {}
+    for key, (pokemon, _generation, _types) in mapping.items():
+        aliases.setdefault(pokemon, pokemon)
+        aliases.setdefault(key, pokemon)
+        for symbol, words in _GENDER_ALIASES.items():
+            if symbol in pokemon:
+                for word in words:
+                    aliases.setdefault(pokemon.replace(symbol, f" {word}"), pokemon)
+    return aliases
+
+
+def _ngrams(key: str, n: int = NGRAM_SIZE) -> Set[str]:
+    padded = f"#{key}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+
+def _bounded_edit_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """Levenshtein distance, or None as soon as it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j, cb in enumerate(b, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            )
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return None
+        previous = current
+
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def _max_distance(key: str) -> int:
+    if len(key) < 5:
+        return 0
+    if len(key) < 9:
+        return 1
+    return 2
+
+
+class EntityResolver:
+    """
+    Maps raw Pokémon names from OCR, ASR and PDF extraction onto canonical names.
+
+    Resolution order is: exact alias lookup, then fuzzy matching restricted to
+    candidates that share enough character n-grams (the blocking index), then
+    registration of the name as a new canonical entity. Each lookup only
+    compares against its n-gram block, so resolving N names stays well below
+    the O(N^2) cost of comparing every pair.
+    """
+
+    def __init__(self, aliases: Optional[Mapping[str, str]] = None):
+        self._aliases: Dict[str, str] = {}
+        self._canonical_keys: Dict[str, str] = {}
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+
+        for alias, canonical in (aliases or {}).items():
+            self.add(canonical, [alias])
+
+    @classmethod
+    def from_mapping(
+        cls, mapping: Mapping[str, tuple] = POKEMON_MAPPING
+    ) -> "EntityResolver":
+        return cls(mapping_aliases(mapping))
+
+    def add(self, canonical: str, aliases: Iterable[str] = ()) -> None:
+        canonical_key = normalize_name(canonical)
+        if not canonical_key:
+            return
+
+        if canonical_key not in self._canonical_keys:
+            self._canonical_keys[canonical_key] = canonical
+            for gram in _ngrams(canonical_key):
+                self._index[gram].add(canonical_key)
+
+        for name in [canonical, *aliases]:
+            key = normalize_name(name)
+            if key:
+                self._aliases.setdefault(key, canonical)
+
+    def _fuzzy_match(self, key: str) -> Optional[str]:
+        limit = _max_distance(key)
+        if limit == 0:
+            return None
+
+        grams = _ngrams(key)
+        # q-gram count filter: strings within edit distance k share at least
+        # |grams| - k * n n-grams.
+        min_shared = max(1, len(grams) - limit * NGRAM_SIZE)
+
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._index.get(gram, ()):
+                shared[candidate] += 1
+
+        best: List[str] = []
+        best_distance = limit + 1
+        for candidate, count in shared.items():
+            if count < min_shared:
+                continue
+            distance = _bounded_edit_distance(key, candidate, limit)
+            if distance is None:
+                continue
+            if distance < best_distance:
+                best, best_distance = [candidate], distance
+            elif distance == best_distance:
+                best.append(candidate)
+
+        if len(best) != 1:
+            # No candidate, or an ambiguous tie ("nidorin" vs nidorina/nidorino).
+            return None
+        return self._canonical_keys[best[0]]
+
+    def match(self, name: str) -> Optional[str]:
+        """Canonical name for a known alias or a close misspelling, else None."""
+        key = normalize_name(name)
+        if not key:
+            return None
+        return self._aliases.get(key) or self._fuzzy_match(key)
+
+    def resolve(self, name: str) -> str:
+        key = normalize_name(name)
+        if not key:
+            return (name or "").strip()
+
+        canonical = self._aliases.get(key)
+        if canonical is not None:
+            return canonical
+
+        canonical = self._fuzzy_match(key)
+        if canonical is None:
+            canonical = _PARENTHETICAL_RE.sub(" ", unicodedata.normalize("NFKC", name))
+            canonical = " ".join(canonical.split())
+            self.add(canonical)
+            logger.debug("New canonical entity", extra={"entity_name": canonical})
+        else:
+            self._aliases[key] = canonical
+            logger.debug(
+                "Resolved entity alias",
+                extra={"entity_name": name, "canonical": canonical},
+            )
+
+        return canonical
+
+
+def canonicalize_fragment(
+    fragment: Dict[str, Any], resolver: EntityResolver
+) -> Dict[str, Any]:
+    """Return a copy of a fragment with canonical Pokémon and type names."""
+    pokemon_nodes: Dict[str, Dict[str, Any]] = {}
+    for p in fragment.get("pokemon_nodes", []):
+        name = resolver.resolve(p["name"])
+        node = dict(p, name=name)
+        for field in ("primary_type", "secondary_type"):
+            if node.get(field):
+                node[field] = normalize_type_name(node[field])
+        pokemon_nodes[name] = node
+
+    type_nodes: Dict[str, Dict[str, Any]] = {}
+    for t in fragment.get("type_nodes", []):
+        type_name = normalize_type_name(t["name"])
+        type_nodes[type_name] = dict(t, name=type_name)
+
+    return {
+        "pokemon_nodes": list(pokemon_nodes.values()),
+        "type_nodes": list(type_nodes.values()),
+        "pokemon_type_edges": [
+            {
+                "from_pokemon": resolver.resolve(e["from_pokemon"]),
+                "to_type": normalize_type_name(e["to_type"]),
+            }
+            for e in fragment.get("pokemon_type_edges", [])
+        ],
+        "evolution_edges": [
+            {
+                "from_pokemon": resolver.resolve(e["from_pokemon"]),
+                "to_pokemon": resolver.resolve(e["to_pokemon"]),
+            }
+            for e in fragment.get("evolution_edges", [])
+        ],
+        "mentions_edges": [
+            {
+                "from_media_id": e["from_media_id"],
+                "to_pokemon": resolver.resolve(e["to_pokemon"]),
+            }
+            for e in fragment.get("mentions_edges", [])
+        ],
+    }
@@ -0,0 +1,162 @@
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Union
+
+from data.pokemon_mappings import POKEMON_MAPPING
+
+from processing.entity_resolution import (
+    EntityResolver,
+    mapping_aliases,
+    normalize_type_name,
+)
+from processing.graph_schema import empty_fragment
+from processing.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_ENABLED = os.getenv("GAZETTEER_ENABLED", "1") != "0"
+
+# Relations the gazetteer cannot resolve on its own; documents that talk about
+# them still go to the LLM.
+_LLM_ONLY_CUES = re.compile(r"\b(evolv\w*|evolution\w*|devolv\w*)\b", re.IGNORECASE)
+
+# Capitalised words are candidate entity names, but OCR'd cards and
+# transcripts capitalise plenty of words that name nothing (sentence starts,
+# "Fun", attack names, "Weakness"). A candidate only keeps a document from
+# being resolved locally when it looks like a misspelt gazetteer name or
+# stands where a Pokémon name would: listed next to a known Pokémon, or as
+# the subject of a typing claim ("X is a Water-type Pokémon").
+_CANDIDATE_RE = re.compile(r"\b[A-Z][\w'’♀♂]*")
+_LIST_SEP_RE = re.compile(r"\s*(?:,|/|&|,?\s+(?:and|or))\s*", re.IGNORECASE)
+_CLAIM_RE = re.compile(
+    r"(?:'s|’s)?(?:\s+(?:is|was)\s+(?:a|an|the)|,\s+the)\s+"
+    r"(?:\S+\s+){0,2}?\S*(?:type|pok[eé]mon)\b",
+    re.IGNORECASE,
+)
+_TYPE_NAMES = frozenset(
+    "normal fire water grass electric ice fighting poison ground flying "
+    "psychic bug rock ghost dragon dark steel fairy".split()
+)
+_COMMON_WORDS = frozenset(
+    "a an the this that these those it its is are was be in on at to of for "
+    "and or but with from by as if when while after before during both each "
+    "he she they his her their we you i its also can may will not no yes "
+    "pokemon pokémon pokedex pokédex type types starter generation gen level "
+    "lv hp card cards attack attacks move moves ability stage basic evolves "
+    "evolution region trainer weakness resistance retreat cost energy damage "
+    "fun fact".split()
+)
+
+
+@lru_cache(maxsize=1)
+def _matcher() -> KeywordMatcher:
+    return KeywordMatcher(mapping_aliases(POKEMON_MAPPING).items())
+
+
+@lru_cache(maxsize=1)
+def _resolver() -> EntityResolver:
+    return EntityResolver.from_mapping(POKEMON_MAPPING)
+
+
+@lru_cache(maxsize=1)
+def _entries_by_name() -> Dict[str, tuple]:
+    return {entry[0]: entry for entry in POKEMON_MAPPING.values()}
+
+
+def extract_entities_local(
+    text: str, media_id: str, pokemon_hint: Union[str, None] = None
+) -> Dict[str, Any]:
+    """
+    Deterministic extraction of Pokémon, generations and types known in
+    POKEMON_MAPPING, using a compiled keyword automaton over names and aliases.
+
+    Emits the same fragment shape as extract_entities; evolution_edges are
+    always empty.
+    """
+    fragment = empty_fragment()
+
+    found = [value for _start, _end, value in _matcher().find_longest(text)]
+    if pokemon_hint:
+        found += [value for _s, _e, value in _matcher().find_longest(pokemon_hint)]
+
+    seen_pokemon: set[str] = set()
+    seen_types: set[str] = set()
+    for pokemon in found:
+        if pokemon in seen_pokemon:
+            continue
+        seen_pokemon.add(pokemon)
+
+        entry = _entries_by_name().get(pokemon)
+        if entry is None:
+            continue
+        _name, generation, types = entry
+        types = [normalize_type_name(t) for t in types]
+
+        fragment["pokemon_nodes"].append(
+            {
+                "name": pokemon,
+                "generation": generation,
+                "primary_type": types[0] if types else "",
+                "secondary_type": types[1] if len(types) > 1 else "",
+            }
+        )
+        for type_name in types:
+            fragment["pokemon_type_edges"].append(
+                {"from_pokemon": pokemon, "to_type": type_name}
+            )
+            if type_name not in seen_types:
+                seen_types.add(type_name)
+                fragment["type_nodes"].append({"name": type_name})
+        fragment["mentions_edges"].append(
+            {"from_media_id": media_id, "to_pokemon": pokemon}
+        )
+
+    return fragment
+
+
+def mentioned_pokemon(text: str) -> list[str]:
+    """Canonical names of the POKEMON_MAPPING Pokémon text mentions."""
+    return [value for _start, _end, value in _matcher().find_longest(text)]
+
+
+def _names_a_pokemon(text: str, match: re.Match, spans: list) -> bool:
+    if _resolver().match(match.group()) is not None:
+        return True
+    if _CLAIM_RE.match(text, match.end()):
+        return True
+    for start, end in spans:
+        if end <= match.start() and _LIST_SEP_RE.fullmatch(text, end, match.start()):
+            return True
+        if start >= match.end() and _LIST_SEP_RE.fullmatch(text, match.end(), start):
+            return True
+    return False
+
+
+def unresolved_candidates(text: str) -> list[str]:
+    """Capitalised words in text that may name a Pokémon the gazetteer lacks."""
+    spans = [(start, end) for start, end, _ in _matcher().find_longest(text)]
+    unresolved = []
+    for match in _CANDIDATE_RE.finditer(text):
+        word = match.group().lower()
+        if word in _TYPE_NAMES or word in _COMMON_WORDS:
+            continue
+        if any(start <= match.start() < end for start, end in spans):
+            continue
+        if _names_a_pokemon(text, match, spans):
+            unresolved.append(match.group())
+    return unresolved
+
+
+def needs_llm(text: str, fragment: Dict[str, Any]) -> bool:
+    """
+    True when the gazetteer result is not enough on its own: nothing was
+    recognised, the text names something the gazetteer does not know, or it
+    makes claims (evolutions) only the LLM extracts.
+    """
+    if not fragment["pokemon_nodes"]:
+        return True
+    if _LLM_ONLY_CUES.search(text):
+        return True
+    return bool(unresolved_candidates(text))
@@ -1,23 +1,38 @@
 import csv
 import json
+import logging
+import os
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, Iterator
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
-from processing.entity_extraction import extract_entities
+from ingestion import record_store
+from processing import entity_extraction, gazetteer, graph_store
+from processing.entity_resolution import EntityResolver, canonicalize_fragment
+from processing.graph_schema import empty_fragment
 
-TEXT_JSONL = Path("data/processed/text.jsonl")
-IMAGES_JSONL = Path("data/processed/images.jsonl")
-AUDIO_JSONL = Path("data/processed/audio.jsonl")
+logger = logging.getLogger(__name__)
 
 GRAPH_DIR = Path("graph")
 NODES_DIR = GRAPH_DIR / "nodes"
 EDGES_DIR = GRAPH_DIR / "edges"
 GRAPH_JSON = GRAPH_DIR / "graph.json"
 
+# When > 0, small documents are packed into shared extraction calls of up to
+# this many text tokens. 0 keeps one extraction call per document.
+EXTRACTION_PACK_TOKEN_BUDGET = int(os.getenv("EXTRACTION_PACK_TOKEN_BUDGET", "0"))
+
 
 def build_graph_and_export_to_csv_and_json() -> Dict[str, Any]:
-    graph = build_graph()
+    # Held from the record scan to the export, so a watcher update made
+    # meanwhile is not overwritten by a graph built from older records.
+    with graph_store.graph_write_lock():
+        graph = build_graph()
+        export_graph(graph)
+    return graph
+
 
+def export_graph(graph: Dict[str, Any]) -> None:
     GRAPH_DIR.mkdir(parents=True, exist_ok=True)
     NODES_DIR.mkdir(parents=True, exist_ok=True)
     EDGES_DIR.mkdir(parents=True, exist_ok=True)
@@ -42,69 +57,277 @@ def build_graph_and_export_to_csv_and_json() -> Dict[str, Any]:
         writer.writeheader()
         writer.writerows(graph["mentions_edges"])
 
-    with GRAPH_JSON.open("w", encoding="utf-8") as f:
+    tmp_path = GRAPH_JSON.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
         json.dump(graph, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, GRAPH_JSON)
 
-    return graph
+
+def _document(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "media_id": record["id"],
+        "text": record.get("text", ""),
+        "pokemon_hint": record.get("pokemon"),
+    }
+
+
+def _iter_documents(
+    duplicates: Optional[Dict[str, List[str]]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one document per record to extract from. Near-duplicates are not
+    extracted: they are collected into duplicates (canonical id -> duplicate
+    ids) so they can inherit the canonical record's mentions. A duplicate
+    whose canonical record is gone is extracted like any other record.
+    """
+    record_store.migrate_legacy_jsonl()
+    linked: Dict[str, List[str]] = {}
+    for record in record_store.iter_records():
+        canonical = record.get("duplicate_of")
+        if canonical and duplicates is not None:
+            linked.setdefault(canonical, []).append(record["id"])
+            continue
+        yield _document(record)
+
+    present = record_store.get_records(linked)
+    for canonical, media_ids in linked.items():
+        if canonical in present:
+            duplicates[canonical] = media_ids
+            continue
+        for record in record_store.get_records(media_ids).values():
+            yield _document(record)
+
+
+def _duplicate_mentions(
+    mentions_edges: Iterable[tuple[str, str]], duplicates: Dict[str, List[str]]
+) -> set[tuple[str, str]]:
+    """Mentions edges for near-duplicates, copied from their canonical record."""
+    return {
+        (media_id, pokemon)
+        for canonical, pokemon in mentions_edges
+        for media_id in duplicates.get(canonical, ())
+    }
 
 
-def _iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
-    if not path.exists():
+def _extract_with_llm(
+    documents: Iterable[Dict[str, Any]],
+) -> Iterator[tuple[Dict[str, Any], Dict[str, Any]]]:
+    if EXTRACTION_PACK_TOKEN_BUDGET <= 0:
+        for doc in documents:
+            yield doc, entity_extraction.extract_entities_chunked(
+                text=doc["text"],
+                media_id=doc["media_id"],
+                pokemon_hint=doc["pokemon_hint"],
+            )
         return
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            obj: Dict[str, Any] = json.loads(line)
-            yield obj
 
+    for pack in entity_extraction.pack_documents(
+        documents, EXTRACTION_PACK_TOKEN_BUDGET
+    ):
+        fragments = entity_extraction.extract_entities_packed(pack)
+        for doc in pack:
+            yield doc, fragments[doc["media_id"]]
 
-def build_graph():
-    pokemon_nodes: Dict[str, Dict[str, Any]] = {}
-    type_nodes: Dict[str, Dict[str, Any]] = {}
 
-    pokemon_type_edges: set[tuple[str, str]] = set()
-    evolution_edges: set[tuple[str, str]] = set()
-    mentions_edges: set[tuple[str, str]] = set()
+def _extract_fragments(
+    documents: Iterable[Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one fragment per document.
+
+    Documents the gazetteer fully resolves never reach the LLM; the rest are
+    sent to the model and its fragment is merged with the gazetteer's.
+    """
+    if not gazetteer.GAZETTEER_ENABLED:
+        for _doc, fragment in _extract_with_llm(documents):
+            yield fragment
+        return
+
+    resolved: deque = deque()
+    local_fragments: Dict[str, Dict[str, Any]] = {}
+    stats = {"documents": 0, "local_only": 0}
+
+    def unresolved_documents() -> Iterator[Dict[str, Any]]:
+        for doc in documents:
+            stats["documents"] += 1
+            fragment = gazetteer.extract_entities_local(
+                doc["text"], doc["media_id"], doc["pokemon_hint"]
+            )
+            if gazetteer.needs_llm(doc["text"], fragment):
+                local_fragments[doc["media_id"]] = fragment
+                yield doc
+            else:
+                stats["local_only"] += 1
+                resolved.append(fragment)
+
+    for doc, fragment in _extract_with_llm(unresolved_documents()):
+        while resolved:
+            yield resolved.popleft()
+        local = local_fragments.pop(doc["media_id"], empty_fragment())
+        yield entity_extraction.merge_fragments([local, fragment])
+
+    while resolved:
+        yield resolved.popleft()
+
+    logger.info(
+        "Gazetteer resolved %d of %d documents without an LLM call",
+        stats["local_only"],
+        stats["documents"],
+    )
 
-    def merge_fragment(fragment: Dict[str, Any]):
+
+class _GraphAccumulator:
+    """Merges fragments into one graph, keyed so repeated facts collapse."""
+
+    def __init__(self, graph: Optional[Dict[str, Any]] = None):
+        graph = graph or empty_fragment()
+        self.pokemon_nodes: Dict[str, Dict[str, Any]] = {
+            p["name"]: p for p in graph["pokemon_nodes"]
+        }
+        self.type_nodes: Dict[str, Dict[str, Any]] = {
+            t["name"]: t for t in graph["type_nodes"]
+        }
+        self.pokemon_type_edges: set[tuple[str, str]] = {
+            (e["from_pokemon"], e["to_type"]) for e in graph["pokemon_type_edges"]
+        }
+        self.evolution_edges: set[tuple[str, str]] = {
+            (e["from_pokemon"], e["to_pokemon"]) for e in graph["evolution_edges"]
+        }
+        self.mentions_edges: set[tuple[str, str]] = {
+            (e["from_media_id"], e["to_pokemon"]) for e in graph["mentions_edges"]
+        }
+
+    def merge(self, fragment: Dict[str, Any]) -> None:
         for p in fragment["pokemon_nodes"]:
-            name = p["name"]
-            pokemon_nodes[name] = p
+            self.pokemon_nodes[p["name"]] = p
 
         for t in fragment["type_nodes"]:
-            type_name = t["name"]
-            type_nodes[type_name] = t
+            self.type_nodes[t["name"]] = t
 
         for e in fragment["pokemon_type_edges"]:
-            pokemon_type_edges.add((e["from_pokemon"], e["to_type"]))
+            self.pokemon_type_edges.add((e["from_pokemon"], e["to_type"]))
 
         for e in fragment["evolution_edges"]:
-            evolution_edges.add((e["from_pokemon"], e["to_pokemon"]))
+            self.evolution_edges.add((e["from_pokemon"], e["to_pokemon"]))
 
         for e in fragment["mentions_edges"]:
-            mentions_edges.add((e["from_media_id"], e["to_pokemon"]))
-
-    for path in [TEXT_JSONL, IMAGES_JSONL, AUDIO_JSONL]:
-        for line in _iter_jsonl(path):
-            fragment = extract_entities(
-                text=line.get("text", ""),
-                media_id=line["id"],
-                pokemon_hint=line.get("pokemon"),
-            )
-            merge_fragment(fragment)
+            self.mentions_edges.add((e["from_media_id"], e["to_pokemon"]))
 
-    return {
-        "pokemon_nodes": list(pokemon_nodes.values()),
-        "type_nodes": list(type_nodes.values()),
-        "pokemon_type_edges": [
-            {"from_pokemon": src, "to_type": dst} for (src, dst) in pokemon_type_edges
-        ],
-        "evolution_edges": [
-            {"from_pokemon": src, "to_pokemon": dst} for (src, dst) in evolution_edges
-        ],
-        "mentions_edges": [
-            {"from_media_id": src, "to_pokemon": dst} for (src, dst) in mentions_edges
-        ],
-    }
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "pokemon_nodes": list(self.pokemon_nodes.values()),
+            "type_nodes": list(self.type_nodes.values()),
+            "pokemon_type_edges": [
+                {"from_pokemon": src, "to_type": dst}
+                for (src, dst) in self.pokemon_type_edges
+            ],
+            "evolution_edges": [
+                {"from_pokemon": src, "to_pokemon": dst}
+                for (src, dst) in self.evolution_edges
+            ],
+            "mentions_edges": [
+                {"from_media_id": src, "to_pokemon": dst}
+                for (src, dst) in self.mentions_edges
+            ],
+        }
+
+
+def _apply_documents(
+    graph: _GraphAccumulator,
+    documents: Iterable[Dict[str, Any]],
+    duplicates: Dict[str, List[str]],
+    upsert: bool = True,
+) -> None:
+    """
+    Extract fragments for documents and merge them into graph, and with
+    upsert into the SQLite graph store when it is the backend. duplicates is
+    read once the documents are exhausted, so _iter_documents may still be
+    filling it.
+    """
+    resolver = EntityResolver.from_mapping()
+    use_db = upsert and graph_store.GRAPH_BACKEND == "sqlite"
+    pending: List[Dict[str, Any]] = []
+
+    for fragment in _extract_fragments(documents):
+        fragment = canonicalize_fragment(fragment, resolver)
+        graph.merge(fragment)
+
+        if use_db:
+            pending.append(fragment)
+            if len(pending) >= graph_store.UPSERT_BATCH_SIZE:
+                graph_store.upsert_fragments(pending)
+                pending = []
+
+    duplicate_mentions = _duplicate_mentions(graph.mentions_edges, duplicates)
+    graph.mentions_edges |= duplicate_mentions
+    if use_db and duplicate_mentions:
+        fragment = empty_fragment()
+        fragment["mentions_edges"] = [
+            {"from_media_id": src, "to_pokemon": dst}
+            for (src, dst) in duplicate_mentions
+        ]
+        pending.append(fragment)
+
+    if pending:
+        graph_store.upsert_fragments(pending)
+
+
+def build_graph():
+    graph = _GraphAccumulator()
+    duplicates: Dict[str, List[str]] = {}
+    _apply_documents(graph, _iter_documents(duplicates), duplicates, upsert=False)
+    result = graph.as_dict()
+    if graph_store.GRAPH_BACKEND == "sqlite":
+        # A full build replaces the store, dropping rows of removed records.
+        graph_store.replace_graph(result)
+    return result
+
+
+def _load_exported_graph() -> Dict[str, Any]:
+    if not GRAPH_JSON.exists():
+        return empty_fragment()
+    with GRAPH_JSON.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_graph(media_ids: Iterable[str]) -> Dict[str, Any]:
+    """
+    Graph delta for new or changed records: only these records are
+    extracted again and merged into the exported graph, replacing their
+    previous mentions. Nodes and edges from other records are kept.
+    """
+    ids = list(dict.fromkeys(media_ids))
+    if not ids:
+        return _load_exported_graph()
+
+    with graph_store.graph_write_lock():
+        graph_store.remove_media(ids)
+        exported = _load_exported_graph()
+        stale = set(ids)
+        exported["mentions_edges"] = [
+            e for e in exported["mentions_edges"] if e["from_media_id"] not in stale
+        ]
+        graph = _GraphAccumulator(exported)
+
+        records = record_store.get_records(ids)
+        canonicals = record_store.get_records(
+            r["duplicate_of"] for r in records.values() if r.get("duplicate_of")
+        )
+        documents: List[Dict[str, Any]] = []
+        duplicates: Dict[str, List[str]] = {}
+        for record in records.values():
+            canonical = record.get("duplicate_of")
+            if canonical in canonicals or canonical in records:
+                duplicates.setdefault(canonical, []).append(record["id"])
+            else:
+                documents.append(_document(record))
+
+        _apply_documents(graph, documents, duplicates)
+        result = graph.as_dict()
+        export_graph(result)
+
+    logger.info(
+        "Graph updated",
+        extra={"records": len(records), "extracted": len(documents)},
+    )
+    return result
@@ -1,4 +1,13 @@
-from typing import Any, Dict
+import copy
+from typing import Any, Dict, List
+
+FRAGMENT_KEYS = [
+    "pokemon_nodes",
+    "type_nodes",
+    "pokemon_type_edges",
+    "evolution_edges",
+    "mentions_edges",
+]
 
 JSON_GRAPH_SCHEMA: Dict[str, Any] = {
     "type": "object",
@@ -72,3 +81,22 @@ JSON_GRAPH_SCHEMA: Dict[str, Any] = {
     ],
     "additionalProperties": False,
 }
+
+
+def empty_fragment() -> Dict[str, List[Dict[str, Any]]]:
+    return {key: [] for key in FRAGMENT_KEYS}
+
+
+def _with_media_id(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of the schema where every node and edge carries its source media_id."""
+    packed = copy.deepcopy(schema)
+    for key in FRAGMENT_KEYS:
+        items = packed["properties"][key]["items"]
+        items["properties"]["media_id"] = {"type": "string"}
+        items["required"] = ["media_id", *items["required"]]
+    return packed
+
+
+# Used when several documents are packed into a single extraction call; the
+# media_id tag lets the response be split back into per-document fragments.
+JSON_PACKED_GRAPH_SCHEMA: Dict[str, Any] = _with_media_id(JSON_GRAPH_SCHEMA)
@@ -1,13 +1,72 @@
+import fcntl
 import json
 import logging
+import os
 import re
+import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ingestion.sqlite_journal import set_journal_mode
 
 GRAPH_JSON = Path("graph/graph.json")
+GRAPH_DB = Path(os.getenv("GRAPH_DB_PATH", "graph/graph.db"))
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "json")  # "json" or "sqlite"
+UPSERT_BATCH_SIZE = 500
 
 logger = logging.getLogger(__name__)
 
+# Set while this thread holds graph_write_lock, which makes it reentrant.
+_write_lock_held = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pokemon_nodes (
+    name TEXT PRIMARY KEY,
+    generation INTEGER,
+    primary_type TEXT,
+    secondary_type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pokemon_nodes_lower_name
+    ON pokemon_nodes (lower(name));
+
+CREATE TABLE IF NOT EXISTS type_nodes (
+    name TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS pokemon_type_edges (
+    from_pokemon TEXT NOT NULL,
+    to_type TEXT NOT NULL,
+    PRIMARY KEY (from_pokemon, to_type)
+);
+CREATE INDEX IF NOT EXISTS idx_pokemon_type_edges_to
+    ON pokemon_type_edges (to_type);
+
+CREATE TABLE IF NOT EXISTS evolution_edges (
+    from_pokemon TEXT NOT NULL,
+    to_pokemon TEXT NOT NULL,
+    PRIMARY KEY (from_pokemon, to_pokemon)
+);
+CREATE INDEX IF NOT EXISTS idx_evolution_edges_to
+    ON evolution_edges (to_pokemon);
+
+CREATE TABLE IF NOT EXISTS mentions_edges (
+    from_media_id TEXT NOT NULL,
+    to_pokemon TEXT NOT NULL,
+    PRIMARY KEY (from_media_id, to_pokemon)
+);
+CREATE INDEX IF NOT EXISTS idx_mentions_edges_to
+    ON mentions_edges (to_pokemon);
+"""
+_TABLES = (
+    "pokemon_nodes",
+    "type_nodes",
+    "pokemon_type_edges",
+    "evolution_edges",
+    "mentions_edges",
+)
+
 
 def load_graph() -> Dict[str, Any]:
     if not GRAPH_JSON.exists():
@@ -73,21 +132,332 @@ def find_pokemon_nodes_by_name(
     return matches
 
 
-def build_graph_context(question: str) -> Dict[str, Any]:
-    logger.info(f"Building graph context for question: {question}")
+def connect_graph_db(path: Optional[Path] = None) -> sqlite3.Connection:
+    """Open the SQLite graph store in WAL mode, creating tables if needed."""
+    db_path = path or GRAPH_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    set_journal_mode(conn, db_path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+@contextmanager
+def graph_db(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    conn = connect_graph_db(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _write_fragments(conn: sqlite3.Connection, fragments: List[Dict[str, Any]]) -> None:
+    pokemon_rows = [
+        (
+            p["name"],
+            p.get("generation"),
+            p.get("primary_type"),
+            p.get("secondary_type"),
+        )
+        for f in fragments
+        for p in f.get("pokemon_nodes", [])
+    ]
+    type_rows = [(t["name"],) for f in fragments for t in f.get("type_nodes", [])]
+    type_edge_rows = [
+        (e["from_pokemon"], e["to_type"])
+        for f in fragments
+        for e in f.get("pokemon_type_edges", [])
+    ]
+    evolution_rows = [
+        (e["from_pokemon"], e["to_pokemon"])
+        for f in fragments
+        for e in f.get("evolution_edges", [])
+    ]
+    mention_rows = [
+        (e["from_media_id"], e["to_pokemon"])
+        for f in fragments
+        for e in f.get("mentions_edges", [])
+    ]
+
+    conn.executemany(
+        "INSERT INTO pokemon_nodes (name, generation, primary_type, secondary_type) "
+        "VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET "
+        "generation = excluded.generation, "
+        "primary_type = excluded.primary_type, "
+        "secondary_type = excluded.secondary_type",
+        pokemon_rows,
+    )
+    conn.executemany(
+        "INSERT INTO type_nodes (name) VALUES (?) ON CONFLICT(name) DO NOTHING",
+        type_rows,
+    )
+    conn.executemany(
+        "INSERT INTO pokemon_type_edges (from_pokemon, to_type) VALUES (?, ?) "
+        "ON CONFLICT DO NOTHING",
+        type_edge_rows,
+    )
+    conn.executemany(
+        "INSERT INTO evolution_edges (from_pokemon, to_pokemon) VALUES (?, ?) "
+        "ON CONFLICT DO NOTHING",
+        evolution_rows,
+    )
+    conn.executemany(
+        "INSERT INTO mentions_edges (from_media_id, to_pokemon) VALUES (?, ?) "
+        "ON CONFLICT DO NOTHING",
+        mention_rows,
+    )
+
+
+def _upsert_batch(conn: sqlite3.Connection, fragments: List[Dict[str, Any]]) -> None:
+    with conn:
+        _write_fragments(conn, fragments)
+
+
+def upsert_fragments(
+    fragments: Iterable[Dict[str, Any]],
+    batch_size: int = UPSERT_BATCH_SIZE,
+    path: Optional[Path] = None,
+) -> int:
+    """
+    Apply extraction fragments to the SQLite graph store.
+
+    Fragments are grouped into batches and each batch is written in a single
+    transaction, so readers never observe a half-applied batch.
+    Returns the number of fragments applied.
+    """
+    applied = 0
+    batch: List[Dict[str, Any]] = []
+
+    with graph_db(path) as conn:
+        for fragment in fragments:
+            batch.append(fragment)
+            if len(batch) >= batch_size:
+                _upsert_batch(conn, batch)
+                applied += len(batch)
+                batch = []
+        if batch:
+            _upsert_batch(conn, batch)
+            applied += len(batch)
+
+    logger.info(
+        "upsert_fragments finished",
+        extra={"fragments": applied, "path": str(path or GRAPH_DB)},
+    )
+    return applied
+
+
+@contextmanager
+def graph_write_lock() -> Iterator[None]:
+    """
+    Serialize graph rewrites (graph.json and the SQLite store) across threads
+    and processes: full builds, watcher updates and tombstones all
+    read-modify-write the graph. Reentrant within a thread.
+    """
+    if getattr(_write_lock_held, "value", False):
+        yield
+        return
+
+    lock_path = GRAPH_JSON.with_suffix(".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        _write_lock_held.value = True
+        try:
+            yield
+        finally:
+            _write_lock_held.value = False
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def replace_graph(graph: Dict[str, Any], path: Optional[Path] = None) -> None:
+    """
+    Make the SQLite graph store hold exactly graph, for full rebuilds:
+    upserts alone would keep nodes and edges of records that are gone.
+    Everything is swapped in one transaction, so readers see either the old
+    graph or the new one.
+    """
+    with graph_db(path) as conn, conn:
+        for table in _TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        _write_fragments(conn, [graph])
+    logger.info(
+        "replace_graph finished",
+        extra={
+            "pokemon": len(graph["pokemon_nodes"]),
+            "path": str(path or GRAPH_DB),
+        },
+    )
+
+
+def remove_media(media_ids: Iterable[str], path: Optional[Path] = None) -> int:
+    """
+    Drop the mentions edges of deleted media from graph.json and, when it
+    exists, the SQLite graph store. Pokémon and type nodes are left in place:
+    they are facts about the world, not about one source file.
+    Returns the number of edges removed from graph.json.
+    """
+    ids = set(media_ids)
+    if not ids:
+        return 0
+
+    removed = 0
+    with graph_write_lock():
+        if GRAPH_JSON.exists():
+            graph = load_graph()
+            kept = [e for e in graph["mentions_edges"] if e["from_media_id"] not in ids]
+            removed = len(graph["mentions_edges"]) - len(kept)
+            if removed:
+                graph["mentions_edges"] = kept
+                tmp_path = GRAPH_JSON.with_suffix(".json.tmp")
+                with tmp_path.open("w", encoding="utf-8") as f:
+                    json.dump(graph, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, GRAPH_JSON)
+
+        db_path = path or GRAPH_DB
+        if db_path.exists():
+            with graph_db(db_path) as conn, conn:
+                conn.executemany(
+                    "DELETE FROM mentions_edges WHERE from_media_id = ?",
+                    [(media_id,) for media_id in ids],
+                )
+
+    logger.info(
+        "remove_media finished", extra={"media": len(ids), "json_edges": removed}
+    )
+    return removed
+
+
+def load_graph_from_db(path: Optional[Path] = None) -> Dict[str, Any]:
+    with graph_db(path) as conn:
+        return {
+            "pokemon_nodes": [
+                dict(r)
+                for r in conn.execute(
+                    "SELECT name, generation, primary_type, secondary_type "
+                    "FROM pokemon_nodes ORDER BY rowid"
+                )
+            ],
+            "type_nodes": [
+                dict(r)
+                for r in conn.execute("SELECT name FROM type_nodes ORDER BY rowid")
+            ],
+            "pokemon_type_edges": [
+                dict(r)
+                for r in conn.execute(
+                    "SELECT from_pokemon, to_type FROM pokemon_type_edges ORDER BY rowid"
+                )
+            ],
+            "evolution_edges": [
+                dict(r)
+                for r in conn.execute(
+                    "SELECT from_pokemon, to_pokemon FROM evolution_edges ORDER BY rowid"
+                )
+            ],
+            "mentions_edges": [
+                dict(r)
+                for r in conn.execute(
+                    "SELECT from_media_id, to_pokemon FROM mentions_edges ORDER BY rowid"
+                )
+            ],
+        }
+
+
+def find_related_pokemon_db(
+    conn: sqlite3.Connection, pokemon_name: str
+) -> Dict[str, Any]:
+    """Indexed-SELECT equivalent of find_related_pokemon."""
+    name = pokemon_name
+
+    types = [
+        r[0]
+        for r in conn.execute(
+            "SELECT to_type FROM pokemon_type_edges WHERE from_pokemon = ?", (name,)
+        )
+    ]
+    evolves_to = [
+        r[0]
+        for r in conn.execute(
+            "SELECT to_pokemon FROM evolution_edges WHERE from_pokemon = ?", (name,)
+        )
+    ]
+    evolves_from = [
+        r[0]
+        for r in conn.execute(
+            "SELECT from_pokemon FROM evolution_edges WHERE to_pokemon = ?", (name,)
+        )
+    ]
+    mentioned_in = [
+        r[0]
+        for r in conn.execute(
+            "SELECT from_media_id FROM mentions_edges WHERE to_pokemon = ?", (name,)
+        )
+    ]
+
+    return {
+        "types": types,
+        "evolves_to": evolves_to,
+        "evolves_from": evolves_from,
+        "mentioned_in": mentioned_in,
+    }
+
+
+def find_pokemon_nodes_by_name_db(
+    conn: sqlite3.Connection, query: str
+) -> List[Dict[str, Any]]:
+    tokens = sorted({t for t in re.split(r"[^a-z0-9]+", query.lower()) if t})
+    if not tokens:
+        return []
+
+    placeholders = ", ".join("?" for _ in tokens)
+    rows = conn.execute(
+        "SELECT name, generation, primary_type, secondary_type FROM pokemon_nodes "
+        f"WHERE lower(name) IN ({placeholders}) ORDER BY rowid",
+        tokens,
+    )
+    return [dict(r) for r in rows]
+
+
+# Graph nodes a question names, and the neighborhood of the first of them.
+GraphLookup = Tuple[List[Dict[str, Any]], Dict[str, Any]]
+
+
+def lookup_question(question: str) -> GraphLookup:
+    """Match question against the graph, reading graph.json / graph.db once."""
+    if GRAPH_BACKEND == "sqlite":
+        with graph_db() as conn:
+            candidates = find_pokemon_nodes_by_name_db(conn, question)
+            if not candidates:
+                return [], {}
+            return candidates, find_related_pokemon_db(conn, candidates[0]["name"])
 
     graph = load_graph()
     if not graph["pokemon_nodes"]:
         logger.warning("No Pokémon data found in graph.json")
-        return {"content": "", "node": None}
+        return [], {}
 
     candidates = find_pokemon_nodes_by_name(graph, question)
+    if not candidates:
+        return [], {}
+    return candidates, find_related_pokemon(graph, candidates[0]["name"])
+
+
+def build_graph_context(
+    question: str, lookup: Optional[GraphLookup] = None
+) -> Dict[str, Any]:
+    """Graph facts for question; pass lookup to reuse an earlier lookup_question."""
+    logger.info(f"Building graph context for question: {question}")
+
+    candidates, neighborhood = (
+        lookup if lookup is not None else lookup_question(question)
+    )
     if not candidates:
         logger.warning(f"No Pokémon found for question: {question}")
         return {"content": "", "node": None}
-
     primary = candidates[0]
-    neighborhood = find_related_pokemon(graph, primary["name"])
 
     lines: List[str] = []
 
@@ -0,0 +1,91 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+Match = Tuple[int, int, Any]  # (start, end, value)
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive multi-pattern matcher (Aho-Corasick automaton).
+
+    All keywords are compiled once into a trie with failure links, so scanning
+    a text costs O(len(text) + matches) no matter how many keywords there are.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]], word_boundaries=True):
+        self.word_boundaries = word_boundaries
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+
+        for keyword, value in keywords:
+            self._add(keyword.lower(), value)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return sum(len(out) for out in self._out)
+
+    def _add(self, keyword: str, value: Any) -> None:
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(keyword), value))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                if self._fail[nxt] == nxt:
+                    self._fail[nxt] = 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _is_boundary(self, text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else ""
+        after = text[end] if end < len(text) else ""
+        return not (before.isalnum() or after.isalnum())
+
+    def find_all(self, text: str) -> List[Match]:
+        """Every (possibly overlapping) keyword occurrence, in scan order."""
+        lowered = text.lower()
+        matches: List[Match] = []
+        state = 0
+
+        for i, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._out[state]:
+                start, end = i + 1 - length, i + 1
+                if self.word_boundaries and not self._is_boundary(lowered, start, end):
+                    continue
+                matches.append((start, end, value))
+
+        return matches
+
+    def find_longest(self, text: str) -> List[Match]:
+        """
+        Non-overlapping leftmost-longest matches: among matches starting at the
+        same position the longest keyword wins ("pidgeotto" over "pidgeot").
+        """
+        taken: List[Match] = []
+        last_end = 0
+        for match in sorted(self.find_all(text), key=lambda m: (m[0], -m[1])):
+            if match[0] >= last_end:
+                taken.append(match)
+                last_end = match[1]
+        return taken
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from ingestion.sqlite_journal import set_journal_mode
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_DB = Path(os.getenv("LLM_CACHE_PATH", "data/cache/llm_extraction.db"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    cache_key TEXT PRIMARY KEY,
+    schema_fingerprint TEXT NOT NULL,
+    media_id TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used
+    ON extraction_cache (last_used);
+"""
+
+_purged: Set[Tuple[str, str]] = set()
+
+
+def make_cache_key(
+    text: str,
+    pokemon_hint: Optional[str],
+    model: str,
+    temperature: float,
+    schema_fingerprint: str,
+) -> str:
+    payload = json.dumps(
+        [text, pokemon_hint or "", model, temperature, schema_fingerprint],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect(schema_fingerprint: str) -> sqlite3.Connection:
+    LLM_CACHE_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(LLM_CACHE_DB), timeout=30)
+    set_journal_mode(conn, LLM_CACHE_DB)
+    conn.executescript(_SCHEMA)
+
+    # Entries produced under another schema/prompt can never be hit again.
+    marker = (str(LLM_CACHE_DB), schema_fingerprint)
+    if marker not in _purged:
+        with conn:
+            deleted = conn.execute(
+                "DELETE FROM extraction_cache WHERE schema_fingerprint != ?",
+                (schema_fingerprint,),
+            ).rowcount
+        if deleted:
+            logger.info(
+                "Invalidated stale extraction cache entries",
+                extra={"deleted": deleted, "schema_fingerprint": schema_fingerprint},
+            )
+        _purged.add(marker)
+
+    return conn
+
+
+def _rebind_media_id(
+    data: Dict[str, Any], cached_media_id: str, media_id: str
+) -> Dict[str, Any]:
+    if cached_media_id == media_id:
+        return data
+    for e in data.get("mentions_edges", []):
+        if e.get("from_media_id") == cached_media_id:
+            e["from_media_id"] = media_id
+    return data
+
+
+def get_cached_extraction(
+    cache_key: str, media_id: str, schema_fingerprint: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Return a cached extraction for cache_key, or None.
+
+    The same text uploaded under another name hits the same entry; mentions
+    edges are re-pointed at the requesting media_id.
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    conn = _connect(schema_fingerprint)
+    try:
+        row = conn.execute(
+            "SELECT media_id, response FROM extraction_cache WHERE cache_key = ?",
+            (cache_key,),
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE extraction_cache SET last_used = ? WHERE cache_key = ?",
+                (time.time(), cache_key),
+            )
+    finally:
+        conn.close()
+
+    cached_media_id, response = row
+    logger.info("Extraction cache hit", extra={"media_id": media_id})
+    return _rebind_media_id(json.loads(response), cached_media_id, media_id)
+
+
+def put_cached_extraction(
+    cache_key: str,
+    media_id: str,
+    schema_fingerprint: str,
+    data: Dict[str, Any],
+) -> None:
+    if not LLM_CACHE_ENABLED:
+        return
+
+    now = time.time()
+    conn = _connect(schema_fingerprint)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO extraction_cache "
+                "(cache_key, schema_fingerprint, media_id, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET "
+                "media_id = excluded.media_id, response = excluded.response, "
+                "last_used = excluded.last_used",
+                (
+                    cache_key,
+                    schema_fingerprint,
+                    media_id,
+                    json.dumps(data, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()
+            overflow = count - LLM_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM extraction_cache WHERE cache_key IN ("
+                    "SELECT cache_key FROM extraction_cache "
+                    "ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+    finally:
+        conn.close()
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from config import DEFAULT_MODELS, EMBED_DIM, LLM_API_KEY, LLM_BASE_URL, LLM_PROVIDER
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("openai", "openai_compatible", "fake")
+
+
+def get_provider_name(stage: str) -> str:
+    provider = os.getenv(f"LLM_PROVIDER_{stage.upper()}", LLM_PROVIDER)
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider {provider!r} for stage {stage!r}")
+    return provider
+
+
+def get_model(stage: str) -> str:
+    return os.getenv(f"LLM_MODEL_{stage.upper()}", DEFAULT_MODELS[stage])
+
+
+class _LazyClient:
+    """
+    Defers client construction to first use, so importing a module that holds
+    a client does not require credentials (e.g. OPENAI_API_KEY) to be set.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._client: Optional[Any] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._client is None:
+            self._client = self._factory()
+        return getattr(self._client, name)
+
+
+def _openai_client() -> Any:
+    from openai import OpenAI
+
+    return OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+
+
+def _openai_compatible_client() -> Any:
+    from openai import OpenAI
+
+    return OpenAI(base_url=LLM_BASE_URL, api_key=LLM_API_KEY)
+
+
+def _async_openai_client() -> Any:
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
+
+
+def _async_openai_compatible_client() -> Any:
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(base_url=LLM_BASE_URL, api_key=LLM_API_KEY)
+
+
+# --- Deterministic in-process fake -------------------------------------------
+
+
+class _Obj:
+    def __init__(self, **kwargs: Any):
+        self.__dict__.update(kwargs)
+
+
+def _minimal_instance(schema: Dict[str, Any]) -> Any:
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: _minimal_instance(schema["properties"][key])
+            for key in schema.get("required", [])
+        }
+    if kind == "array":
+        return []
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "boolean":
+        return False
+    return ""
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+def fake_embedding(text: str, dim: int = EMBED_DIM) -> List[float]:
+    """Feature-hashed bag of words: identical wording gives identical vectors."""
+    vector = [0.0] * dim
+    for token in re.findall(r"\w+", text.lower()):
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] % 2 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class _FakeResponses:
+    def create(self, model: str, input: Any, **kwargs: Any) -> Any:
+        fmt = (kwargs.get("text") or {}).get("format") or {}
+        if fmt.get("type") == "json_schema":
+            text = json.dumps(_minimal_instance(fmt["schema"]))
+        else:
+            messages = input if isinstance(input, list) else [input]
+            user = [m for m in messages if m.get("role") == "user"] or messages
+            question = _content_text(user[-1].get("content", "")).strip()
+            text = f"[{model}] " + (question.splitlines() or [""])[0]
+            max_tokens = kwargs.get("max_output_tokens")
+            if max_tokens:
+                text = " ".join(text.split()[:max_tokens])
+
+        return _Obj(output=[_Obj(content=[_Obj(text=text)])], output_text=text)
+
+
+class _FakeEmbeddings:
+    def create(self, model: str, input: Any, **kwargs: Any) -> Any:
+        texts = input if isinstance(input, list) else [input]
+        return _Obj(data=[_Obj(embedding=fake_embedding(t)) for t in texts])
+
+
+class FakeLLMClient:
+    """
+    Offline stand-in for the OpenAI client surface this project uses
+    (responses.create, embeddings.create). Structured-output calls return the
+    smallest instance of the requested JSON schema; chat calls echo the first
+    line of the user message.
+    """
+
+    def __init__(self):
+        self.responses = _FakeResponses()
+        self.embeddings = _FakeEmbeddings()
+
+
+class _AsyncFakeResponses(_FakeResponses):
+    async def create(self, model: str, input: Any, **kwargs: Any) -> Any:
+        stream = kwargs.pop("stream", False)
+        response = super().create(model, input, **kwargs)
+        if stream:
+            return _FakeStream(response.output_text)
+        return response
+
+
+class _FakeStream:
+    """
+    Responses API stream: one text delta per word, then completed. Like the
+    OpenAI AsyncStream it must be closed to release its connection.
+    """
+
+    def __init__(self, text: str):
+        self.closed = False
+        self._events = self._iter_events(text)
+
+    @staticmethod
+    async def _iter_events(text: str) -> AsyncIterator[Any]:
+        for i, word in enumerate(text.split(" ")):
+            yield _Obj(
+                type="response.output_text.delta",
+                delta=word if i == 0 else f" {word}",
+            )
+        yield _Obj(type="response.completed")
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._events
+
+    async def close(self) -> None:
+        self.closed = True
+        await self._events.aclose()
+
+
+class _AsyncFakeEmbeddings(_FakeEmbeddings):
+    async def create(self, model: str, input: Any, **kwargs: Any) -> Any:
+        return super().create(model, input, **kwargs)
+
+
+class AsyncFakeLLMClient:
+    """FakeLLMClient with awaitable methods, mirroring AsyncOpenAI."""
+
+    def __init__(self):
+        self.responses = _AsyncFakeResponses()
+        self.embeddings = _AsyncFakeEmbeddings()
+
+
+def get_llm_client(stage: str) -> Any:
+    """OpenAI-style client for a stage: "extraction", "chat" or "embedding"."""
+    provider = get_provider_name(stage)
+    logger.info(
+        "Using LLM provider",
+        extra={"stage": stage, "provider": provider, "model": get_model(stage)},
+    )
+
+    if provider == "fake":
+        return FakeLLMClient()
+    if provider == "openai_compatible":
+        return _LazyClient(_openai_compatible_client)
+    return _LazyClient(_openai_client)
+
+
+def get_async_llm_client(stage: str) -> Any:
+    """AsyncOpenAI-style client for a stage, for use on the event loop."""
+    provider = get_provider_name(stage)
+    if provider == "fake":
+        return AsyncFakeLLMClient()
+    if provider == "openai_compatible":
+        return _LazyClient(_async_openai_compatible_client)
+    return _LazyClient(_async_openai_client)
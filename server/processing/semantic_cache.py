@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from ingestion import record_store
+from processing import graph_store
+
+logger = logging.getLogger(__name__)
+
+# Answers to earlier questions are reused for new questions whose embedding
+# has at least SEMANTIC_CACHE_THRESHOLD cosine similarity and that are about
+# the same entities, as long as the graph and the indexed corpus have not
+# changed since.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") != "0"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+
+# SimHash LSH: 64 random-hyperplane bits in 8 bands of 8. Two questions at
+# cosine 0.92 share at least one band with probability ~0.96; unrelated ones
+# rarely do, and every candidate is re-ranked by exact cosine.
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+
+@lru_cache(maxsize=4)
+def _hyperplanes(dim: int) -> np.ndarray:
+    return np.random.RandomState(7).standard_normal((SIMHASH_BITS, dim))
+
+
+def band_keys(vector: np.ndarray) -> List[int]:
+    bits = (_hyperplanes(vector.shape[0]) @ vector) > 0
+    weights = 1 << np.arange(_BAND_BITS)
+    return [int(band @ weights) for band in bits.reshape(SIMHASH_BANDS, _BAND_BITS)]
+
+
+def _file_version(path: Path) -> Tuple:
+    """Size and mtime of a file and its SQLite WAL; changes on every write."""
+    version = []
+    for candidate in (path, path.with_name(path.name + "-wal")):
+        try:
+            stat = candidate.stat()
+        except FileNotFoundError:
+            version.append(None)
+            continue
+        version.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+def data_version() -> Tuple:
+    """Version key of what answers are built from: the graph and the corpus."""
+    graph_path = (
+        graph_store.GRAPH_DB
+        if graph_store.GRAPH_BACKEND == "sqlite"
+        else graph_store.GRAPH_JSON
+    )
+    # Every ingestion writes the record store alongside the vector upserts.
+    return _file_version(graph_path), _file_version(record_store.RECORD_DB)
+
+
+class _Entry:
+    __slots__ = ("vector", "keys", "version", "key", "value", "created_at")
+
+    def __init__(self, vector, keys, version, key, value, created_at):
+        self.vector = vector
+        self.keys = keys
+        self.version = version
+        self.key = key
+        self.value = value
+        self.created_at = created_at
+
+
+class SemanticCache:
+    """
+    In-memory answer cache keyed by question embeddings.
+
+    Lookups hash the query with SimHash and only compare against entries in
+    the same LSH buckets, and only return an entry stored under an equal
+    key: near-identical questions about different entities ("what type is
+    Ivysaur" / "... Venusaur") embed above the threshold but must not share
+    an answer. Entries expire after ttl_seconds, are dropped when their
+    version no longer matches, and the least recently used entry is evicted
+    beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+    ):
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._counts = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for band, key in enumerate(entry.keys):
+            bucket = self._buckets[(band, key)]
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[(band, key)]
+
+    def lookup(
+        self,
+        vector: Sequence[float],
+        version: Any,
+        key: Any = None,
+        now: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached value of the most similar question at or above threshold with
+        the same key, as {"value", "similarity"}, or None.
+        """
+        now = time.time() if now is None else now
+        query = _unit(vector)
+        keys = band_keys(query)
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, bucket in enumerate(keys):
+                candidates |= self._buckets.get((band, bucket), set())
+
+            best: Optional[Tuple[int, float]] = None
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl_seconds:
+                    self._remove(entry_id)
+                    self._counts["expirations"] += 1
+                    continue
+                if entry.version != version:
+                    self._remove(entry_id)
+                    self._counts["invalidations"] += 1
+                    continue
+                if entry.key != key:
+                    continue
+                similarity = float(entry.vector @ query)
+                if similarity >= self.threshold and (
+                    best is None or similarity > best[1]
+                ):
+                    best = (entry_id, similarity)
+
+            if best is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(best[0])
+            self._counts["hits"] += 1
+            return {"value": self._entries[best[0]].value, "similarity": best[1]}
+
+    def store(
+        self,
+        vector: Sequence[float],
+        version: Any,
+        value: Any,
+        key: Any = None,
+        now: Optional[float] = None,
+    ) -> None:
+        now = time.time() if now is None else now
+        unit = _unit(vector)
+        keys = band_keys(unit)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(unit, keys, version, key, value, now)
+            for band, bucket in enumerate(keys):
+                self._buckets[(band, bucket)].add(entry_id)
+            self._counts["stores"] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._counts["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "lookups": lookups,
+                "hit_rate": (
+                    round(self._counts["hits"] / lookups, 4) if lookups else 0.0
+                ),
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float64)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
@@ -0,0 +1,69 @@
+import logging
+from functools import lru_cache
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio used when the tiktoken encoding is unavailable
+# (it is downloaded on first use, which fails on offline nodes).
+APPROX_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> Optional[Any]:
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        logger.warning(
+            "tiktoken encoding unavailable, approximating token counts",
+            extra={"model": model},
+        )
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // APPROX_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_into_windows(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    model: str = "gpt-4o-mini",
+) -> List[str]:
+    """
+    Split text into consecutive windows of at most max_tokens tokens.
+
+    Consecutive windows share overlap_tokens tokens so that a sentence cut at a
+    boundary is still seen whole by one of them.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    step = max(1, max_tokens - max(0, overlap_tokens))
+
+    encoding = _get_encoding(model)
+    if encoding is None:
+        size = max_tokens * APPROX_CHARS_PER_TOKEN
+        stride = step * APPROX_CHARS_PER_TOKEN
+        if len(text) <= size:
+            return [text]
+        return [
+            text[start : start + size]
+            for start in range(0, len(text) - size + stride, stride)
+        ]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return [text]
+    return [
+        encoding.decode(tokens[start : start + max_tokens])
+        for start in range(0, len(tokens) - max_tokens + step, step)
+    ]
@@ -1,10 +1,12 @@
 import os
+import uuid
 from typing import Any, Dict, List, Optional
 
-from config import get_qdrant_client
+from config import get_async_qdrant_client, get_qdrant_client
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as qm
 
-from processing.embeddings import embed_text
+from processing.embeddings import embed_text, embed_text_async
 
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "pokemon_corpus")
@@ -14,6 +16,15 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# The async client is shared by every request of a process, so searches reuse
+# its connection pool. The API opens it on startup and closes it on shutdown.
+_async_client: Optional[AsyncQdrantClient] = None
+_async_collection_ready = False
+
+
+def _vectors_config() -> qm.VectorParams:
+    return qm.VectorParams(size=EMBED_DIM, distance=qm.Distance.COSINE)
+
 
 def ensure_collection() -> None:
     client = get_qdrant_client()
@@ -21,22 +32,55 @@ def ensure_collection() -> None:
         return
     client.recreate_collection(
         collection_name=COLLECTION_NAME,
-        vectors_config=qm.VectorParams(
-            size=EMBED_DIM,
-            distance=qm.Distance.COSINE,
-        ),
+        vectors_config=_vectors_config(),
     )
 
 
+def open_async_client() -> AsyncQdrantClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = get_async_qdrant_client()
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client, _async_collection_ready
+    client, _async_client = _async_client, None
+    _async_collection_ready = False
+    if client is not None:
+        await client.close()
+
+
+async def _ready_async_client() -> AsyncQdrantClient:
+    """The shared async client, with the collection checked once per client."""
+    global _async_collection_ready
+    client = open_async_client()
+    if not _async_collection_ready:
+        if not await client.collection_exists(COLLECTION_NAME):
+            await client.create_collection(
+                collection_name=COLLECTION_NAME,
+                vectors_config=_vectors_config(),
+            )
+        _async_collection_ready = True
+    return client
+
+
+def point_id(doc_id: str) -> str:
+    """
+    Stable Qdrant point id for a document, so re-ingesting a file overwrites
+    its point instead of adding a new one (hash() is salted per process).
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{COLLECTION_NAME}/{doc_id}"))
+
+
 def upsert_document(doc_id: str, vector: List[float], metadata: Dict[str, Any]) -> None:
     ensure_collection()
     client = get_qdrant_client()
-    numeric_id = abs(hash(doc_id))
     client.upsert(
         collection_name=COLLECTION_NAME,
         points=[
             qm.PointStruct(
-                id=numeric_id,
+                id=point_id(doc_id),
                 vector=vector,
                 payload=metadata,
             )
@@ -44,6 +88,27 @@ def upsert_document(doc_id: str, vector: List[float], metadata: Dict[str, Any])
     )
 
 
+def delete_documents(doc_ids: List[str]) -> None:
+    if not doc_ids:
+        return
+    ensure_collection()
+    client = get_qdrant_client()
+    # Matching on the media_id payload as well also removes points written
+    # under the old abs(hash(doc_id)) ids, which point_id cannot reproduce.
+    client.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=qm.FilterSelector(
+            filter=qm.Filter(
+                should=[
+                    qm.HasIdCondition(has_id=[point_id(d) for d in doc_ids]),
+                    qm.FieldCondition(key="media_id", match=qm.MatchAny(any=doc_ids)),
+                ]
+            )
+        ),
+    )
+    logger.info("delete_documents finished", extra={"count": len(doc_ids)})
+
+
 def search_similar(
     query_vector: List[float],
     limit: int = 5,
@@ -51,13 +116,17 @@ def search_similar(
 ) -> List[Dict[str, Any]]:
     ensure_collection()
     client = get_qdrant_client()
-    results = client.search(
+    results = client.query_points(
         collection_name=COLLECTION_NAME,
-        query_vector=query_vector,
+        query=query_vector,
         with_payload=True,
         limit=limit,
         query_filter=filters,
-    )
+    ).points
+    return _hits(results)
+
+
+def _hits(results: List[Any]) -> List[Dict[str, Any]]:
     return [
         {
             "id": r.id,
@@ -68,6 +137,22 @@ def search_similar(
     ]
 
 
+async def search_similar_async(
+    query_vector: List[float],
+    limit: int = 5,
+    filters: Optional[qm.Filter] = None,
+) -> List[Dict[str, Any]]:
+    client = await _ready_async_client()
+    response = await client.query_points(
+        collection_name=COLLECTION_NAME,
+        query=query_vector,
+        with_payload=True,
+        limit=limit,
+        query_filter=filters,
+    )
+    return _hits(response.points)
+
+
 def build_vector_context(message: str) -> Dict[str, Any]:
     vector_context_snippets = []
 
@@ -86,3 +171,36 @@ def build_vector_context(message: str) -> Dict[str, Any]:
     vector_context_str = "\n\n".join(vector_context_snippets)
 
     return {"context": vector_context_str}
+
+
+async def build_vector_context_async(
+    message: str, query_vector: Optional[List[float]] = None
+) -> Dict[str, Any]:
+    """
+    build_vector_context on the event loop (async embedding and Qdrant).
+    Also returns the matched documents under "sources". query_vector skips
+    embedding message when the caller already has it.
+    """
+    vector_context_snippets = []
+    sources = []
+
+    try:
+        q_vec = query_vector or await embed_text_async(message)
+        hits = await search_similar_async(q_vec, limit=3)
+
+        for h in hits:
+            payload = h["payload"] or {}
+            sources.append(
+                {
+                    "media_id": payload.get("media_id"),
+                    "source_path": payload.get("source_path"),
+                    "score": h["score"],
+                }
+            )
+            snippet = payload.get("text") or ""
+            if snippet:
+                vector_context_snippets.append(snippet)
+    except Exception:
+        logger.warning("Vector retrieval failed", exc_info=True)
+
+    return {"context": "\n\n".join(vector_context_snippets), "sources": sources}
@@ -0,0 +1,101 @@
+"""
+Benchmark image OCR on data/raw/images: raw Tesseract vs the preprocessed
+(and, for large images, tiled) path used by ingestion.
+
+For each image, reports seconds, chars/sec and the character error rate
+against the <stem>.gt.txt ground-truth file next to it. The run fails and
+names the images without one; --name-check instead reports whether the
+Pokémon resolved from the file name appears in the OCR text.
+
+    python -m scripts.benchmark_ocr [--name-check] [image_dir]
+"""
+
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytesseract
+from ingestion import ocr
+from PIL import Image
+from scripts.benchmarking import error_rate, format_table, load_references
+from scripts.ingest_images_corpus import RAW_IMAGE_DIR, resolve_metadata
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+SUFFIXES = {".png", ".jpg", ".jpeg"}
+
+
+def _raw_ocr(image: Image.Image) -> str:
+    return pytesseract.image_to_string(image).strip()
+
+
+def _pipeline_ocr(image: Image.Image) -> str:
+    return ocr.ocr_image(image)
+
+
+MODES = {"raw": _raw_ocr, "preprocessed": _pipeline_ocr}
+
+
+def _accuracy(path: Path, text: str, truth: Optional[str]) -> Dict[str, Any]:
+    if truth is not None:
+        truth = " ".join(truth.split())
+        return {"cer": round(error_rate(truth, " ".join(text.split())), 3)}
+    try:
+        pokemon, _generation, _types = resolve_metadata(path)
+    except ValueError:
+        return {}
+    return {"name_found": pokemon.lower() in text.lower()}
+
+
+def benchmark(
+    image_dir: Path = RAW_IMAGE_DIR, name_check: bool = False
+) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    paths = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in SUFFIXES)
+    truths: Dict[Path, Optional[str]] = (
+        dict.fromkeys(paths) if name_check else dict(load_references(paths, ".gt.txt"))
+    )
+
+    for path in paths:
+        with Image.open(path) as image:
+            image.load()
+            for mode, run in MODES.items():
+                started = time.perf_counter()
+                text = run(image.copy())
+                seconds = time.perf_counter() - started
+                rows.append(
+                    {
+                        "image": path.name,
+                        "mode": mode,
+                        "size": f"{image.width}x{image.height}",
+                        "seconds": round(seconds, 3),
+                        "chars": len(text),
+                        "chars_per_sec": round(len(text) / seconds, 1),
+                        **_accuracy(path, text, truths[path]),
+                    }
+                )
+    return rows
+
+
+def main() -> List[Dict[str, Any]]:
+    args = [a for a in sys.argv[1:] if a != "--name-check"]
+    image_dir = Path(args[0]) if args else RAW_IMAGE_DIR
+    logger.info(
+        "Benchmarking OCR",
+        extra={"dir": str(image_dir), "config": ocr.TESSERACT_CONFIG},
+    )
+    rows = benchmark(image_dir, name_check="--name-check" in sys.argv[1:])
+
+    columns = ["image", "mode", "size", "seconds", "chars", "chars_per_sec"]
+    columns += [c for c in ("cer", "name_found") if any(c in r for r in rows)]
+    print(format_table(rows, columns))
+    print(json.dumps(rows, indent=2))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark Whisper backends on data/raw/audio: real-time factor (RTF,
+transcription seconds / audio seconds; below 1 is faster than real time)
+and word error rate against <stem>.ref.txt reference transcripts.
+
+Clips go through the ingest path: a TranscriptionPool per backend splits
+them on silence, transcribes the segments on its warm workers and stitches
+the text. load_s is the time to start the workers and load their models.
+
+Each argument is a MODEL:QUANTIZE pair; the default compares tiny, base
+and small, each in full precision and int8:
+
+    python -m scripts.benchmark_whisper small:none small:int8
+
+Every clip needs a reference transcript next to it; the run fails and
+names the missing ones otherwise. The sample clips ship without one, so
+until they are transcribed --rtf-only measures speed alone.
+"""
+
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ingestion.transcription import SAMPLE_RATE, WHISPER_THREADS, TranscriptionPool
+from scripts.benchmarking import (
+    error_rate,
+    format_table,
+    load_references,
+    normalize_words,
+)
+from scripts.ingest_audio_corpus import RAW_AUDIO_DIR
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_CONFIGS = [
+    (model, quantize)
+    for model in ("tiny", "base", "small")
+    for quantize in ("none", "int8")
+]
+
+
+def _parse_configs(args: List[str]) -> List[Tuple[str, str]]:
+    if not args:
+        return DEFAULT_CONFIGS
+    configs = []
+    for arg in args:
+        model, _, quantize = arg.partition(":")
+        configs.append((model, quantize or "none"))
+    return configs
+
+
+def benchmark(
+    configs: List[Tuple[str, str]],
+    audio_dir: Path = RAW_AUDIO_DIR,
+    wer: bool = True,
+) -> List[Dict[str, Any]]:
+    import whisper
+
+    paths = sorted(audio_dir.glob("*.mp3"))
+    references: Dict[Path, Optional[str]] = (
+        dict(load_references(paths, ".ref.txt")) if wer else dict.fromkeys(paths)
+    )
+    clips = [
+        (path, whisper.load_audio(str(path), sr=SAMPLE_RATE), references[path])
+        for path in paths
+    ]
+
+    rows: List[Dict[str, Any]] = []
+    for model_name, quantize in configs:
+        pool = TranscriptionPool(model_name=model_name, quantize=quantize)
+        audio_seconds = transcribe_seconds = 0.0
+        errors: List[float] = []
+        try:
+            started = time.perf_counter()
+            pool.warm_up()
+            load_seconds = time.perf_counter() - started
+
+            for path, audio, reference in clips:
+                started = time.perf_counter()
+                text = pool.transcribe_array(audio)
+                transcribe_seconds += time.perf_counter() - started
+                audio_seconds += len(audio) / SAMPLE_RATE
+                if reference is not None:
+                    errors.append(
+                        error_rate(normalize_words(reference), normalize_words(text))
+                    )
+        finally:
+            pool.shutdown()
+
+        rows.append(
+            {
+                "model": model_name,
+                "quantize": quantize,
+                "workers": pool.workers,
+                "threads": WHISPER_THREADS,
+                "load_s": round(load_seconds, 2),
+                "audio_s": round(audio_seconds, 1),
+                "rtf": (
+                    round(transcribe_seconds / audio_seconds, 3)
+                    if audio_seconds
+                    else None
+                ),
+                "wer": round(sum(errors) / len(errors), 3) if errors else None,
+            }
+        )
+        logger.info("Benchmarked %s", rows[-1])
+    return rows
+
+
+def main() -> List[Dict[str, Any]]:
+    args = sys.argv[1:]
+    wer = "--rtf-only" not in args
+    rows = benchmark(_parse_configs([a for a in args if a != "--rtf-only"]), wer=wer)
+    columns = ["model", "quantize", "workers", "threads", "load_s", "audio_s", "rtf"]
+    columns += ["wer"] if wer else []
+    print(format_table(rows, columns))
+    print(json.dumps(rows, indent=2))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+
+def edit_distance(a: Sequence, b: Sequence) -> int:
+    """Levenshtein distance between two sequences (characters or words)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, item_a in enumerate(a, start=1):
+        current = [i]
+        for j, item_b in enumerate(b, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (item_a != item_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def error_rate(reference: Sequence, hypothesis: Sequence) -> float:
+    """Edit distance normalised by reference length (CER on str, WER on lists)."""
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    return edit_distance(reference, hypothesis) / len(reference)
+
+
+def normalize_words(text: str) -> List[str]:
+    return "".join(c.lower() if c.isalnum() else " " for c in text).split()
+
+
+def format_table(rows: List[Dict[str, object]], columns: List[str]) -> str:
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    lines = ["  ".join(c.ljust(widths[c]) for c in columns)]
+    lines.append("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        lines.append("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
+    return "\n".join(lines)
+
+
+def load_references(paths: Sequence[Path], suffix: str) -> Dict[Path, str]:
+    """
+    The reference text of each path, read from the file next to it with
+    suffix in place of its own ("clip.mp3" -> "clip.ref.txt"). Raises
+    FileNotFoundError naming every missing file, so an accuracy column is
+    never computed over a silent subset of the inputs.
+    """
+    if not paths:
+        raise FileNotFoundError("No inputs to benchmark")
+    missing = [
+        p.with_suffix(suffix) for p in paths if not p.with_suffix(suffix).exists()
+    ]
+    if missing:
+        raise FileNotFoundError(
+            f"Missing {len(missing)} of {len(paths)} reference files: "
+            + ", ".join(str(m) for m in missing)
+        )
+    return {p: p.with_suffix(suffix).read_text(encoding="utf-8") for p in paths}
@@ -0,0 +1,209 @@
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import scripts.ingest as ingest
+from ingestion import checkpoint, record_store, transcription, work_queue
+from ingestion.pipeline import set_cpu_budget
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+
+_MB = 1024 * 1024
+
+# Every worker process transcribes on a Whisper pool of its own with a
+# single model-holding process, so the default number of worker processes
+# is bounded by memory (DISTRIBUTED_WORKER_MEMORY_MB each) as well as by
+# CPUs. All workers run on the host that holds the queue and the stores:
+# the SQLite files are not safe to share between hosts.
+DISTRIBUTED_WORKER_MEMORY_MB = int(os.getenv("DISTRIBUTED_WORKER_MEMORY_MB", "2048"))
+
+
+def default_worker_processes() -> int:
+    cpus = os.cpu_count() or 1
+    try:
+        memory_mb = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // _MB
+    except (AttributeError, OSError, ValueError):
+        return cpus
+    return max(1, min(cpus, memory_mb // max(1, DISTRIBUTED_WORKER_MEMORY_MB)))
+
+
+DISTRIBUTED_WORKER_PROCESSES = (
+    int(os.getenv("DISTRIBUTED_WORKER_PROCESSES", "0")) or default_worker_processes()
+)
+DISTRIBUTED_IDLE_SECONDS = float(os.getenv("DISTRIBUTED_IDLE_SECONDS", "5"))
+
+
+def coordinate(queue=None) -> Dict[str, Any]:
+    """Enqueue new and changed raw files; tombstone deleted ones."""
+    queue = queue or work_queue.make_work_queue()
+    record_store.migrate_legacy_jsonl()
+    ingest.migrate_record_ids()
+    checkpoint.purge_written()
+
+    jobs, plan = ingest.plan_jobs()
+    ingest.tombstone(plan["deleted"])
+    queued = queue.enqueue(
+        (
+            job["path"],
+            {
+                "path": job["path"],
+                "modality": job["modality"],
+                "content_hash": job["content_hash"],
+                "file_state": job["file_state"],
+            },
+            job["content_hash"],
+        )
+        for job in jobs
+    )
+
+    summary = {
+        "planned": len(jobs),
+        "queued": queued,
+        "unchanged": plan["unchanged"],
+        "deleted": len(plan["deleted"]),
+        "queue": queue.stats(),
+    }
+    logger.info("Work queue updated: %s", summary)
+    return summary
+
+
+def ingest_item(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one file through every ingest stage and write its record.
+
+    Every write is keyed (record id, vector point id, manifest path), so a
+    file processed twice after an expired lease ends up written once; the
+    write-ahead log lets the retry skip stages that already completed.
+    """
+    job = dict(job)
+    entry = checkpoint.load_checkpoints([job]).get(job["path"])
+    if entry is not None:
+        job["checkpoint"] = entry
+
+    record = ingest.extract_record(job)
+    record = ingest.transcribe_record(record)
+    record = ingest.dedupe_record(record)
+    record = ingest.index_record(record)
+    record_store.upsert_records([record])
+    ingest.mark_written([record], {job["path"]: job.get("file_state")})
+    return record
+
+
+def _keep_lease(
+    queue, item: Dict[str, Any], visibility_seconds: float, done: threading.Event
+) -> None:
+    while not done.wait(visibility_seconds / 3):
+        if not queue.extend(item["key"], item["lease_id"], visibility_seconds):
+            logger.warning("Lost lease", extra={"key": item["key"]})
+            return
+
+
+def run_worker(
+    queue=None,
+    worker_id: Optional[str] = None,
+    visibility_seconds: float = work_queue.WORK_QUEUE_VISIBILITY_SECONDS,
+    exit_when_drained: bool = False,
+) -> Dict[str, int]:
+    """
+    Lease and ingest items until stopped, or until nothing is pending or
+    leased when exit_when_drained is set. The lease is extended while an
+    item is being processed, so long transcriptions do not expire.
+    """
+    queue = queue or work_queue.make_work_queue()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    summary = {"processed": 0, "failed": 0}
+
+    while True:
+        item = queue.lease(worker_id, visibility_seconds)
+        if item is None:
+            stats = queue.stats()
+            if exit_when_drained and not stats["pending"] and not stats["leased"]:
+                break
+            time.sleep(DISTRIBUTED_IDLE_SECONDS)
+            continue
+
+        done = threading.Event()
+        keeper = threading.Thread(
+            target=_keep_lease,
+            args=(queue, item, visibility_seconds, done),
+            daemon=True,
+        )
+        keeper.start()
+        try:
+            ingest_item(item["payload"])
+        except Exception as e:
+            logger.exception(
+                "Failed to ingest queued file",
+                extra={"key": item["key"], "attempt": item["attempts"]},
+            )
+            queue.fail(item["key"], item["lease_id"], str(e))
+            summary["failed"] += 1
+        else:
+            queue.complete(item["key"], item["lease_id"])
+            summary["processed"] += 1
+        finally:
+            done.set()
+            keeper.join()
+
+    logger.info("Worker finished", extra={"worker": worker_id, **summary})
+    return summary
+
+
+def _worker_process(exit_when_drained: bool, cpus: int) -> None:
+    # One transcription process per worker, with this worker's share of the
+    # CPUs, instead of a WHISPER_WORKERS-sized pool in every worker.
+    transcription.configure_pool(workers=1, threads=cpus)
+    # PDF page pools and OCR tiles stay within the same share.
+    set_cpu_budget(cpus)
+    run_worker(exit_when_drained=exit_when_drained)
+
+
+def work(
+    processes: int = DISTRIBUTED_WORKER_PROCESSES, exit_when_drained: bool = False
+) -> None:
+    """Run `processes` worker processes on this host."""
+    processes = max(1, processes)
+    cpus = max(1, (os.cpu_count() or 1) // processes)
+    procs = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(exit_when_drained, cpus),
+            name=f"ingest-{i}",
+        )
+        for i in range(processes)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+
+def main() -> Optional[Dict[str, Any]]:
+    """
+    python -m scripts.distributed_ingest coordinator | worker [--drain] | status
+    """
+    mode = sys.argv[1] if len(sys.argv) > 1 else ""
+    if mode == "coordinator":
+        return coordinate()
+    if mode == "worker":
+        work(exit_when_drained="--drain" in sys.argv[2:])
+        return None
+    if mode == "status":
+        stats = work_queue.make_work_queue().stats()
+        print(json.dumps(stats))
+        return stats
+    raise SystemExit(main.__doc__.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,32 @@
 import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
 
-from scripts.ingest_audio_corpus import main as ingest_audio_data
-from scripts.ingest_images_corpus import main as ingest_images_data
-from scripts.ingest_text_corpus import main as ingest_text_data
+from ingestion import checkpoint, dedupe, manifest, record_store
+from ingestion.audio_ingestion import (
+    build_audio_record,
+    extract_text_from_audio,
+)
+from ingestion.image_ingestion import (
+    build_image_record,
+    extract_text_from_image,
+)
+from ingestion.metadata import resolve_metadata
+from ingestion.pipeline import Stage, StagedPipeline
+from ingestion.text_ingestion import (
+    build_text_record,
+    extract_pdf_pages,
+    join_pages,
+)
+from ingestion.transcription import WHISPER_WORKERS
+from jobs import store as job_store
+from processing import graph_store
+from processing.embeddings import embed_text
+from processing.vector_store import delete_documents, upsert_document
+from scripts.ingest_audio_corpus import RAW_AUDIO_DIR
+from scripts.ingest_images_corpus import RAW_IMAGE_DIR
+from scripts.ingest_text_corpus import RAW_TEXT_DIR
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -10,16 +34,293 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
 )
 
+# CPU-bound extraction (PDF parsing, Tesseract) runs in a process pool; audio
+# goes to the warm Whisper worker pool; embedding and Qdrant upserts are
+# network-bound and run on threads.
+INGEST_EXTRACT_WORKERS = int(
+    os.getenv("INGEST_EXTRACT_WORKERS", str(os.cpu_count() or 1))
+)
+INGEST_INDEX_WORKERS = int(os.getenv("INGEST_INDEX_WORKERS", "8"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "16"))
+
+CORPORA = [
+    ("text", RAW_TEXT_DIR, {".pdf", ".txt"}),
+    ("image", RAW_IMAGE_DIR, {".png", ".jpg"}),
+    ("audio", RAW_AUDIO_DIR, {".mp3"}),
+]
+
+
+def iter_jobs() -> Iterator[Dict[str, Any]]:
+    for modality, raw_dir, suffixes in CORPORA:
+        if not raw_dir.exists():
+            logger.warning("Raw directory %s does not exist", raw_dir)
+            continue
+        for path in sorted(raw_dir.iterdir()):
+            if path.is_file() and path.suffix.lower() in suffixes:
+                yield {"path": str(path), "modality": modality}
+
+
+def plan_jobs() -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compare the raw directories with the manifest.
+
+    Returns the jobs for new or changed files, plus the bookkeeping main()
+    needs: unchanged-file count and manifest entries whose source file was
+    deleted. Jobs an earlier, interrupted run got partway through carry
+    their write-ahead log entry under "checkpoint".
+    """
+    jobs: List[Dict[str, Any]] = []
+    plan: Dict[str, Any] = {"unchanged": 0, "deleted": [], "resumed": 0}
+
+    with manifest.manifest_db() as conn:
+        for job in iter_jobs():
+            path = Path(job["path"])
+            state = manifest.check_file(conn, path)
+            if state is None:
+                plan["unchanged"] += 1
+                continue
+            jobs.append(
+                {**job, "content_hash": state["content_hash"], "file_state": state}
+            )
+
+        plan["deleted"] = manifest.missing_entries(conn)
+
+    checkpoints = checkpoint.load_checkpoints(jobs)
+    for job in jobs:
+        if job["path"] in checkpoints:
+            job["checkpoint"] = checkpoints[job["path"]]
+            plan["resumed"] += 1
+
+    return jobs, plan
+
+
+def tombstone(entries: List[Dict[str, Any]]) -> None:
+    """Remove deleted files from the record store, vector store and graph."""
+    if not entries:
+        return
+
+    record_ids = [e["record_id"] for e in entries]
+    record_store.delete_records(record_ids)
+    delete_documents(record_ids)
+    graph_store.remove_media(record_ids)
+
+    # Duplicates of a deleted canonical record lost their indexed copy; forget
+    # them too so the next run re-ingests them and promotes a new canonical.
+    orphans = dedupe.forget(record_ids)
+    orphan_paths = [
+        r["source_path"] for r in record_store.get_records(orphans).values()
+    ]
+
+    with manifest.manifest_db() as conn:
+        manifest.forget(conn, [e["path"] for e in entries] + orphan_paths)
+    checkpoint.clear(e["path"] for e in entries)
+    logger.info(
+        "Tombstoned %d deleted files (%d orphaned duplicates)",
+        len(entries),
+        len(orphans),
+    )
+
+
+def migrate_record_ids() -> int:
+    """
+    Tombstone records keyed by bare file stems, which collided across files
+    ("bulbasaur" for both bulbasaur.txt and bulbasaur.jpg). Their files are
+    then planned as new and re-ingested under make_record_id ids; the media
+    and LLM caches keep the re-extraction cheap.
+    """
+    with manifest.manifest_db() as conn:
+        entries = manifest.legacy_entries(conn)
+    known = {e["record_id"] for e in entries}
+    entries += [
+        {"record_id": r["id"], "path": r["source_path"] or ""}
+        for r in record_store.legacy_records()
+        if r["id"] not in known
+    ]
+    # Logged stages of an interrupted run refer to the old ids too.
+    checkpoint.clear(checkpoint.legacy_paths())
+    if entries:
+        logger.info("Migrating %d records to modality-qualified ids", len(entries))
+        tombstone(entries)
+    return len(entries)
+
+
+def extract_record(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract stage: resolve metadata and turn one raw file into a record."""
+    entry = job.get("checkpoint")
+    if checkpoint.reached(entry, checkpoint.EXTRACTED) and entry["record"]:
+        record = dict(entry["record"])
+    else:
+        record = _extract_record(job)
+    record["content_hash"] = job.get("content_hash")
+    if entry is not None:
+        # Travels with the record so later stages can skip completed work;
+        # popped by index_record before the record is written.
+        record["_checkpoint"] = {"stage": entry["stage"], "vector": entry["vector"]}
+    return record
+
+
+def _extract_record(job: Dict[str, Any]) -> Dict[str, Any]:
+    path = Path(job["path"])
+    modality = job["modality"]
+    content_hash = job.get("content_hash")
 
-def main():
+    if modality == "text":
+        pokemon, generation, types = resolve_metadata(path)
+        if path.suffix.lower() == ".pdf":
+            text, pages = join_pages(extract_pdf_pages(str(path), content_hash))
+            return build_text_record(path, text, pokemon, generation, types, pages)
+        text = path.read_text(encoding="utf-8").strip()
+        return build_text_record(path, text, pokemon, generation, types)
+
+    if modality == "image":
+        pokemon, generation, types = resolve_metadata(path)
+        text = extract_text_from_image(str(path), content_hash)
+        return build_image_record(path, text, pokemon, generation, types)
+
+    if modality == "audio":
+        # Transcribed by the next stage on the shared Whisper worker pool, so
+        # extract workers never load a model of their own.
+        pokemon, generation, types = resolve_metadata(path)
+        record = build_audio_record(path, "", pokemon, generation, types)
+        record["pending_transcription"] = True
+        return record
+
+    raise ValueError(f"Unknown modality: {modality}")
+
+
+def transcribe_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcribe stage: fill in audio transcripts; other records pass through."""
+    if record.pop("pending_transcription", False):
+        record["text"] = extract_text_from_audio(
+            record["source_path"], content_hash=record.get("content_hash")
+        )
+    if "_checkpoint" not in record:
+        checkpoint.record_stage(
+            record["source_path"],
+            record.get("content_hash"),
+            checkpoint.EXTRACTED,
+            record=record,
+        )
+    return record
+
+
+def dedupe_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Dedupe stage: link near-duplicate texts to their canonical record."""
+    dedupe.link_duplicate(record)
+    return record
+
+
+def index_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Index stage: embed the record text and upsert it into the vector store."""
+    entry = record.pop("_checkpoint", None)
+    if record.get("duplicate_of"):
+        # Searches find the canonical record; drop any point this record got
+        # while it was canonical itself.
+        delete_documents([record["id"]])
+        return record
+
+    if checkpoint.reached(entry, checkpoint.UPSERTED):
+        return record
+
+    path, content_hash = record["source_path"], record.get("content_hash")
+    if checkpoint.reached(entry, checkpoint.EMBEDDED) and entry["vector"]:
+        vector = entry["vector"]
+    else:
+        vector = embed_text(record["text"])
+        checkpoint.record_stage(path, content_hash, checkpoint.EMBEDDED, vector=vector)
+
+    metadata = {
+        "media_id": record["id"],
+        "media_type": "text",
+        "pokemon": record.get("pokemon"),
+        "source_path": path,
+    }
+    upsert_document(doc_id=record["id"], vector=vector, metadata=metadata)
+    checkpoint.record_stage(path, content_hash, checkpoint.UPSERTED)
+    return record
+
+
+def mark_written(
+    records: List[Dict[str, Any]],
+    file_states: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> None:
+    """
+    Mark source files as ingested once their records are committed, with the
+    file state captured when each job was planned (by source path).
+    """
+    file_states = file_states or {}
+    for record in records:
+        manifest.mark_ingested(
+            Path(record["source_path"]),
+            record["modality"],
+            record["id"],
+            content_hash=record.get("content_hash"),
+            state=file_states.get(record["source_path"]),
+        )
+        checkpoint.record_stage(
+            record["source_path"], record.get("content_hash"), checkpoint.WRITTEN
+        )
+
+
+def build_pipeline(writer: record_store.RecordWriter) -> StagedPipeline:
+    return StagedPipeline(
+        [
+            Stage("extract", extract_record, INGEST_EXTRACT_WORKERS, kind="process"),
+            Stage("transcribe", transcribe_record, WHISPER_WORKERS, kind="thread"),
+            # One worker: deciding which of two near-duplicates is canonical
+            # must not race.
+            Stage("dedupe", dedupe_record, 1, kind="thread"),
+            Stage("index", index_record, INGEST_INDEX_WORKERS, kind="thread"),
+            # Records are upserted in batched transactions by the writer.
+            Stage("write", writer.add, 1, kind="thread"),
+        ],
+        queue_size=INGEST_QUEUE_SIZE,
+    )
+
+
+def main() -> Dict[str, Any]:
     logger.info("Starting ingestion process...")
-    logger.info("Ingesting text data...")
-    ingest_text_data()
-    logger.info("Ingesting image data...")
-    ingest_images_data()
-    logger.info("Ingesting audio data...")
-    ingest_audio_data()
+    record_store.migrate_legacy_jsonl()
+    migrate_record_ids()
+    jobs, plan = plan_jobs()
+    logger.info(
+        "Ingestion plan: %d new or changed (%d resumed), %d unchanged, %d deleted",
+        len(jobs),
+        plan["resumed"],
+        plan["unchanged"],
+        len(plan["deleted"]),
+    )
+
+    tombstone(plan["deleted"])
+
+    written = [0]
+    file_states = {job["path"]: job["file_state"] for job in jobs}
+
+    def on_commit(records: List[Dict[str, Any]]) -> None:
+        mark_written(records, file_states)
+        written[0] += len(records)
+        job_store.report_progress(
+            written[0] / len(jobs), f"{written[0]}/{len(jobs)} files ingested"
+        )
+
+    # Changed files overwrite their record and vector point in place: both are
+    # keyed by the record id.
+    with record_store.RecordWriter(on_commit=on_commit) as writer:
+        pipeline = build_pipeline(writer)
+        summary = pipeline.run(jobs)
+    checkpoint.purge_written()
+    summary["unchanged"] = plan["unchanged"]
+    summary["deleted"] = len(plan["deleted"])
+    summary["resumed"] = plan["resumed"]
+
+    if pipeline.errors:
+        raise RuntimeError(
+            f"Ingestion finished with {len(pipeline.errors)} failed items: "
+            + "; ".join(f"{e['stage']}: {e['error']}" for e in pipeline.errors[:5])
+        )
+
     logger.info("Ingestion process completed.")
+    return summary
 
 
 if __name__ == "__main__":
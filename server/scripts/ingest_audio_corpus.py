@@ -1,9 +1,11 @@
 import logging
+import shutil
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Optional
 
-from data.pokemon_mappings import POKEMON_MAPPING
+from ingestion import manifest
 from ingestion.audio_ingestion import ingest_audio, write_audio_record
+from ingestion.metadata import resolve_metadata
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -14,18 +16,16 @@ logging.basicConfig(
 RAW_AUDIO_DIR = Path("data/raw/audio")
 
 
-def resolve_metadata(path: Path) -> tuple[str, int, list[str]]:
-    for key, (pokemon, gen, types) in POKEMON_MAPPING.items():
-        if key.lower() in path.stem.lower():
-            return pokemon, gen, types
-    raise ValueError(f"Could not resolve metadata for {path}")
-
-
-def add_audio(path: Path) -> Dict[str, str]:
+def add_audio(
+    path: Path,
+    content_hash: Optional[str] = None,
+    file_state: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
     RAW_AUDIO_DIR.mkdir(parents=True, exist_ok=True)
     target = RAW_AUDIO_DIR / path.name
     if path.resolve() != target.resolve():
-        target.write_bytes(path.read_bytes())
+        shutil.copyfile(path, target)
+        file_state = None  # describes the source, not the copy
 
     pokemon, generation, types = resolve_metadata(target)
 
@@ -34,8 +34,12 @@ def add_audio(path: Path) -> Dict[str, str]:
         pokemon=pokemon,
         generation=generation,
         types=types,
+        content_hash=content_hash,
     )
     write_audio_record(record)
+    manifest.mark_ingested(
+        target, "audio", record["id"], content_hash=content_hash, state=file_state
+    )
     logger.info("Added audio %s for %s (gen %d)", target, pokemon, generation)
     return record
 
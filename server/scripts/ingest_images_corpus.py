@@ -1,9 +1,11 @@
 import logging
+import shutil
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Optional
 
-from data.pokemon_mappings import POKEMON_MAPPING
+from ingestion import manifest
 from ingestion.image_ingestion import ingest_image, write_image_record
+from ingestion.metadata import resolve_metadata
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,14 +15,11 @@ logging.basicConfig(
 RAW_IMAGE_DIR = Path("data/raw/images")
 
 
-def resolve_metadata(path: Path) -> tuple[str, int, list[str]]:
-    for key, (pokemon, gen, types) in POKEMON_MAPPING.items():
-        if key.lower() in path.stem.lower():
-            return pokemon, gen, types
-    raise ValueError(f"Could not resolve metadata for {path}")
-
-
-def add_image(raw_file: Path) -> Dict[str, str]:
+def add_image(
+    raw_file: Path,
+    content_hash: Optional[str] = None,
+    file_state: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
     """
     Given a path to an image file, move/copy it into data/raw/images,
     infer metadata, ingest it, and append to data/processed/images.jsonl.
@@ -29,7 +28,8 @@ def add_image(raw_file: Path) -> Dict[str, str]:
 
     target = RAW_IMAGE_DIR / raw_file.name
     if raw_file.resolve() != target.resolve():
-        target.write_bytes(raw_file.read_bytes())
+        shutil.copyfile(raw_file, target)
+        file_state = None  # describes the source, not the copy
 
     pokemon, generation, types = resolve_metadata(target)
 
@@ -38,8 +38,12 @@ def add_image(raw_file: Path) -> Dict[str, str]:
         pokemon=pokemon,
         generation=generation,
         types=types,
+        content_hash=content_hash,
     )
     write_image_record(record)
+    manifest.mark_ingested(
+        target, "image", record["id"], content_hash=content_hash, state=file_state
+    )
     logging.info("Added image %s for %s (gen %d)", target, pokemon, generation)
     return record
 
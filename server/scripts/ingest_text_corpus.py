@@ -1,8 +1,10 @@
 import logging
+import shutil
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Optional
 
-from data.pokemon_mappings import POKEMON_MAPPING
+from ingestion import manifest
+from ingestion.metadata import resolve_metadata
 from ingestion.text_ingestion import ingest_pdf, ingest_txt, write_text_record
 
 logging.basicConfig(
@@ -13,17 +15,14 @@ logging.basicConfig(
 RAW_TEXT_DIR = Path("data/raw/text")
 
 
-def resolve_metadata(path: Path) -> tuple[str, int, list[str]]:
-    for key, (pokemon, gen, types) in POKEMON_MAPPING.items():
-        if key.lower() in path.stem.lower():
-            return pokemon, gen, types
-    raise ValueError(f"Could not resolve metadata for {path}")
-
-
-def add_text(raw_file: Path) -> Dict[str, str]:
+def add_text(
+    raw_file: Path,
+    content_hash: Optional[str] = None,
+    file_state: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
     """
     Given a path to a .pdf or .txt file, move/copy it into data/raw/text,
-    infer metadata, ingest it, and append to data/processed/text.jsonl.
+    infer metadata, ingest it, and write its record to the record store.
     """
     suffix = raw_file.suffix.lower()
     if suffix not in {".pdf", ".txt"}:
@@ -33,7 +32,8 @@ def add_text(raw_file: Path) -> Dict[str, str]:
 
     target = RAW_TEXT_DIR / raw_file.name
     if raw_file.resolve() != target.resolve():
-        target.write_bytes(raw_file.read_bytes())
+        shutil.copyfile(raw_file, target)
+        file_state = None  # describes the source, not the copy
 
     pokemon, generation, types = resolve_metadata(target)
 
@@ -43,6 +43,7 @@ def add_text(raw_file: Path) -> Dict[str, str]:
             pokemon=pokemon,
             generation=generation,
             types=types,
+            content_hash=content_hash,
         )
     else:  # ".txt"
         record = ingest_txt(
@@ -53,6 +54,9 @@ def add_text(raw_file: Path) -> Dict[str, str]:
         )
 
     write_text_record(record)
+    manifest.mark_ingested(
+        target, "text", record["id"], content_hash=content_hash, state=file_state
+    )
     logging.info("Added text %s for %s (gen %d)", target, pokemon, generation)
     return record
 
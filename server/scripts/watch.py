@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import scripts.ingest as ingest
+from ingestion import manifest
+from ingestion.metadata import raw_path
+from ingestion.watcher import Debouncer, make_watcher
+from processing import graph_builder
+from scripts.ingest_audio_corpus import add_audio
+from scripts.ingest_images_corpus import add_image
+from scripts.ingest_text_corpus import add_text
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+
+# Files are ingested in parallel once they have been quiet for
+# WATCH_DEBOUNCE_SECONDS; the graph is then updated for that batch only.
+WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "4"))
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "2"))
+
+ADDERS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "text": add_text,
+    "image": add_image,
+    "audio": add_audio,
+}
+
+
+def classify(path: Path) -> Optional[str]:
+    """Modality of a corpus file, or None for anything the watcher ignores."""
+    if path.name.startswith("."):  # temp files of in-progress uploads
+        return None
+    for modality, raw_dir, suffixes in ingest.CORPORA:
+        if path.parent == raw_dir and path.suffix.lower() in suffixes:
+            return modality
+    return None
+
+
+def process_paths(paths: Iterable[Path], executor: Executor) -> Dict[str, int]:
+    """
+    Ingest new or changed files in parallel, tombstone removed ones, then
+    apply a graph delta for the ingested records.
+    """
+    to_add: List[tuple[str, Path, Dict[str, Any]]] = []
+    deleted: List[Dict[str, Any]] = []
+    with manifest.manifest_db() as conn:
+        for path in paths:
+            modality = classify(path)
+            if modality is None or manifest.is_claimed(conn, path):
+                # Claimed files are being ingested by the upload that saved them.
+                continue
+            if not path.exists():
+                entry = manifest.get_entry(conn, path)
+                if entry is not None:
+                    deleted.append(entry)
+                continue
+            state = manifest.check_file(conn, path)
+            if state is not None:
+                to_add.append((modality, path, state))
+
+    ingest.tombstone(deleted)
+
+    futures = {
+        executor.submit(
+            ADDERS[modality],
+            path,
+            content_hash=state["content_hash"],
+            file_state=state,
+        ): path
+        for modality, path, state in to_add
+    }
+    record_ids: List[str] = []
+    failed = 0
+    for future in as_completed(futures):
+        try:
+            record_ids.append(future.result()["id"])
+        except Exception:
+            failed += 1
+            logger.exception("Failed to ingest %s", futures[future])
+
+    if record_ids:
+        graph_builder.update_graph(record_ids)
+
+    summary = {"ingested": len(record_ids), "deleted": len(deleted), "failed": failed}
+    if record_ids or deleted or failed:
+        logger.info("Watch batch finished: %s", summary)
+    return summary
+
+
+def catch_up(executor: Executor) -> Dict[str, int]:
+    """Pick up files that changed while the watcher was not running."""
+    jobs, plan = ingest.plan_jobs()
+    paths = [Path(job["path"]) for job in jobs]
+    paths += [Path(entry["path"]) for entry in plan["deleted"]]
+    return process_paths(paths, executor)
+
+
+def watch(stop: Optional[threading.Event] = None) -> None:
+    stop = stop or threading.Event()
+    watcher = make_watcher(raw_dir for _modality, raw_dir, _suffixes in ingest.CORPORA)
+    debouncer = Debouncer(WATCH_DEBOUNCE_SECONDS)
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=WATCH_WORKERS, thread_name_prefix="watch"
+        ) as executor:
+            ingest.migrate_record_ids()
+            catch_up(executor)
+            while not stop.is_set():
+                timeout = WATCH_DEBOUNCE_SECONDS / 2 if len(debouncer) else 1.0
+                # A sidecar edit re-ingests the file it describes.
+                paths = {raw_path(p) for p in watcher.poll(timeout)}
+                debouncer.add(p for p in paths if classify(p))
+
+                if watcher.needs_rescan:
+                    watcher.needs_rescan = False
+                    catch_up(executor)
+
+                ready = debouncer.ready()
+                if ready:
+                    process_paths(ready, executor)
+    finally:
+        watcher.close()
+
+
+def main() -> None:
+    logger.info("Watching raw directories for new files...")
+    try:
+        watch()
+    except KeyboardInterrupt:
+        logger.info("Watcher stopped.")
+
+
+if __name__ == "__main__":
+    main()
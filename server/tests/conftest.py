@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keep on-disk caches out of the working tree and independent per test."""
+    from ingestion import (
+        checkpoint,
+        dedupe,
+        manifest,
+        media_cache,
+        record_store,
+        work_queue,
+    )
+    from jobs import store as job_store
+    from processing import llm_cache
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DB", tmp_path / "llm_extraction.db")
+    monkeypatch.setattr(manifest, "MANIFEST_DB", tmp_path / "manifest.db")
+    monkeypatch.setattr(record_store, "RECORD_DB", tmp_path / "records.db")
+    monkeypatch.setattr(record_store, "LEGACY_JSONL", [])
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_DB", tmp_path / "media.db")
+    monkeypatch.setattr(dedupe, "DEDUPE_DB", tmp_path / "dedupe.db")
+    monkeypatch.setattr(job_store, "JOBS_DB", tmp_path / "jobs.db")
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_DB", tmp_path / "ingest_wal.db")
+    monkeypatch.setattr(work_queue, "WORK_QUEUE_PATH", tmp_path / "queue.db")
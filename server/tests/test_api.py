@@ -1,3 +1,4 @@
+import pytest
 from api.main import app
 from fastapi.testclient import TestClient
 
@@ -62,7 +63,7 @@ def test_chat_endpoint_uses_openai_and_returns_content(monkeypatch):
     class FakeOpenAIClient:
         class Responses:
             @staticmethod
-            def create(**kwargs):
+            async def create(**kwargs):
                 calls["called"] = True
                 calls["input"] = kwargs["input"]
                 return FakeResponse("fake answer from model")
@@ -86,6 +87,132 @@ def test_chat_endpoint_uses_openai_and_returns_content(monkeypatch):
     )
 
 
+def test_chat_runs_retrieval_concurrently_with_stage_timeouts(monkeypatch):
+    import asyncio
+    import time
+
+    from api.routes import llm as chat_routes
+    from processing.llm_providers import AsyncFakeLLMClient
+
+    def slow_graph_context(message, lookup=None):
+        time.sleep(0.3)
+        return {"context": "graph facts", "node": {"name": "Bulbasaur"}}
+
+    async def slow_vector_context(message, query_vector=None):
+        await asyncio.sleep(0.3)
+        return {"context": "vector facts"}
+
+    async def stuck_vector_context(message, query_vector=None):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(chat_routes, "openai_client", AsyncFakeLLMClient())
+    monkeypatch.setattr(chat_routes, "build_graph_context", slow_graph_context)
+    monkeypatch.setattr(chat_routes, "build_vector_context_async", slow_vector_context)
+    monkeypatch.setattr(chat_routes, "log_evaluation", lambda **kwargs: None)
+
+    started = time.perf_counter()
+    resp = client.post("/chat", data={"message": "What is Bulbasaur?"})
+    assert resp.status_code == 200
+    assert resp.json()["node"] == {"name": "Bulbasaur"}
+    assert time.perf_counter() - started < 0.55
+
+    monkeypatch.setattr(chat_routes, "build_vector_context_async", stuck_vector_context)
+    monkeypatch.setattr(chat_routes, "CHAT_VECTOR_TIMEOUT_SECONDS", 0.1)
+    resp = client.post("/chat", data={"message": "What is Bulbasaur?"})
+    assert resp.status_code == 200
+    assert resp.json()["node"] == {"name": "Bulbasaur"}
+
+
+def test_chat_stream_sends_metadata_then_tokens(monkeypatch):
+    import json
+
+    from api.routes import llm as chat_routes
+    from processing.llm_providers import AsyncFakeLLMClient
+
+    async def vector_context(message, query_vector=None):
+        sources = [{"media_id": "bulbasaur_notes", "source_path": "x", "score": 0.9}]
+        return {"context": "vector facts", "sources": sources}
+
+    logged = []
+    monkeypatch.setattr(chat_routes, "openai_client", AsyncFakeLLMClient())
+    monkeypatch.setattr(
+        chat_routes,
+        "build_graph_context",
+        lambda message, lookup=None: {
+            "context": "graph facts",
+            "node": {"name": "Bulbasaur"},
+        },
+    )
+    monkeypatch.setattr(chat_routes, "build_vector_context_async", vector_context)
+    monkeypatch.setattr(chat_routes, "log_evaluation", lambda **kw: logged.append(kw))
+
+    with client.stream(
+        "POST", "/chat/stream", data={"message": "What is Bulbasaur?"}
+    ) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = [
+            (
+                block.split("\n")[0][len("event: ") :],
+                json.loads(block.split("data: ")[1]),
+            )
+            for block in resp.read().decode().strip().split("\n\n")
+        ]
+
+    names = [name for name, _data in events]
+    assert names[0] == "metadata" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"} and len(names) > 3
+    assert events[0][1]["node"] == {"name": "Bulbasaur"}
+    assert events[0][1]["sources"][0]["media_id"] == "bulbasaur_notes"
+
+    answer = "".join(data["text"] for name, data in events if name == "token")
+    assert answer == events[-1][1]["content"]
+    assert answer.endswith("What is Bulbasaur?")
+    assert logged[0]["answer"] == answer
+    assert "first_token_ms" in logged[0]["evaluation_scores"]
+
+
+def test_chat_stream_closes_the_upstream_stream_on_timeout(monkeypatch):
+    import asyncio
+
+    from api.routes import llm as chat_routes
+
+    class StalledStream:
+        closed = False
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            await asyncio.sleep(10)
+
+        async def close(self):
+            StalledStream.closed = True
+
+    class StalledResponses:
+        async def create(self, **kwargs):
+            return StalledStream()
+
+    monkeypatch.setattr(
+        chat_routes, "openai_client", type("C", (), {"responses": StalledResponses()})
+    )
+    monkeypatch.setattr(chat_routes, "CHAT_LLM_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(
+        chat_routes, "build_graph_context", lambda message, lookup=None: {"context": ""}
+    )
+
+    async def vector_context(message, query_vector=None):
+        return {"context": "", "sources": []}
+
+    monkeypatch.setattr(chat_routes, "build_vector_context_async", vector_context)
+
+    with client.stream("POST", "/chat/stream", data={"message": "Bulbasaur?"}) as resp:
+        body = resp.read().decode()
+
+    assert "event: error" in body and "timed out" in body
+    assert StalledStream.closed
+
+
 def test_graph_endpoint_404_when_missing(tmp_path, monkeypatch):
     from api.routes import graph as graph_routes
 
@@ -136,3 +263,98 @@ def test_logs_endpoint_returns_parsed_records(tmp_path, monkeypatch):
     assert isinstance(data, list)
     assert data[0]["query"] == "What is Pikachu all about?"
     assert data[0]["focused_pokemon"]["name"] == "Pikachu"
+
+
+def test_records_endpoint_returns_record_by_media_id():
+    from ingestion import record_store
+
+    record_store.upsert_records(
+        [{"id": "bulbasaur_fact", "modality": "text", "text": "Bulbasaur facts"}]
+    )
+
+    resp = client.get("/records/bulbasaur_fact")
+    assert resp.status_code == 200
+    assert resp.json()["text"] == "Bulbasaur facts"
+
+    assert client.get("/records/missing").status_code == 404
+
+
+def test_add_text_streams_upload_into_raw_dir(tmp_path, monkeypatch):
+    import hashlib
+
+    from api.routes import ingest as ingest_routes
+    from ingestion import manifest
+
+    calls = {}
+
+    def fake_add_text(path, content_hash=None):
+        calls["path"] = path
+        calls["content_hash"] = content_hash
+        with manifest.manifest_db() as conn:
+            calls["claimed"] = manifest.is_claimed(conn, path)
+        return {"id": path.stem}
+
+    monkeypatch.setattr(ingest_routes, "RAW_TEXT_DIR", tmp_path / "text")
+    monkeypatch.setattr(ingest_routes, "run_add_text", fake_add_text)
+
+    body = b"Bulbasaur is a Grass/Poison starter."
+    resp = client.post(
+        "/add/text", files={"file": ("../bulbasaur_notes.txt", body, "text/plain")}
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["record"] == {"id": "bulbasaur_notes"}
+    assert calls["path"] == tmp_path / "text" / "bulbasaur_notes.txt"
+    assert calls["path"].read_bytes() == body
+    assert calls["content_hash"] == hashlib.sha256(body).hexdigest()
+    assert [p.name for p in (tmp_path / "text").iterdir()] == ["bulbasaur_notes.txt"]
+    # The watcher skips the file while the request ingests it, not after.
+    assert calls["claimed"]
+    with manifest.manifest_db() as conn:
+        assert not manifest.is_claimed(conn, calls["path"])
+
+
+def test_add_image_rejects_oversized_upload(tmp_path, monkeypatch):
+    from api.routes import ingest as ingest_routes
+
+    def fail_add_image(path, content_hash=None):
+        raise AssertionError("oversized upload must not be ingested")
+
+    monkeypatch.setattr(ingest_routes, "RAW_IMAGE_DIR", tmp_path / "images")
+    monkeypatch.setattr(ingest_routes, "MAX_IMAGE_UPLOAD_BYTES", 10)
+    monkeypatch.setattr(ingest_routes, "run_add_image", fail_add_image)
+
+    resp = client.post(
+        "/add/image", files={"file": ("bulbasaur.png", b"x" * 11, "image/png")}
+    )
+
+    assert resp.status_code == 413
+    assert list((tmp_path / "images").iterdir()) == []
+
+
+def test_upload_rejected_on_content_length_before_body_is_read(tmp_path):
+    import asyncio
+
+    from api.routes import ingest as ingest_routes
+    from fastapi import HTTPException, Request
+
+    async def receive():
+        raise AssertionError("body must not be read")
+
+    request = Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "headers": [
+                (b"content-type", b"multipart/form-data; boundary=x"),
+                (b"content-length", str(ingest_routes._MB * 2).encode()),
+            ],
+        },
+        receive,
+    )
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(ingest_routes.save_upload(request, tmp_path, ingest_routes._MB))
+
+    assert excinfo.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
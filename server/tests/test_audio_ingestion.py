@@ -1,8 +1,8 @@
-import json
 from pathlib import Path
 from typing import Any, Dict
 
 import scripts.ingest_audio_corpus as ingest_corpus
+from ingestion import record_store
 from ingestion.audio_ingestion import (
     extract_text_from_audio,
     ingest_audio,
@@ -61,7 +61,7 @@ def test_ingest_audio_builds_record(tmp_path: Path, monkeypatch):
         model=FakeModel(),
     )
 
-    assert record["id"] == audio_path.stem
+    assert record["id"] == "audio:bulbasaur.mp3"
     assert record["modality"] == "audio"
     assert record["source_path"].endswith("bulbasaur.mp3")
     assert record["pokemon"] == "Bulbasaur"
@@ -73,10 +73,7 @@ def test_ingest_audio_builds_record(tmp_path: Path, monkeypatch):
     assert "bulbasaur" in record["text"].lower()
 
 
-def test_write_audio_record_creates_valid_jsonl(tmp_path: Path, monkeypatch):
-    temp_jsonl = tmp_path / "audio.jsonl"
-    monkeypatch.setattr("ingestion.audio_ingestion.AUDIO_JSONL", temp_jsonl)
-
+def test_write_audio_record_upserts_into_record_store():
     record = {
         "id": "bulbasaur_audio_test",
         "modality": "audio",
@@ -89,12 +86,12 @@ def test_write_audio_record_creates_valid_jsonl(tmp_path: Path, monkeypatch):
     }
 
     write_audio_record(record)
+    write_audio_record(record)  # upsert: writing again must not duplicate
 
-    assert temp_jsonl.exists()
-    lines = temp_jsonl.read_text(encoding="utf-8").splitlines()
-    assert len(lines) == 1
+    records = list(record_store.iter_records())
+    assert len(records) == 1
 
-    loaded = json.loads(lines[0])
+    loaded = record_store.get_record("bulbasaur_audio_test")
     assert loaded["id"] == "bulbasaur_audio_test"
     assert loaded["pokemon"] == "Bulbasaur"
     assert "Bulbasaur" in loaded["text"]
@@ -111,7 +108,9 @@ def test_add_audio_moves_file_and_ingests(tmp_path, monkeypatch):
 
     calls: Dict[str, Any] = {}
 
-    def fake_ingest_audio(path: str, pokemon: str, generation: int, types: list[str]):
+    def fake_ingest_audio(
+        path: str, pokemon: str, generation: int, types: list[str], content_hash=None
+    ):
         calls["ingest_args"] = (Path(path), pokemon, generation, types)
         return {
             "id": "bulbasaur_intro",
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import scripts.benchmark_whisper as benchmark_whisper
+from ingestion import transcription
+from scripts.benchmarking import (
+    edit_distance,
+    error_rate,
+    load_references,
+    normalize_words,
+)
+
+
+def test_edit_distance_on_chars_and_words():
+    assert edit_distance("bulbasaur", "bulbasaur") == 0
+    assert edit_distance("bulbasaur", "bulbsaur") == 1
+    assert edit_distance(["the", "seed", "pokemon"], ["the", "pokemon"]) == 1
+
+
+def test_error_rate_normalises_by_reference_length():
+    assert error_rate("abcd", "abxd") == 0.25
+    assert error_rate("", "") == 0.0
+    ref = normalize_words("Bulbasaur, the Seed Pokémon!")
+    assert ref == ["bulbasaur", "the", "seed", "pokémon"]
+    assert error_rate(ref, normalize_words("bulbasaur the seed")) == 0.25
+
+
+def test_load_references_names_every_missing_file(tmp_path):
+    clips = [tmp_path / "bulbasaur.mp3", tmp_path / "squirtle.mp3"]
+    (tmp_path / "bulbasaur.ref.txt").write_text("Bulbasaur", encoding="utf-8")
+
+    with pytest.raises(FileNotFoundError, match="squirtle.ref.txt"):
+        load_references(clips, ".ref.txt")
+
+    (tmp_path / "squirtle.ref.txt").write_text("Squirtle", encoding="utf-8")
+    assert load_references(clips, ".ref.txt") == {
+        clips[0]: "Bulbasaur",
+        clips[1]: "Squirtle",
+    }
+
+
+def test_whisper_benchmark_runs_clips_through_the_segmenting_pool(
+    tmp_path, monkeypatch
+):
+    import whisper
+
+    sr = transcription.SAMPLE_RATE
+    t = np.arange(20 * sr) / sr
+    # Two 20 s utterances: too long for one segment, so the pool cuts them.
+    audio = np.concatenate(
+        [np.sin(2 * np.pi * 300 * t), np.zeros(sr), np.sin(2 * np.pi * 500 * t)]
+    ).astype(np.float32)
+    (tmp_path / "bulbasaur.mp3").write_bytes(b"")
+    (tmp_path / "bulbasaur.ref.txt").write_text("Bulbasaur seed", encoding="utf-8")
+
+    class FakeSegmentModel:
+        def transcribe(self, segment, fp16):
+            spectrum = np.abs(np.fft.rfft(segment))
+            freq = round(np.argmax(spectrum) * sr / len(segment) / 100) * 100
+            return {"text": {300: " Bulbasaur ", 500: " weed "}[freq]}
+
+    pools = []
+
+    def thread_pool(model_name, quantize):
+        pool = transcription.TranscriptionPool(
+            workers=2,
+            executor=ThreadPoolExecutor(max_workers=2),
+            model_name=model_name,
+            quantize=quantize,
+        )
+        pools.append(pool)
+        return pool
+
+    monkeypatch.setattr(whisper, "load_audio", lambda path, sr: audio)
+    monkeypatch.setattr(transcription, "_worker_model", FakeSegmentModel())
+    monkeypatch.setattr(benchmark_whisper, "TranscriptionPool", thread_pool)
+
+    rows = benchmark_whisper.benchmark([("tiny", "int8")], audio_dir=tmp_path)
+
+    assert [(p.model_name, p.quantize) for p in pools] == [("tiny", "int8")]
+    assert rows[0]["model"] == "tiny" and rows[0]["workers"] == 2
+    assert rows[0]["audio_s"] == 41.0
+    # Stitched "Bulbasaur weed" against "Bulbasaur seed": one word in two.
+    assert rows[0]["wer"] == 0.5
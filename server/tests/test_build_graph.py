@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from typing import Any, Dict, Union
 
+from ingestion import record_store
 from processing import entity_extraction, graph_builder
 
 
@@ -54,9 +55,10 @@ def test_build_graph_merges_fragments(tmp_path, monkeypatch):
     _write_jsonl(audio_jsonl, audio_recs)
     _write_jsonl(images_jsonl, image_recs)
 
-    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl, raising=True)
-    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", audio_jsonl, raising=True)
-    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", images_jsonl, raising=True)
+    # Records written before the record store existed are migrated on read.
+    monkeypatch.setattr(
+        record_store, "LEGACY_JSONL", [text_jsonl, images_jsonl, audio_jsonl]
+    )
 
     def fake_extract_entities(
         text: str, media_id: str, pokemon_hint: Union[str, None] = None
@@ -0,0 +1,101 @@
+from typing import List
+
+import pytest
+import scripts.ingest as ingest_script
+from ingestion import checkpoint, record_store
+
+
+def test_record_stage_keeps_payloads_until_the_content_changes():
+    checkpoint.record_stage("a.txt", "h1", checkpoint.EXTRACTED, record={"id": "a"})
+    checkpoint.record_stage("a.txt", "h1", checkpoint.EMBEDDED, vector=[0.5])
+    checkpoint.record_stage("a.txt", "h1", checkpoint.UPSERTED)
+    checkpoint.record_stage("b.txt", None, checkpoint.EXTRACTED, record={"id": "b"})
+
+    jobs = [{"path": "a.txt", "content_hash": "h1"}, {"path": "b.txt"}]
+    assert checkpoint.load_checkpoints(jobs) == {
+        "a.txt": {"stage": "upserted", "record": {"id": "a"}, "vector": [0.5]}
+    }
+    assert checkpoint.load_checkpoints([{"path": "a.txt", "content_hash": "h2"}]) == {}
+
+    checkpoint.record_stage("a.txt", "h2", checkpoint.EXTRACTED, record={"id": "a2"})
+    entry = checkpoint.load_checkpoints([{"path": "a.txt", "content_hash": "h2"}])
+    assert entry["a.txt"]["vector"] is None
+    assert not checkpoint.reached(entry["a.txt"], checkpoint.EMBEDDED)
+
+
+def test_record_stage_reuses_one_connection(monkeypatch):
+    opened = []
+    connect = checkpoint.connect_checkpoints
+
+    def counting_connect(path=None):
+        opened.append(path)
+        return connect(path)
+
+    monkeypatch.setattr(checkpoint, "connect_checkpoints", counting_connect)
+    for stage in (checkpoint.EXTRACTED, checkpoint.EMBEDDED, checkpoint.UPSERTED):
+        checkpoint.record_stage("a.txt", "h1", stage)
+
+    assert len(opened) == 1
+    entry = checkpoint.load_checkpoints([{"path": "a.txt", "content_hash": "h1"}])
+    assert entry["a.txt"]["stage"] == checkpoint.UPSERTED
+
+
+def test_extract_record_resumes_from_logged_record():
+    job = {
+        "modality": "text",
+        "path": "does/not/exist.txt",
+        "content_hash": "h1",
+        "checkpoint": {
+            "stage": checkpoint.EMBEDDED,
+            "record": {"id": "exist", "text": "stored"},
+            "vector": [1.0],
+        },
+    }
+
+    record = ingest_script.extract_record(job)
+
+    assert record["text"] == "stored"
+    assert record["_checkpoint"] == {"stage": "embedded", "vector": [1.0]}
+
+
+def test_rerun_after_failed_upsert_only_retries_the_upsert(tmp_path, monkeypatch):
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    (text_dir / "bulbasaur_notes.txt").write_text("Bulbasaur notes", encoding="utf-8")
+    (text_dir / "charmander_notes.txt").write_text("Charmander notes", encoding="utf-8")
+
+    monkeypatch.setattr(ingest_script, "CORPORA", [("text", text_dir, {".txt"})])
+    monkeypatch.setattr(ingest_script, "INGEST_EXTRACT_WORKERS", 1)
+
+    embedded: List[str] = []
+    upserts: List[str] = []
+
+    def embed(text):
+        embedded.append(text)
+        return [0.0] * 1536
+
+    def upsert(doc_id, vector, metadata):
+        if doc_id == "text:charmander_notes.txt" and not upserts.count(doc_id):
+            upserts.append(doc_id)
+            raise ConnectionError("vector store unavailable")
+        upserts.append(doc_id)
+
+    monkeypatch.setattr(ingest_script, "embed_text", embed)
+    monkeypatch.setattr(ingest_script, "upsert_document", upsert)
+
+    with pytest.raises(RuntimeError, match="1 failed items"):
+        ingest_script.main()
+    assert sorted(embedded) == ["Bulbasaur notes", "Charmander notes"]
+
+    summary = ingest_script.main()
+
+    assert summary["resumed"] == 1
+    assert summary["unchanged"] == 1
+    assert sorted(embedded) == ["Bulbasaur notes", "Charmander notes"]
+    assert upserts.count("text:charmander_notes.txt") == 2
+    assert upserts.count("text:bulbasaur_notes.txt") == 1
+    assert sorted(r["id"] for r in record_store.iter_records()) == [
+        "text:bulbasaur_notes.txt",
+        "text:charmander_notes.txt",
+    ]
+    assert checkpoint.load_checkpoints(ingest_script.plan_jobs()[0]) == {}
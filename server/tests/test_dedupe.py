@@ -0,0 +1,151 @@
+from typing import Any, Dict, List
+
+import scripts.ingest as ingest_script
+from ingestion import dedupe, record_store
+from processing import graph_builder
+
+FACT_SHEET = (
+    "Bulbasaur is a dual-type Grass/Poison Pokemon introduced in Generation I. "
+    "It evolves into Ivysaur starting at level 16, which evolves into Venusaur "
+    "starting at level 32. Bulbasaur is one of the three starter Pokemon of "
+    "Kanto, available from Professor Oak at the start of Pokemon Red and Blue. "
+    "A strange seed was planted on its back at birth and sprouts with it."
+)
+# The same sheet after a noisy OCR pass: a handful of misread characters.
+OCR_COPY = (
+    FACT_SHEET.replace("Generation I", "Generati0n I")
+    .replace("Ivysaur starting", "Ivysaur startinq")
+    .replace("Professor", "Profess0r")
+)
+OTHER_SHEET = (
+    "Charmander is a Fire-type Pokemon introduced in Generation I. The flame "
+    "at the tip of its tail shows its life force and burns brighter when it is "
+    "healthy. It evolves into Charmeleon at level 16 and into Charizard at "
+    "level 36, and it is the Fire starter offered in the Kanto region."
+)
+
+
+def _record(media_id: str, text: str) -> Dict[str, Any]:
+    return {"id": media_id, "text": text}
+
+
+def test_minhash_estimates_similarity():
+    base = dedupe.minhash_signature(FACT_SHEET)
+
+    assert dedupe.estimated_similarity(base, dedupe.minhash_signature(FACT_SHEET)) == 1
+    assert dedupe.estimated_similarity(base, dedupe.minhash_signature(OCR_COPY)) > 0.85
+    assert (
+        dedupe.estimated_similarity(base, dedupe.minhash_signature(OTHER_SHEET)) < 0.3
+    )
+
+
+def test_link_duplicate_links_near_duplicates_to_canonical():
+    canonical = _record("bulbasaur_sheet", FACT_SHEET)
+    copy = _record("bulbasaur_scan", OCR_COPY)
+    other = _record("charmander_sheet", OTHER_SHEET)
+
+    assert dedupe.link_duplicate(canonical) is False
+    assert dedupe.link_duplicate(other) is False
+    assert dedupe.link_duplicate(copy) is True
+    assert copy["duplicate_of"] == "bulbasaur_sheet"
+    assert copy["duplicate_similarity"] > 0.85
+    assert "duplicate_of" not in canonical
+
+    # Re-ingesting the canonical record must not match its own old entry.
+    assert dedupe.link_duplicate(_record("bulbasaur_sheet", FACT_SHEET)) is False
+
+
+def test_link_duplicate_ignores_short_texts_and_disabled(monkeypatch):
+    assert dedupe.link_duplicate(_record("a", "Bulbasaur")) is False
+    assert dedupe.link_duplicate(_record("b", "Bulbasaur")) is False
+
+    monkeypatch.setattr(dedupe, "DEDUPE_ENABLED", False)
+    dedupe.link_duplicate(_record("c", FACT_SHEET))
+    assert dedupe.link_duplicate(_record("d", FACT_SHEET)) is False
+
+
+def test_forget_returns_orphaned_duplicates():
+    dedupe.link_duplicate(_record("bulbasaur_sheet", FACT_SHEET))
+    dedupe.link_duplicate(_record("bulbasaur_scan", OCR_COPY))
+
+    assert dedupe.forget(["bulbasaur_sheet"]) == ["bulbasaur_scan"]
+    # With both gone the next copy becomes canonical.
+    assert dedupe.link_duplicate(_record("bulbasaur_scan", OCR_COPY)) is False
+
+
+def test_ingest_skips_indexing_near_duplicates(tmp_path, monkeypatch):
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    (text_dir / "bulbasaur_a.txt").write_text(FACT_SHEET, encoding="utf-8")
+    (text_dir / "bulbasaur_b.txt").write_text(OCR_COPY, encoding="utf-8")
+
+    monkeypatch.setattr(ingest_script, "CORPORA", [("text", text_dir, {".txt"})])
+    monkeypatch.setattr(ingest_script, "INGEST_EXTRACT_WORKERS", 1)
+    embedded: List[str] = []
+    monkeypatch.setattr(
+        ingest_script, "embed_text", lambda text: embedded.append(text) or [0.0]
+    )
+    upserts: List[str] = []
+    monkeypatch.setattr(
+        ingest_script,
+        "upsert_document",
+        lambda doc_id, vector, metadata: upserts.append(doc_id),
+    )
+    deleted: List[str] = []
+    monkeypatch.setattr(ingest_script, "delete_documents", deleted.extend)
+
+    ingest_script.main()
+
+    records = {r["id"]: r for r in record_store.iter_records()}
+    assert len(embedded) == 1
+    assert len(upserts) == 1
+    (duplicate,) = [r for r in records.values() if r.get("duplicate_of")]
+    assert duplicate["duplicate_of"] == upserts[0]
+    assert deleted == [duplicate["id"]]
+
+
+def test_build_graph_copies_mentions_to_duplicates(monkeypatch):
+    record_store.upsert_records(
+        [
+            {"id": "bulbasaur_sheet", "modality": "text", "text": FACT_SHEET},
+            {
+                "id": "bulbasaur_scan",
+                "modality": "image",
+                "text": OCR_COPY,
+                "duplicate_of": "bulbasaur_sheet",
+            },
+            {
+                "id": "orphan_scan",
+                "modality": "image",
+                "text": OCR_COPY,
+                "duplicate_of": "deleted_sheet",
+            },
+        ]
+    )
+
+    extracted: List[str] = []
+
+    def fake_extract_fragments(documents):
+        for doc in documents:
+            extracted.append(doc["media_id"])
+            yield {
+                "pokemon_nodes": [],
+                "type_nodes": [],
+                "pokemon_type_edges": [],
+                "evolution_edges": [],
+                "mentions_edges": [
+                    {"from_media_id": doc["media_id"], "to_pokemon": "Bulbasaur"}
+                ],
+            }
+
+    monkeypatch.setattr(graph_builder, "_extract_fragments", fake_extract_fragments)
+    monkeypatch.setattr(graph_builder.graph_store, "GRAPH_BACKEND", "json")
+
+    graph = graph_builder.build_graph()
+
+    assert sorted(extracted) == ["bulbasaur_sheet", "orphan_scan"]
+    assert sorted(e["from_media_id"] for e in graph["mentions_edges"]) == [
+        "bulbasaur_scan",
+        "bulbasaur_sheet",
+        "orphan_scan",
+    ]
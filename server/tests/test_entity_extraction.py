@@ -98,3 +98,164 @@ def test_extract_entities_parse_valid_json(monkeypatch):
         "from_media_id": "bulbasaur_audio",
         "to_pokemon": "Charmander",
     } in result["mentions_edges"]
+
+
+def test_extract_entities_packed_splits_by_media_id(monkeypatch):
+    from processing import entity_extraction
+
+    packed_payload = {
+        "pokemon_nodes": [
+            {
+                "media_id": "bulbasaur_card",
+                "name": "Bulbasaur",
+                "generation": 1,
+                "primary_type": "Grass",
+                "secondary_type": "Poison",
+            },
+            {
+                "media_id": "charmander_clip",
+                "name": "Charmander",
+                "generation": 1,
+                "primary_type": "Fire",
+                "secondary_type": "",
+            },
+        ],
+        "type_nodes": [
+            {"media_id": "bulbasaur_card", "name": "Grass"},
+            {"media_id": "charmander_clip", "name": "Fire"},
+        ],
+        "pokemon_type_edges": [
+            {
+                "media_id": "charmander_clip",
+                "from_pokemon": "Charmander",
+                "to_type": "Fire",
+            }
+        ],
+        "evolution_edges": [],
+        "mentions_edges": [
+            {
+                "media_id": "bulbasaur_card",
+                "from_media_id": "bulbasaur_card",
+                "to_pokemon": "Bulbasaur",
+            }
+        ],
+    }
+    calls = {"count": 0, "schema": None}
+
+    class FakeContent:
+        text = json.dumps(packed_payload)
+
+    class FakeResponse:
+        output = [type("Item", (), {"content": [FakeContent()]})()]
+
+    class FakeResponses:
+        def create(self, *args, **kwargs):
+            calls["count"] += 1
+            calls["schema"] = kwargs["text"]["format"]["schema"]
+            return FakeResponse()
+
+    class FakeClient:
+        responses = FakeResponses()
+
+    monkeypatch.setattr(entity_extraction, "openai_client", FakeClient(), raising=True)
+
+    docs = [
+        {"media_id": "bulbasaur_card", "text": "Bulbasaur", "pokemon_hint": None},
+        {"media_id": "charmander_clip", "text": "Charmander", "pokemon_hint": None},
+    ]
+    packs = list(entity_extraction.pack_documents(docs, token_budget=1000))
+    assert packs == [docs]
+
+    fragments = entity_extraction.extract_entities_packed(docs)
+    assert calls["count"] == 1
+    assert (
+        "media_id"
+        in calls["schema"]["properties"]["mentions_edges"]["items"]["required"]
+    )
+
+    bulbasaur = fragments["bulbasaur_card"]
+    charmander = fragments["charmander_clip"]
+    assert [p["name"] for p in bulbasaur["pokemon_nodes"]] == ["Bulbasaur"]
+    assert "media_id" not in bulbasaur["pokemon_nodes"][0]
+    assert bulbasaur["mentions_edges"] == [
+        {"from_media_id": "bulbasaur_card", "to_pokemon": "Bulbasaur"}
+    ]
+    assert charmander["pokemon_type_edges"] == [
+        {"from_pokemon": "Charmander", "to_type": "Fire"}
+    ]
+
+    # Per-document results are cached, so re-packing the same docs is free.
+    entity_extraction.extract_entities_packed(docs)
+    assert calls["count"] == 1
+
+
+def test_pack_documents_respects_token_budget():
+    from processing.entity_extraction import pack_documents
+
+    docs = [{"media_id": str(i), "text": "word " * 40} for i in range(5)]
+    packs = list(pack_documents(docs, token_budget=100))
+
+    assert [len(p) for p in packs] == [2, 2, 1]
+    assert [d["media_id"] for p in packs for d in p] == ["0", "1", "2", "3", "4"]
+
+
+def test_extract_entities_chunked_maps_windows_and_reduces(monkeypatch):
+    from processing import entity_extraction
+
+    monkeypatch.setattr(entity_extraction, "EXTRACTION_CHUNK_TOKENS", 50)
+    monkeypatch.setattr(entity_extraction, "EXTRACTION_CHUNK_OVERLAP", 10)
+
+    seen_chunks: list[str] = []
+
+    def fake_extract_entities(text: str, media_id: str, pokemon_hint=None):
+        seen_chunks.append(text)
+        evolutions = (
+            [{"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"}]
+            if "Ivysaur" in text
+            else []
+        )
+        return {
+            "pokemon_nodes": [
+                {
+                    "name": "bulbasaur",
+                    "generation": 1,
+                    "primary_type": "",
+                    "secondary_type": "",
+                },
+                {
+                    "name": "Bulbasaur",
+                    "generation": 1,
+                    "primary_type": "Grass",
+                    "secondary_type": "Poison",
+                },
+            ],
+            "type_nodes": [{"name": "Grass"}],
+            "pokemon_type_edges": [{"from_pokemon": "Bulbasaur", "to_type": "Grass"}],
+            "evolution_edges": evolutions,
+            "mentions_edges": [{"from_media_id": media_id, "to_pokemon": "Bulbasaur"}],
+        }
+
+    monkeypatch.setattr(entity_extraction, "extract_entities", fake_extract_entities)
+
+    text = ("Bulbasaur is a seed Pokémon. " * 30) + "It evolves into Ivysaur."
+    result = entity_extraction.extract_entities_chunked(text, "bulbasaur_pdf")
+
+    assert len(seen_chunks) > 1
+    assert result["pokemon_nodes"] == [
+        {
+            "name": "Bulbasaur",
+            "generation": 1,
+            "primary_type": "Grass",
+            "secondary_type": "Poison",
+        }
+    ]
+    assert result["type_nodes"] == [{"name": "Grass"}]
+    assert result["pokemon_type_edges"] == [
+        {"from_pokemon": "Bulbasaur", "to_type": "Grass"}
+    ]
+    assert result["evolution_edges"] == [
+        {"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"}
+    ]
+    assert result["mentions_edges"] == [
+        {"from_media_id": "bulbasaur_pdf", "to_pokemon": "Bulbasaur"}
+    ]
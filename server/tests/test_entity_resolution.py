@@ -0,0 +1,71 @@
+from processing.entity_resolution import (
+    EntityResolver,
+    canonicalize_fragment,
+    normalize_name,
+)
+
+
+def test_normalize_name_strips_case_accents_and_qualifiers():
+    assert normalize_name("Charmander") == "charmander"
+    assert normalize_name("  charmander ") == "charmander"
+    assert normalize_name("Charmander (Pokémon)") == "charmander"
+    assert normalize_name("Nidoran♀") == "nidoran♀"
+
+
+def test_resolver_uses_alias_table_and_fuzzy_matching():
+    resolver = EntityResolver.from_mapping()
+
+    assert resolver.resolve("charmander") == "Charmander"
+    assert resolver.resolve("Charmander (Pokémon)") == "Charmander"
+    assert resolver.resolve("Charmandr") == "Charmander"  # OCR/ASR noise
+    assert resolver.resolve("Nidoran female") == "Nidoran♀"
+
+    # Distinct known entities are never merged, even when they are one edit apart.
+    assert resolver.resolve("Nidorina") == "Nidorina"
+    assert resolver.resolve("Nidorino") == "Nidorino"
+
+
+def test_resolver_registers_unknown_entities_as_canonical():
+    resolver = EntityResolver.from_mapping()
+
+    assert resolver.resolve("Chikorita (Pokémon)") == "Chikorita"
+    assert resolver.resolve("chikorita") == "Chikorita"
+    assert resolver.resolve("Chikorta") == "Chikorita"
+
+
+def test_canonicalize_fragment_rewrites_nodes_and_edges():
+    resolver = EntityResolver.from_mapping()
+    fragment = {
+        "pokemon_nodes": [
+            {
+                "name": "bulbasaur",
+                "generation": 1,
+                "primary_type": "grass",
+                "secondary_type": "POISON",
+            },
+            {
+                "name": "Bulbasaur (Pokémon)",
+                "generation": 1,
+                "primary_type": "Grass",
+                "secondary_type": "Poison",
+            },
+        ],
+        "type_nodes": [{"name": "grass"}, {"name": "Grass"}],
+        "pokemon_type_edges": [{"from_pokemon": "bulbasaur", "to_type": "grass"}],
+        "evolution_edges": [{"from_pokemon": "bulbasaur", "to_pokemon": "ivysaur"}],
+        "mentions_edges": [{"from_media_id": "card", "to_pokemon": "BULBASAUR"}],
+    }
+
+    result = canonicalize_fragment(fragment, resolver)
+
+    assert [p["name"] for p in result["pokemon_nodes"]] == ["Bulbasaur"]
+    assert result["type_nodes"] == [{"name": "Grass"}]
+    assert result["pokemon_type_edges"] == [
+        {"from_pokemon": "Bulbasaur", "to_type": "Grass"}
+    ]
+    assert result["evolution_edges"] == [
+        {"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"}
+    ]
+    assert result["mentions_edges"] == [
+        {"from_media_id": "card", "to_pokemon": "Bulbasaur"}
+    ]
@@ -0,0 +1,129 @@
+from processing import gazetteer
+from processing.keyword_matcher import KeywordMatcher
+
+
+def test_keyword_matcher_prefers_longest_and_respects_word_boundaries():
+    matcher = KeywordMatcher([("pidgeot", "Pidgeot"), ("pidgeotto", "Pidgeotto")])
+
+    matches = matcher.find_longest("Pidgeotto evolves into PIDGEOT; pidgeots fly")
+
+    assert [m[2] for m in matches] == ["Pidgeotto", "Pidgeot"]
+    assert len(matcher.find_all("pidgeotto")) == 1  # "pidgeot" is not a word here
+
+
+def test_extract_entities_local_emits_graph_fragment():
+    fragment = gazetteer.extract_entities_local(
+        "Charizard and Squirtle appear on this card. Charizard again.",
+        media_id="starter_card",
+    )
+
+    assert [p["name"] for p in fragment["pokemon_nodes"]] == ["Charizard", "Squirtle"]
+    assert fragment["pokemon_nodes"][0] == {
+        "name": "Charizard",
+        "generation": 1,
+        "primary_type": "Fire",
+        "secondary_type": "Flying",
+    }
+    assert {"name": "Flying"} in fragment["type_nodes"]
+    assert {"from_pokemon": "Squirtle", "to_type": "Water"} in fragment[
+        "pokemon_type_edges"
+    ]
+    assert fragment["mentions_edges"] == [
+        {"from_media_id": "starter_card", "to_pokemon": "Charizard"},
+        {"from_media_id": "starter_card", "to_pokemon": "Squirtle"},
+    ]
+    assert fragment["evolution_edges"] == []
+    assert gazetteer.needs_llm("Charizard and Squirtle", fragment) is False
+
+
+def test_needs_llm_for_unknown_entities_and_evolution_claims():
+    empty = gazetteer.extract_entities_local("A mysterious creature.", "doc")
+    assert gazetteer.needs_llm("A mysterious creature.", empty) is True
+
+    text = "Bulbasaur evolves into Ivysaur at level 16."
+    fragment = gazetteer.extract_entities_local(text, "doc")
+    assert {p["name"] for p in fragment["pokemon_nodes"]} == {"Bulbasaur", "Ivysaur"}
+    assert gazetteer.needs_llm(text, fragment) is True
+
+
+def test_needs_llm_when_a_known_pokemon_appears_next_to_an_unknown_one():
+    known_only = "Squirtle is a Water-type starter. This card shows Squirtle."
+    fragment = gazetteer.extract_entities_local(known_only, "doc")
+    assert gazetteer.needs_llm(known_only, fragment) is False
+
+    text = "Squirtle and Lapras are both Water types."
+    fragment = gazetteer.extract_entities_local(text, "doc")
+    assert [p["name"] for p in fragment["pokemon_nodes"]] == ["Squirtle"]
+    assert gazetteer.unresolved_candidates(text) == ["Lapras"]
+    assert gazetteer.needs_llm(text, fragment) is True
+
+
+def test_card_and_transcript_wording_is_not_an_unknown_pokemon():
+    card = (
+        "Basic Pokémon Squirtle HP 40\n"
+        "Tiny Turtle Pokémon. Length: 1' 8\", Weight: 20 lbs.\n"
+        "Bubble 10 Flip a coin. If heads, the Defending Pokémon is now Paralyzed.\n"
+        "Withdraw Flip a coin. If heads, prevent all damage done to Squirtle.\n"
+        "Weakness Lightning Resistance Retreat Cost\n"
+        "Illus. Mitsuhiro Arita"
+    )
+    transcript = (
+        "Fun fact number three. Squirtle was one of the original starters and "
+        "Tackle was its first move. Its Weakness is Lightning, so Pikachu "
+        "has the edge. Did you know that?"
+    )
+    for text in (card, transcript):
+        fragment = gazetteer.extract_entities_local(text, "doc")
+        assert gazetteer.unresolved_candidates(text) == []
+        assert gazetteer.needs_llm(text, fragment) is False
+
+
+def test_misspelt_or_claimed_names_still_go_to_the_llm():
+    assert gazetteer.unresolved_candidates("Charmandr uses Ember.") == ["Charmandr"]
+    assert gazetteer.unresolved_candidates(
+        "Squirtle is cute. Eevee is a Normal-type Pokémon."
+    ) == ["Eevee"]
+    assert gazetteer.unresolved_candidates("Pikachu, Meowth and Squirtle") == ["Meowth"]
+
+
+def test_build_graph_skips_llm_for_resolved_documents(tmp_path, monkeypatch):
+    from ingestion import record_store
+    from processing import entity_extraction, graph_builder
+
+    text_jsonl = tmp_path / "text.jsonl"
+    text_jsonl.write_text(
+        '{"id": "squirtle_card", "text": "Squirtle is a Water-type starter.", '
+        '"pokemon": "Squirtle"}\n'
+        '{"id": "squirtle_pdf", "text": "Squirtle evolves into Wartortle.", '
+        '"pokemon": "Squirtle"}\n',
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(record_store, "LEGACY_JSONL", [text_jsonl])
+
+    llm_calls: list[str] = []
+
+    def fake_extract_entities(text: str, media_id: str, pokemon_hint=None):
+        llm_calls.append(media_id)
+        return {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [
+                {"from_pokemon": "Squirtle", "to_pokemon": "Wartortle"}
+            ],
+            "mentions_edges": [],
+        }
+
+    monkeypatch.setattr(entity_extraction, "extract_entities", fake_extract_entities)
+
+    graph = graph_builder.build_graph()
+
+    assert llm_calls == ["squirtle_pdf"]
+    assert {n["name"] for n in graph["pokemon_nodes"]} == {"Squirtle", "Wartortle"}
+    assert graph["evolution_edges"] == [
+        {"from_pokemon": "Squirtle", "to_pokemon": "Wartortle"}
+    ]
+    assert {
+        "from_media_id": "squirtle_card",
+        "to_pokemon": "Squirtle",
+    } in graph["mentions_edges"]
@@ -0,0 +1,159 @@
+import json
+import threading
+from typing import Any, Dict
+
+from processing import graph_store
+
+
+def _fragment(media_id: str, pokemon: str, types: list[str]) -> Dict[str, Any]:
+    return {
+        "pokemon_nodes": [
+            {
+                "name": pokemon,
+                "generation": 1,
+                "primary_type": types[0],
+                "secondary_type": types[1] if len(types) > 1 else "",
+            }
+        ],
+        "type_nodes": [{"name": t} for t in types],
+        "pokemon_type_edges": [{"from_pokemon": pokemon, "to_type": t} for t in types],
+        "evolution_edges": [],
+        "mentions_edges": [{"from_media_id": media_id, "to_pokemon": pokemon}],
+    }
+
+
+def test_upsert_fragments_is_idempotent_and_batched(tmp_path):
+    db_path = tmp_path / "graph.db"
+    fragments = [
+        _fragment("bulbasaur_fact", "Bulbasaur", ["Grass", "Poison"]),
+        _fragment("bulbasaur_card", "Bulbasaur", ["Grass", "Poison"]),
+        _fragment("charmander_fact", "Charmander", ["Fire"]),
+    ]
+
+    applied = graph_store.upsert_fragments(fragments, batch_size=2, path=db_path)
+    graph_store.upsert_fragments(fragments, batch_size=2, path=db_path)
+
+    graph = graph_store.load_graph_from_db(db_path)
+    assert applied == 3
+    assert [n["name"] for n in graph["pokemon_nodes"]] == ["Bulbasaur", "Charmander"]
+    assert {t["name"] for t in graph["type_nodes"]} == {"Grass", "Poison", "Fire"}
+    assert len(graph["pokemon_type_edges"]) == 3
+    assert len(graph["mentions_edges"]) == 3
+
+
+def test_replace_graph_drops_rows_of_removed_records(tmp_path):
+    db_path = tmp_path / "graph.db"
+    graph_store.upsert_fragments(
+        [
+            _fragment("bulbasaur_fact", "Bulbasaur", ["Grass", "Poison"]),
+            _fragment("charmander_fact", "Charmander", ["Fire"]),
+        ],
+        path=db_path,
+    )
+
+    rebuilt = _fragment("bulbasaur_fact", "Bulbasaur", ["Grass", "Poison"])
+    graph_store.replace_graph(rebuilt, path=db_path)
+
+    graph = graph_store.load_graph_from_db(db_path)
+    assert [p["name"] for p in graph["pokemon_nodes"]] == ["Bulbasaur"]
+    assert sorted(t["name"] for t in graph["type_nodes"]) == ["Grass", "Poison"]
+    assert graph["mentions_edges"] == rebuilt["mentions_edges"]
+
+
+def test_neighbourhood_queries_use_sqlite(tmp_path):
+    db_path = tmp_path / "graph.db"
+    fragment = _fragment("bulbasaur_fact", "Bulbasaur", ["Grass", "Poison"])
+    fragment["evolution_edges"] = [
+        {"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"}
+    ]
+    graph_store.upsert_fragments([fragment], path=db_path)
+
+    with graph_store.graph_db(db_path) as conn:
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        nodes = graph_store.find_pokemon_nodes_by_name_db(
+            conn, "What type is bulbasaur?"
+        )
+        related = graph_store.find_related_pokemon_db(conn, "Bulbasaur")
+        plan = " ".join(
+            str(r[-1])
+            for r in conn.execute(
+                "EXPLAIN QUERY PLAN "
+                "SELECT from_media_id FROM mentions_edges WHERE to_pokemon = ?",
+                ("Bulbasaur",),
+            )
+        )
+
+    assert journal_mode == "wal"
+    assert [n["name"] for n in nodes] == ["Bulbasaur"]
+    assert sorted(related["types"]) == ["Grass", "Poison"]
+    assert related["evolves_to"] == ["Ivysaur"]
+    assert related["mentioned_in"] == ["bulbasaur_fact"]
+    assert "idx_mentions_edges_to" in plan
+
+
+def test_build_graph_context_with_sqlite_backend(tmp_path, monkeypatch):
+    db_path = tmp_path / "graph.db"
+    monkeypatch.setattr(graph_store, "GRAPH_DB", db_path, raising=True)
+    monkeypatch.setattr(graph_store, "GRAPH_BACKEND", "sqlite", raising=True)
+
+    graph_store.upsert_fragments([_fragment("charmander_fact", "Charmander", ["Fire"])])
+
+    result = graph_store.build_graph_context("Tell me about Charmander")
+    assert result["node"]["name"] == "Charmander"
+    assert "Types: Fire" in result["context"]
+    assert "charmander_fact" in result["context"]
+
+
+def test_remove_media_drops_mentions_from_json_and_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "graph.db"
+    graph_json = tmp_path / "graph.json"
+    fragments = [
+        _fragment("bulbasaur_fact", "Bulbasaur", ["Grass", "Poison"]),
+        _fragment("charmander_fact", "Charmander", ["Fire"]),
+    ]
+    graph_store.upsert_fragments(fragments, path=db_path)
+    graph_json.write_text(
+        json.dumps(graph_store.load_graph_from_db(db_path)), encoding="utf-8"
+    )
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_json)
+
+    removed = graph_store.remove_media(["charmander_fact"], path=db_path)
+
+    assert removed == 1
+    for graph in (graph_store.load_graph(), graph_store.load_graph_from_db(db_path)):
+        assert graph["mentions_edges"] == [
+            {"from_media_id": "bulbasaur_fact", "to_pokemon": "Bulbasaur"}
+        ]
+        assert len(graph["pokemon_nodes"]) == 2
+
+
+def test_graph_rewrites_wait_for_the_graph_write_lock(tmp_path, monkeypatch):
+    db_path = tmp_path / "graph.db"
+    graph_json = tmp_path / "graph.json"
+    graph_store.upsert_fragments(
+        [
+            _fragment("bulbasaur_fact", "Bulbasaur", ["Grass", "Poison"]),
+            _fragment("charmander_fact", "Charmander", ["Fire"]),
+        ],
+        path=db_path,
+    )
+    graph_json.write_text(
+        json.dumps(graph_store.load_graph_from_db(db_path)), encoding="utf-8"
+    )
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_json)
+    removed = threading.Event()
+
+    def remove_charmander():
+        graph_store.remove_media(["charmander_fact"], path=db_path)
+        removed.set()
+
+    with graph_store.graph_write_lock():
+        writer = threading.Thread(target=remove_charmander)
+        writer.start()
+        assert not removed.wait(0.2)
+        # The holder can still write: the lock is reentrant per thread.
+        assert graph_store.remove_media(["bulbasaur_fact"], path=db_path) == 1
+    writer.join(5)
+
+    assert removed.is_set()
+    assert graph_store.load_graph()["mentions_edges"] == []
@@ -1,8 +1,8 @@
-import json
 from pathlib import Path
 from typing import Any, Dict
 
 import scripts.ingest_images_corpus as ingest_corpus
+from ingestion import record_store
 from ingestion.image_ingestion import (
     extract_text_from_image,
     ingest_image,
@@ -44,7 +44,7 @@ def test_ingest_image(tmp_path: Path, monkeypatch):
         str(img_path), pokemon="Bulbasaur", generation=1, types=["Grass", "Poison"]
     )
 
-    assert record["id"] == img_path.stem
+    assert record["id"] == f"image:{img_path.name}"
     assert record["modality"] == "image"
     assert record["source_path"].endswith("bulbasaur_card.png")
     assert record["pokemon"] == "Bulbasaur"
@@ -56,10 +56,7 @@ def test_ingest_image(tmp_path: Path, monkeypatch):
     assert len(record["text"]) > 0
 
 
-def test_write_image_record_creates_valid_jsonl(tmp_path, monkeypatch):
-    temp_jsonl = tmp_path / "images.jsonl"
-    monkeypatch.setattr("ingestion.image_ingestion.IMAGES_JSONL", temp_jsonl)
-
+def test_write_image_record_upserts_into_record_store():
     record = {
         "id": "bulbasaur_test",
         "modality": "text",
@@ -72,12 +69,12 @@ def test_write_image_record_creates_valid_jsonl(tmp_path, monkeypatch):
     }
 
     write_image_record(record)
+    write_image_record(record)  # upsert: writing again must not duplicate
 
-    assert temp_jsonl.exists()
-    lines = temp_jsonl.read_text(encoding="utf-8").splitlines()
-    assert len(lines) == 1
+    records = list(record_store.iter_records())
+    assert len(records) == 1
 
-    loaded = json.loads(lines[0])
+    loaded = record_store.get_record("bulbasaur_test")
     assert loaded["id"] == "bulbasaur_test"
     assert loaded["pokemon"] == "Bulbasaur"
     assert "Bulbasaur" in loaded["text"]
@@ -94,7 +91,9 @@ def test_add_image_moves_file_and_ingests(tmp_path, monkeypatch):
 
     calls: Dict[str, Any] = {}
 
-    def fake_ingest_image(path: str, pokemon: str, generation: int, types: list[str]):
+    def fake_ingest_image(
+        path: str, pokemon: str, generation: int, types: list[str], content_hash=None
+    ):
         calls["ingest_args"] = (Path(path), pokemon, generation, types)
         return {
             "id": "charmander_card",
@@ -125,3 +124,24 @@ def test_add_image_moves_file_and_ingests(tmp_path, monkeypatch):
     assert "fire" in [t.lower() for t in types]
     assert calls["written_record"] == record
     assert record["pokemon"] == "Charmander"
+
+
+def test_add_image_reuses_the_upload_hash_for_ocr(tmp_path, monkeypatch):
+    from ingestion import image_ingestion, media_cache
+
+    def no_rehash(path):
+        raise AssertionError(f"{path} was hashed again")
+
+    monkeypatch.setattr(ingest_corpus, "RAW_IMAGE_DIR", tmp_path / "images")
+    monkeypatch.setattr(media_cache, "file_sha256", no_rehash)
+    monkeypatch.setattr(image_ingestion, "_ocr_file", lambda path: "Charmander")
+    monkeypatch.setattr(image_ingestion, "embed_text", lambda text: [0.0] * 1536)
+    monkeypatch.setattr(image_ingestion, "upsert_document", lambda **kwargs: None)
+    upload = tmp_path / "charmander_card.png"
+    upload.write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    record = ingest_corpus.add_image(upload, content_hash="upload-sha")
+
+    assert record["text"] == "Charmander"
+    ocr = image_ingestion.ocr_version()
+    assert media_cache.get_cached_result("upload-sha", "image_ocr", ocr) == "Charmander"
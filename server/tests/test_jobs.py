@@ -0,0 +1,227 @@
+import multiprocessing
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from api.main import app
+from fastapi.testclient import TestClient
+from jobs import runner, store
+
+client = TestClient(app)
+
+
+def _slow_job(seconds: float) -> dict:
+    store.report_progress(0.5, "halfway")
+    time.sleep(seconds)
+    return {"slept": seconds}
+
+
+def _failing_job() -> None:
+    raise ValueError("no such Pokemon")
+
+
+def _job_with_pool_worker(pid_file: str) -> None:
+    # Stands in for the extract / Whisper pools an ingest job starts.
+    child = multiprocessing.get_context("fork").Process(target=time.sleep, args=(60,))
+    child.start()
+    Path(pid_file).write_text(str(child.pid))
+    time.sleep(60)
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        state = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()[0]
+    except FileNotFoundError:
+        return False
+    return state != "Z"
+
+
+def _wait_for(job_id: str, job_runner: runner.JobRunner, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job_runner.poll()
+        job = store.get_job(job_id)
+        if job["status"] in store.FINISHED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {store.get_job(job_id)}")
+
+
+@pytest.fixture
+def fork_runner(monkeypatch):
+    # fork so the worker processes see the monkeypatched kinds and job store.
+    monkeypatch.setitem(runner.JOB_KINDS, "slow", _slow_job)
+    monkeypatch.setitem(runner.JOB_KINDS, "fail", _failing_job)
+    monkeypatch.setitem(runner.JOB_KINDS, "pool", _job_with_pool_worker)
+    job_runner = runner.JobRunner(
+        workers=2, mp_context=multiprocessing.get_context("fork")
+    )
+    yield job_runner
+    for proc in job_runner._running.values():
+        proc.terminate()
+        proc.join()
+
+
+def test_job_store_lifecycle():
+    job = store.create_job("ingest")
+    assert job["status"] == store.QUEUED
+
+    claimed = store.claim_next_job(worker_pid=123)
+    assert claimed["id"] == job["id"]
+    assert claimed["status"] == store.RUNNING
+    assert store.claim_next_job() is None
+
+    store.update_progress(job["id"], 0.25, "a quarter")
+    store.finish_job(job["id"], store.SUCCEEDED, result={"files": 4})
+    # A finished job keeps its outcome.
+    store.finish_job(job["id"], store.FAILED, error="late")
+
+    done = store.get_job(job["id"])
+    assert done["status"] == store.SUCCEEDED
+    assert done["progress"] == 1
+    assert done["result"] == {"files": 4}
+    assert done["error"] is None
+
+
+def test_cancel_queued_job_and_requeue_interrupted():
+    queued = store.create_job("ingest")
+    assert store.request_cancel(queued["id"])["status"] == store.CANCELLED
+
+    interrupted = store.create_job("process")
+    store.claim_next_job()
+    assert store.requeue_interrupted() == 1
+    assert store.get_job(interrupted["id"])["status"] == store.QUEUED
+
+
+def test_runner_runs_jobs_in_worker_processes(fork_runner):
+    ok = runner.submit_job("slow", seconds=0.1)
+    bad = runner.submit_job("fail")
+
+    done = _wait_for(ok["id"], fork_runner)
+    failed = _wait_for(bad["id"], fork_runner)
+
+    assert done["status"] == store.SUCCEEDED
+    assert done["result"] == {"slept": 0.1}
+    assert done["message"] == "halfway"
+    assert failed["status"] == store.FAILED
+    assert "no such Pokemon" in failed["error"]
+
+
+def test_runner_cancels_running_job(fork_runner):
+    job = runner.submit_job("slow", seconds=60)
+    fork_runner.poll()
+    assert store.get_job(job["id"])["status"] == store.RUNNING
+
+    store.request_cancel(job["id"])
+    cancelled = _wait_for(job["id"], fork_runner, timeout=10)
+
+    assert cancelled["status"] == store.CANCELLED
+    assert not fork_runner._running
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="needs procfs")
+def test_cancel_terminates_processes_started_by_the_job(fork_runner, tmp_path):
+    pid_file = tmp_path / "child.pid"
+    job = runner.submit_job("pool", pid_file=str(pid_file))
+    fork_runner.poll()
+
+    deadline = time.monotonic() + 10
+    while not pid_file.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    child_pid = int(pid_file.read_text())
+    assert _pid_running(child_pid)
+
+    store.request_cancel(job["id"])
+    assert _wait_for(job["id"], fork_runner)["status"] == store.CANCELLED
+
+    deadline = time.monotonic() + 5
+    while _pid_running(child_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _pid_running(child_pid)
+
+
+def test_runner_runs_one_job_per_lock(fork_runner, monkeypatch):
+    monkeypatch.setitem(runner.JOB_LOCKS, "slow", "corpus")
+    first = runner.submit_job("slow", seconds=0.3)
+    second = runner.submit_job("slow", seconds=0.1)
+    unlocked = runner.submit_job("fail")
+
+    fork_runner.poll()
+    assert store.get_job(first["id"])["status"] == store.RUNNING
+    assert store.get_job(second["id"])["status"] == store.QUEUED
+    # Dispatched alongside; it may already have failed by now.
+    assert store.get_job(unlocked["id"])["status"] != store.QUEUED
+
+    assert _wait_for(first["id"], fork_runner)["status"] == store.SUCCEEDED
+    assert _wait_for(second["id"], fork_runner)["status"] == store.SUCCEEDED
+
+
+def test_in_process_jobs_share_locks_with_queued_jobs():
+    held = store.start_job("ingest", locks=runner.JOB_LOCKS)
+    upload = store.create_job("add_file", {"modality": "text", "path": "a.txt"})
+    build = store.create_job("process")
+
+    assert store.claim_next_job(locks=runner.JOB_LOCKS)["id"] == build["id"]
+    assert store.claim_next_job(locks=runner.JOB_LOCKS) is None
+    assert store.start_job("add_file", locks=runner.JOB_LOCKS) is None
+
+    store.finish_job(held["id"], store.SUCCEEDED)
+    assert store.claim_next_job(locks=runner.JOB_LOCKS)["id"] == upload["id"]
+
+
+def test_run_locked_waits_for_the_running_job_holding_its_lock(monkeypatch):
+    monkeypatch.setattr(runner, "JOB_POLL_SECONDS", 0.01)
+    running = store.create_job("ingest")
+    store.claim_next_job(locks=runner.JOB_LOCKS)
+    timer = threading.Timer(0.2, store.finish_job, (running["id"], store.SUCCEEDED))
+    timer.start()
+
+    status = runner.run_locked(
+        "add_file", lambda: store.get_job(running["id"])["status"], {"path": "a.txt"}
+    )
+
+    timer.join()
+    assert status == store.SUCCEEDED
+    (inline,) = [j for j in store.list_jobs() if j["kind"] == "add_file"]
+    assert inline["status"] == store.SUCCEEDED
+    assert inline["params"] == {"path": "a.txt"}
+
+
+def test_submit_job_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        runner.submit_job("nope")
+
+
+def test_background_ingest_returns_job_and_status_endpoints():
+    resp = client.post("/ingest?background=true")
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+
+    status = client.get(f"/jobs/{job_id}").json()
+    assert status["kind"] == "ingest"
+    assert status["status"] == "queued"
+    assert client.get(f"/jobs/{job_id}/result").status_code == 409
+
+    assert client.post(f"/jobs/{job_id}/cancel").json()["status"] == "cancelled"
+    result = client.get(f"/jobs/{job_id}/result").json()
+    assert result["status"] == "cancelled"
+    assert [j["job_id"] for j in client.get("/jobs").json()] == [job_id]
+    assert client.get("/jobs/missing").status_code == 404
+
+
+def test_background_upload_queues_add_file_job(tmp_path, monkeypatch):
+    from api.routes import ingest as ingest_routes
+
+    monkeypatch.setattr(ingest_routes, "RAW_TEXT_DIR", tmp_path / "text")
+
+    resp = client.post(
+        "/add/text?background=true",
+        files={"file": ("bulbasaur_notes.txt", b"Bulbasaur", "text/plain")},
+    )
+
+    assert resp.status_code == 202
+    job = store.get_job(resp.json()["job_id"])
+    assert job["kind"] == "add_file"
+    assert job["params"]["modality"] == "text"
+    assert job["params"]["path"] == str(tmp_path / "text" / "bulbasaur_notes.txt")
@@ -0,0 +1,83 @@
+import json
+from typing import Any, Dict
+
+from processing import entity_extraction, llm_cache
+
+
+def _payload(media_id: str) -> Dict[str, Any]:
+    return {
+        "pokemon_nodes": [
+            {
+                "name": "Squirtle",
+                "generation": 1,
+                "primary_type": "Water",
+                "secondary_type": "",
+            }
+        ],
+        "type_nodes": [{"name": "Water"}],
+        "pokemon_type_edges": [{"from_pokemon": "Squirtle", "to_type": "Water"}],
+        "evolution_edges": [],
+        "mentions_edges": [{"from_media_id": media_id, "to_pokemon": "Squirtle"}],
+    }
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = 0
+        client = self
+
+        class Responses:
+            def create(self, **kwargs):
+                client.calls += 1
+                media_id = kwargs["input"][1]["content"].split("\n")[0].split(": ")[1]
+                text = json.dumps(_payload(media_id))
+                content = type("C", (), {"text": text})()
+                item = type("O", (), {"content": [content]})()
+                return type("R", (), {"output": [item]})()
+
+        self.responses = Responses()
+
+
+def test_identical_text_is_extracted_once(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(entity_extraction, "openai_client", fake, raising=True)
+
+    first = entity_extraction.extract_entities(
+        "Squirtle is a Water-type starter.", "squirtle_card", "Squirtle"
+    )
+    second = entity_extraction.extract_entities(
+        "Squirtle is a Water-type starter.", "squirtle_card_copy", "Squirtle"
+    )
+    entity_extraction.extract_entities(
+        "Squirtle is a Water-type starter.", "squirtle_card", "Wartortle"
+    )
+
+    assert fake.calls == 2  # the hint is part of the key
+    assert first["mentions_edges"][0]["from_media_id"] == "squirtle_card"
+    assert second["mentions_edges"][0]["from_media_id"] == "squirtle_card_copy"
+    assert second["pokemon_nodes"] == first["pokemon_nodes"]
+
+
+def test_schema_change_invalidates_entries(monkeypatch):
+    key = llm_cache.make_cache_key("text", None, "gpt-4o-mini", 0.1, "schema-v1")
+    llm_cache.put_cached_extraction(key, "doc", "schema-v1", _payload("doc"))
+    assert llm_cache.get_cached_extraction(key, "doc", "schema-v1") is not None
+
+    assert llm_cache.get_cached_extraction(key, "doc", "schema-v2") is None
+    assert llm_cache.get_cached_extraction(key, "doc", "schema-v1") is None
+
+
+def test_cache_is_size_bounded_with_lru_eviction(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_MAX_ENTRIES", 2, raising=True)
+    keys = [
+        llm_cache.make_cache_key(f"text {i}", None, "m", 0.1, "s") for i in range(3)
+    ]
+
+    llm_cache.put_cached_extraction(keys[0], "a", "s", _payload("a"))
+    llm_cache.put_cached_extraction(keys[1], "b", "s", _payload("b"))
+    assert llm_cache.get_cached_extraction(keys[0], "a", "s") is not None
+    llm_cache.put_cached_extraction(keys[2], "c", "s", _payload("c"))
+
+    assert llm_cache.get_cached_extraction(keys[0], "a", "s") is not None
+    assert llm_cache.get_cached_extraction(keys[1], "b", "s") is None
+    assert llm_cache.get_cached_extraction(keys[2], "c", "s") is not None
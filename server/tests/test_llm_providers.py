@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from processing import llm_providers
+from processing.graph_schema import JSON_GRAPH_SCHEMA
+
+
+def test_provider_and_model_are_configurable_per_stage(monkeypatch):
+    monkeypatch.setattr(llm_providers, "LLM_PROVIDER", "openai")
+    monkeypatch.setenv("LLM_PROVIDER_EXTRACTION", "openai_compatible")
+    monkeypatch.setenv("LLM_MODEL_EXTRACTION", "llama3.1:8b")
+
+    assert llm_providers.get_provider_name("extraction") == "openai_compatible"
+    assert llm_providers.get_model("extraction") == "llama3.1:8b"
+    assert llm_providers.get_provider_name("chat") == "openai"
+    assert llm_providers.get_model("chat") == "gpt-4o-mini"
+
+    monkeypatch.setenv("LLM_PROVIDER_CHAT", "anthropic")
+    with pytest.raises(ValueError):
+        llm_providers.get_provider_name("chat")
+
+
+def test_openai_client_is_built_lazily(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("LLM_PROVIDER_CHAT", "openai")
+
+    client = llm_providers.get_llm_client("chat")  # no key needed yet
+
+    with pytest.raises(KeyError):
+        client.responses
+
+
+def test_fake_client_is_deterministic_and_schema_valid(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER_EXTRACTION", "fake")
+    client = llm_providers.get_llm_client("extraction")
+
+    response = client.responses.create(
+        model="fake-model",
+        input=[{"role": "user", "content": "Bulbasaur"}],
+        text={"format": {"type": "json_schema", "schema": JSON_GRAPH_SCHEMA}},
+    )
+    data = json.loads(response.output[0].content[0].text)
+    assert set(data) == set(JSON_GRAPH_SCHEMA["required"])
+    assert all(v == [] for v in data.values())
+
+    chat = client.responses.create(
+        model="fake-model",
+        input=[
+            {"role": "system", "content": "You are a pokemon expert."},
+            {"role": "user", "content": "What is Bulbasaur?\n\nGraph Context:"},
+        ],
+    )
+    assert chat.output[0].content[0].text == "[fake-model] What is Bulbasaur?"
+
+    first = client.embeddings.create(model="m", input="What type is Bulbasaur?")
+    second = client.embeddings.create(model="m", input="What type is Bulbasaur?")
+    assert first.data[0].embedding == second.data[0].embedding
+    assert len(first.data[0].embedding) == 1536
@@ -0,0 +1,183 @@
+import os
+import time
+from typing import Any, Dict, List
+
+import scripts.ingest as ingest_script
+from ingestion import manifest, record_store
+from ingestion.hashing import file_sha256
+
+
+def test_check_file_skips_unchanged_and_touched_files(tmp_path):
+    path = tmp_path / "bulbasaur.txt"
+    path.write_text("Bulbasaur", encoding="utf-8")
+
+    with manifest.manifest_db() as conn:
+        assert manifest.check_file(conn, path)["content_hash"] == file_sha256(path)
+
+        manifest.mark_ingested(path, "text", "bulbasaur")
+        assert manifest.check_file(conn, path) is None
+
+        # Same bytes, new mtime: hashed once, then skipped.
+        os.utime(path, ns=(0, 1_000_000_000))
+        assert manifest.check_file(conn, path) is None
+        assert manifest.get_entry(conn, path)["mtime_ns"] == 1_000_000_000
+
+        path.write_text("Bulbasaur, the Seed Pokémon", encoding="utf-8")
+        assert manifest.check_file(conn, path)["content_hash"] == file_sha256(path)
+
+
+def test_mark_ingested_stores_the_stat_taken_with_the_hash(tmp_path):
+    path = tmp_path / "bulbasaur.txt"
+    path.write_text("Bulbasaur", encoding="utf-8")
+
+    with manifest.manifest_db() as conn:
+        state = manifest.check_file(conn, path)
+
+        # Edited while the planned content is being ingested.
+        path.write_text("Bulbasaur, the Seed Pokémon", encoding="utf-8")
+        os.utime(path, ns=(0, state["mtime_ns"] + 1_000_000_000))
+        manifest.mark_ingested(path, "text", "text:bulbasaur.txt", state=state)
+
+        entry = manifest.get_entry(conn, path)
+        assert entry["mtime_ns"] == state["mtime_ns"]
+        assert manifest.check_file(conn, path)["content_hash"] == file_sha256(path)
+
+
+def test_check_file_reingests_after_pipeline_version_bump(tmp_path, monkeypatch):
+    path = tmp_path / "bulbasaur.txt"
+    path.write_text("Bulbasaur", encoding="utf-8")
+    manifest.mark_ingested(path, "text", "bulbasaur")
+
+    monkeypatch.setattr(manifest, "PIPELINE_VERSION", "next")
+    with manifest.manifest_db() as conn:
+        assert manifest.check_file(conn, path) is not None
+
+
+def test_check_file_reingests_when_the_sidecar_changes(tmp_path):
+    path = tmp_path / "mystery.txt"
+    path.write_text("A Pokémon", encoding="utf-8")
+    sidecar = tmp_path / "mystery.txt.meta.json"
+
+    with manifest.manifest_db() as conn:
+        manifest.mark_ingested(path, "text", "text:mystery.txt")
+        assert manifest.check_file(conn, path) is None
+
+        sidecar.write_text('{"pokemon": "Bulbasaur"}', encoding="utf-8")
+        assert manifest.check_file(conn, path)["content_hash"] == file_sha256(path)
+
+        manifest.mark_ingested(path, "text", "text:mystery.txt")
+        assert manifest.check_file(conn, path) is None
+
+        # Touched without changes: skipped, and the new mtime is remembered.
+        os.utime(sidecar, ns=(0, 1_000_000_000))
+        assert manifest.check_file(conn, path) is None
+        assert manifest.get_entry(conn, path)["sidecar_mtime_ns"] == 1_000_000_000
+
+        sidecar.write_text('{"pokemon": "Ivysaur"}', encoding="utf-8")
+        assert manifest.check_file(conn, path) is not None
+
+        manifest.mark_ingested(path, "text", "text:mystery.txt")
+        sidecar.unlink()
+        assert manifest.check_file(conn, path) is not None
+
+
+def test_claims_lapse_after_the_ttl(tmp_path):
+    path = tmp_path / "bulbasaur.txt"
+    manifest.claim(path)
+
+    with manifest.manifest_db() as conn:
+        assert manifest.is_claimed(conn, path)
+        later = time.time() + manifest.INGEST_CLAIM_TTL_SECONDS + 1
+        assert not manifest.is_claimed(conn, path, now=later)
+
+
+def _record_ids() -> List[str]:
+    return sorted(r["id"] for r in record_store.iter_records())
+
+
+def test_ingest_only_touches_new_changed_and_deleted_files(tmp_path, monkeypatch):
+    text_dir = tmp_path / "raw"
+    text_dir.mkdir()
+    (text_dir / "bulbasaur_notes.txt").write_text("Bulbasaur", encoding="utf-8")
+    (text_dir / "charmander_notes.txt").write_text("Charmander", encoding="utf-8")
+
+    monkeypatch.setattr(ingest_script, "CORPORA", [("text", text_dir, {".txt"})])
+    monkeypatch.setattr(ingest_script, "INGEST_EXTRACT_WORKERS", 1)
+    monkeypatch.setattr(ingest_script, "embed_text", lambda text: [0.0] * 1536)
+
+    upserts: List[str] = []
+    deleted: List[str] = []
+    removed_media: List[str] = []
+    monkeypatch.setattr(
+        ingest_script,
+        "upsert_document",
+        lambda doc_id, vector, metadata: upserts.append(doc_id),
+    )
+    monkeypatch.setattr(ingest_script, "delete_documents", deleted.extend)
+    monkeypatch.setattr(
+        ingest_script.graph_store, "remove_media", lambda ids: removed_media.extend(ids)
+    )
+
+    summary: Dict[str, Any] = ingest_script.main()
+    assert sorted(upserts) == ["text:bulbasaur_notes.txt", "text:charmander_notes.txt"]
+    assert summary["unchanged"] == 0
+
+    upserts.clear()
+    summary = ingest_script.main()
+    assert upserts == []
+    assert summary["unchanged"] == 2
+    assert _record_ids() == ["text:bulbasaur_notes.txt", "text:charmander_notes.txt"]
+
+    (text_dir / "bulbasaur_notes.txt").write_text("Bulbasaur v2", encoding="utf-8")
+    (text_dir / "charmander_notes.txt").unlink()
+    summary = ingest_script.main()
+
+    assert upserts == ["text:bulbasaur_notes.txt"]
+    assert deleted == ["text:charmander_notes.txt"]
+    assert removed_media == ["text:charmander_notes.txt"]
+    assert summary["deleted"] == 1
+    assert _record_ids() == ["text:bulbasaur_notes.txt"]
+    assert record_store.get_record("text:bulbasaur_notes.txt")["text"] == "Bulbasaur v2"
+
+
+def test_files_sharing_a_stem_keep_separate_records(tmp_path, monkeypatch):
+    text_dir, image_dir = tmp_path / "text", tmp_path / "images"
+    text_dir.mkdir()
+    image_dir.mkdir()
+    txt = text_dir / "bulbasaur.txt"
+    txt.write_text("Bulbasaur notes", encoding="utf-8")
+    (image_dir / "bulbasaur.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    monkeypatch.setattr(
+        ingest_script,
+        "CORPORA",
+        [("text", text_dir, {".txt"}), ("image", image_dir, {".png"})],
+    )
+    monkeypatch.setattr(ingest_script, "INGEST_EXTRACT_WORKERS", 1)
+    monkeypatch.setattr(ingest_script, "embed_text", lambda text: [0.0] * 1536)
+    monkeypatch.setattr(
+        ingest_script,
+        "extract_text_from_image",
+        lambda path, content_hash=None: "Bulbasaur card",
+    )
+    monkeypatch.setattr(ingest_script, "upsert_document", lambda **kwargs: None)
+    deleted: List[str] = []
+    monkeypatch.setattr(ingest_script, "delete_documents", deleted.extend)
+    monkeypatch.setattr(ingest_script.graph_store, "remove_media", lambda ids: None)
+
+    # Written under the old bare-stem id, which both files mapped to.
+    record_store.upsert_records(
+        [{"id": "bulbasaur", "modality": "text", "source_path": str(txt)}]
+    )
+    manifest.mark_ingested(txt, "text", "bulbasaur")
+
+    ingest_script.main()
+
+    assert deleted == ["bulbasaur"]
+    assert _record_ids() == ["image:bulbasaur.png", "text:bulbasaur.txt"]
+
+    (image_dir / "bulbasaur.png").unlink()
+    ingest_script.main()
+
+    assert _record_ids() == ["text:bulbasaur.txt"]
+    assert record_store.get_record("text:bulbasaur.txt")["text"] == "Bulbasaur notes"
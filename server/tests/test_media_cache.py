@@ -0,0 +1,173 @@
+import shutil
+
+from ingestion import audio_ingestion, image_ingestion, media_cache, text_ingestion
+from PIL import Image
+
+
+def _counting(result):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result
+
+    return compute, calls
+
+
+def test_cached_extraction_hits_for_renamed_copy(tmp_path):
+    original = tmp_path / "a.bin"
+    original.write_bytes(b"same bytes")
+    copy = tmp_path / "renamed.bin"
+    shutil.copy(original, copy)
+
+    compute, calls = _counting({"text": "hello"})
+    assert media_cache.cached_extraction(str(original), "x", "v1", compute) == {
+        "text": "hello"
+    }
+    assert media_cache.cached_extraction(str(copy), "x", "v1", compute) == {
+        "text": "hello"
+    }
+    assert len(calls) == 1
+
+
+def test_cached_extraction_misses_on_new_version_or_extractor(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"data")
+    compute, calls = _counting("text")
+
+    media_cache.cached_extraction(str(path), "x", "v1", compute)
+    media_cache.cached_extraction(str(path), "x", "v2", compute)
+    media_cache.cached_extraction(str(path), "y", "v1", compute)
+    assert len(calls) == 3
+
+
+def test_cached_extraction_misses_on_changed_bytes(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"one")
+    compute, calls = _counting("text")
+
+    media_cache.cached_extraction(str(path), "x", "v1", compute)
+    path.write_bytes(b"two")
+    media_cache.cached_extraction(str(path), "x", "v1", compute)
+    assert len(calls) == 2
+
+
+def test_cached_extraction_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_ENABLED", False)
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"data")
+    compute, calls = _counting("text")
+
+    media_cache.cached_extraction(str(path), "x", "v1", compute)
+    media_cache.cached_extraction(str(path), "x", "v1", compute)
+    assert len(calls) == 2
+    assert not media_cache.MEDIA_CACHE_DB.exists()
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_MAX_ENTRIES", 2)
+    times = iter(range(100))
+    monkeypatch.setattr(media_cache.time, "time", lambda: next(times))
+
+    media_cache.put_cached_result("h1", "x", "v1", "one")
+    media_cache.put_cached_result("h2", "x", "v1", "two")
+    assert media_cache.get_cached_result("h1", "x", "v1") == "one"  # refresh h1
+    media_cache.put_cached_result("h3", "x", "v1", "three")
+
+    assert media_cache.get_cached_result("h1", "x", "v1") == "one"
+    assert media_cache.get_cached_result("h2", "x", "v1") is None
+    assert media_cache.get_cached_result("h3", "x", "v1") == "three"
+
+
+def test_extract_text_from_image_uses_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_ocr(path):
+        calls.append(path)
+        return "Bulbasaur"
+
+    monkeypatch.setattr(image_ingestion, "_ocr_file", fake_ocr)
+    first = tmp_path / "a.png"
+    Image.new("RGB", (8, 8), "white").save(first)
+    second = tmp_path / "b.png"
+    shutil.copy(first, second)
+
+    assert image_ingestion.extract_text_from_image(str(first)) == "Bulbasaur"
+    assert image_ingestion.extract_text_from_image(str(second)) == "Bulbasaur"
+    assert len(calls) == 1
+
+
+def test_extract_text_from_audio_uses_cache(tmp_path, monkeypatch):
+    class FakePool:
+        def __init__(self):
+            self.calls = 0
+
+        def transcribe(self, path):
+            self.calls += 1
+            return "Charmander line"
+
+    pool = FakePool()
+    monkeypatch.setattr(audio_ingestion, "get_transcription_pool", lambda: pool)
+    path = tmp_path / "clip.mp3"
+    path.write_bytes(b"ID3 fake audio")
+
+    assert audio_ingestion.extract_text_from_audio(path) == "Charmander line"
+    assert audio_ingestion.extract_text_from_audio(path) == "Charmander line"
+    assert pool.calls == 1
+
+
+def test_extract_pdf_pages_uses_cache(tmp_path, monkeypatch):
+    calls = []
+    pages = [{"page": 1, "text": "Squirtle", "ocr": False}]
+
+    def fake_extract(path):
+        calls.append(path)
+        return pages
+
+    monkeypatch.setattr(text_ingestion, "_extract_pdf_pages", fake_extract)
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4 fake")
+
+    assert text_ingestion.extract_text_from_pdf(str(path)) == "Squirtle"
+    assert text_ingestion.extract_text_from_pdf(str(path)) == "Squirtle"
+    assert len(calls) == 1
+
+    monkeypatch.setattr(text_ingestion, "PDF_CODE_VERSION", "2")
+    text_ingestion.extract_pdf_pages(str(path))
+    assert len(calls) == 2
+
+
+def test_extractors_reuse_a_supplied_content_hash(tmp_path, monkeypatch):
+    def no_rehash(path):
+        raise AssertionError(f"{path} was hashed again")
+
+    monkeypatch.setattr(media_cache, "file_sha256", no_rehash)
+    monkeypatch.setattr(image_ingestion, "_ocr_file", lambda path: "Bulbasaur")
+    monkeypatch.setattr(
+        text_ingestion,
+        "_extract_pdf_pages",
+        lambda path: [{"page": 1, "text": "Squirtle", "ocr": False}],
+    )
+
+    class FakePool:
+        def transcribe(self, path):
+            return "Charmander line"
+
+    monkeypatch.setattr(audio_ingestion, "get_transcription_pool", FakePool)
+
+    image = tmp_path / "a.png"
+    image.write_bytes(b"png")
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    audio = tmp_path / "clip.mp3"
+    audio.write_bytes(b"ID3 fake audio")
+
+    assert image_ingestion.extract_text_from_image(str(image), "h1") == "Bulbasaur"
+    assert text_ingestion.extract_pdf_pages(str(pdf), "h2")[0]["text"] == "Squirtle"
+    assert (
+        audio_ingestion.extract_text_from_audio(str(audio), content_hash="h3")
+        == "Charmander line"
+    )
+    assert media_cache.get_cached_result(
+        "h1", "image_ocr", image_ingestion.ocr_version()
+    ) == ("Bulbasaur")
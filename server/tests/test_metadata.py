@@ -0,0 +1,60 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from ingestion.metadata import MetadataResolver, load_mapping
+from scripts.ingest_text_corpus import resolve_metadata
+
+
+def test_longest_name_wins_over_first_mapping_entry():
+    resolver = MetadataResolver()
+
+    assert resolver.resolve(Path("ivysaur_vs_venusaur.txt"))[0] == "Venusaur"
+    assert resolver.resolve(Path("Pidgeotto-notes.pdf"))[0] == "Pidgeotto"
+    assert resolver.resolve(Path("nidoran_female.png"))[0] == "Nidoran♀"
+    assert resolver.resolve(Path("bulbasaur1.mp3")) == (
+        "Bulbasaur",
+        1,
+        ["grass", "poison"],
+    )
+
+
+def test_corpus_scripts_share_resolver(tmp_path):
+    with pytest.raises(ValueError, match="Could not resolve metadata"):
+        resolve_metadata(tmp_path / "unknown_creature.txt")
+
+
+def test_sidecar_overrides_file_name(tmp_path):
+    path = tmp_path / "card_0001.png"
+    (tmp_path / "card_0001.png.meta.json").write_text(
+        json.dumps({"pokemon": "charizard"}), encoding="utf-8"
+    )
+    assert MetadataResolver().resolve(path) == ("Charizard", 1, ["fire", "flying"])
+
+    (tmp_path / "card_0001.png.meta.json").write_text(
+        json.dumps({"pokemon": "Mew", "generation": 1, "types": ["psychic"]}),
+        encoding="utf-8",
+    )
+    assert MetadataResolver({}).resolve(path) == ("Mew", 1, ["psychic"])
+
+
+def test_mapping_loads_from_json_and_sqlite(tmp_path):
+    json_path = tmp_path / "mapping.json"
+    json_path.write_text(
+        json.dumps({"Totodile": ["Totodile", 2, ["water"]]}), encoding="utf-8"
+    )
+    db_path = tmp_path / "mapping.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute(
+        "CREATE TABLE pokemon_mapping (key TEXT, pokemon TEXT, generation INT, types TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO pokemon_mapping VALUES ('Chikorita', 'Chikorita', 2, '[\"grass\"]')"
+    )
+    conn.commit()
+    conn.close()
+
+    assert load_mapping(str(json_path)) == {"Totodile": ("Totodile", 2, ["water"])}
+    resolver = MetadataResolver.from_source(str(db_path))
+    assert resolver.resolve(Path("chikorita_intro.txt")) == ("Chikorita", 2, ["grass"])
@@ -0,0 +1,86 @@
+import threading
+from typing import Any, List
+
+import numpy as np
+from ingestion import ocr
+from PIL import Image, ImageDraw
+
+
+def _card(background, ink, size=(400, 200)) -> Image.Image:
+    img = Image.new("RGB", size, background)
+    ImageDraw.Draw(img).text((10, 80), "Bulbasaur", fill=ink)
+    return img
+
+
+def test_preprocess_gives_dark_text_on_white_for_any_background():
+    for background, ink in [("white", "black"), ((30, 90, 160), "white")]:
+        out = np.asarray(ocr.preprocess_image(_card(background, ink)))
+
+        assert set(np.unique(out)) <= {0, 255}
+        ink_fraction = (out == 0).mean()
+        assert 0 < ink_fraction < 0.1  # glyphs only, background is white
+
+
+def test_preprocess_downscales_high_dpi_images():
+    img = _card("white", "black", size=(1200, 600))
+    img.info["dpi"] = (600, 600)
+
+    out = ocr.preprocess_image(img)
+
+    assert out.size == (600, 300)
+
+
+def test_tall_images_are_ocrd_in_overlapping_strips(monkeypatch):
+    monkeypatch.setattr(ocr, "OCR_PREPROCESS", False)
+    monkeypatch.setattr(ocr, "OCR_TILE_HEIGHT", 100)
+    monkeypatch.setattr(ocr, "OCR_TILE_OVERLAP", 20)
+
+    calls: List[tuple] = []
+
+    def fake_tesseract(tile: Image.Image) -> str:
+        calls.append(tile.size)
+        # Row y has pixel value y, so a strip knows where it starts; each
+        # strip re-reads the line that straddles its top boundary.
+        index = tile.getpixel((0, 0)) // 80 + 1
+        return f"line {index - 1}\nline {index}" if index > 1 else "line 1"
+
+    monkeypatch.setattr(ocr, "_tesseract", fake_tesseract)
+
+    rows = np.repeat(np.arange(250, dtype=np.uint8)[:, None], 50, axis=1)
+    text = ocr.ocr_image(Image.fromarray(rows, mode="L"))
+
+    assert len(calls) == 3
+    assert all(size[1] <= 100 for size in calls)
+    assert text == "line 1\nline 2\nline 3"
+
+
+def test_tile_threads_stay_within_the_cpu_budget(monkeypatch):
+    monkeypatch.setattr(ocr, "OCR_PREPROCESS", False)
+    monkeypatch.setattr(ocr, "OCR_TILE_HEIGHT", 100)
+    monkeypatch.setattr(ocr, "OCR_TILE_OVERLAP", 20)
+    monkeypatch.setattr(ocr, "cpu_budget", lambda: 1)
+
+    threads = set()
+
+    def fake_tesseract(tile: Image.Image) -> str:
+        threads.add(threading.get_ident())
+        return ""
+
+    monkeypatch.setattr(ocr, "_tesseract", fake_tesseract)
+
+    ocr.ocr_image(Image.new("L", (50, 400), "white"))
+
+    assert len(threads) == 1
+
+
+def test_tesseract_config_is_shared(monkeypatch):
+    seen: List[dict] = []
+
+    def fake_image_to_string(image: Any, **kwargs: Any) -> str:
+        seen.append(kwargs)
+        return " Bulbasaur \n"
+
+    monkeypatch.setattr(ocr.pytesseract, "image_to_string", fake_image_to_string)
+
+    assert ocr.ocr_image(_card("white", "black")) == "Bulbasaur"
+    assert seen == [{"lang": ocr.TESSERACT_LANG, "config": ocr.TESSERACT_CONFIG}]
@@ -0,0 +1,110 @@
+from pathlib import Path
+from typing import Any, List
+
+from ingestion import text_ingestion
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+
+def _write_pdf(path: Path, page_texts: List[str]) -> Path:
+    """PDF with one page per entry; empty strings become image-only pages."""
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for text in page_texts:
+        page = writer.add_blank_page(612, 792)
+        if not text:
+            continue
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(stream)
+
+    with path.open("wb") as f:
+        writer.write(f)
+    return path
+
+
+def _fake_ocr(pdf_path: str, page_idx: int, page: Any) -> str:
+    return f"scanned page {page_idx + 1}"
+
+
+def test_extract_pdf_pages_in_parallel_keeps_page_order(tmp_path, monkeypatch):
+    texts = [f"Bulbasaur page {n}" for n in range(1, 12)]
+    pdf_path = _write_pdf(tmp_path / "bulbasaur.pdf", texts)
+
+    monkeypatch.setattr(text_ingestion, "PDF_PAGE_WORKERS", 3)
+    monkeypatch.setattr(text_ingestion, "PDF_PARALLEL_MIN_PAGES", 2)
+
+    pages = text_ingestion.extract_pdf_pages(str(pdf_path))
+
+    assert [p["page"] for p in pages] == list(range(1, 12))
+    assert [p["text"] for p in pages] == texts
+    assert not any(p["ocr"] for p in pages)
+
+
+def test_image_only_pages_fall_back_to_ocr(tmp_path, monkeypatch):
+    pdf_path = _write_pdf(tmp_path / "scan.pdf", ["Charmander", "", "Squirtle"])
+    monkeypatch.setattr(text_ingestion, "_ocr_page", _fake_ocr)
+
+    pages = text_ingestion.extract_pdf_pages(str(pdf_path))
+
+    assert [p["text"] for p in pages] == ["Charmander", "scanned page 2", "Squirtle"]
+    assert [p["ocr"] for p in pages] == [False, True, False]
+
+
+def test_join_pages_records_page_spans():
+    pages = [
+        {"page": 1, "text": "Bulbasaur", "ocr": False},
+        {"page": 2, "text": "", "ocr": False},
+        {"page": 3, "text": "Ivysaur", "ocr": True},
+    ]
+
+    text, spans = text_ingestion.join_pages(pages)
+
+    assert text == "Bulbasaur\n\nIvysaur"
+    assert [s["page"] for s in spans] == [1, 3]
+    for span in spans:
+        assert text[span["start"] : span["end"]] == pages[span["page"] - 1]["text"]
+    assert spans[1]["ocr"] is True
+
+
+def test_ingest_pdf_record_has_page_spans(tmp_path, monkeypatch):
+    pdf_path = _write_pdf(tmp_path / "squirtle.pdf", ["Squirtle", "Wartortle"])
+    monkeypatch.setattr(text_ingestion, "upsert_document", lambda *a, **k: None)
+    monkeypatch.setattr(text_ingestion, "embed_text", lambda text: [0.0] * 1536)
+
+    record = text_ingestion.ingest_pdf(
+        str(pdf_path), pokemon="Squirtle", generation=1, types=["Water"]
+    )
+
+    assert record["text"] == "Squirtle\n\nWartortle"
+    assert [p["page"] for p in record["pages"]] == [1, 2]
+
+
+def test_page_pool_stays_within_the_cpu_budget(tmp_path, monkeypatch):
+    pdf_path = _write_pdf(tmp_path / "bulbasaur.pdf", ["Bulbasaur"] * 12)
+    pools = []
+
+    class RecordingPool(text_ingestion.ProcessPoolExecutor):
+        def __init__(self, max_workers, **kwargs):
+            pools.append(max_workers)
+            super().__init__(max_workers=max_workers, **kwargs)
+
+    monkeypatch.setattr(text_ingestion, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(text_ingestion, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(text_ingestion, "cpu_budget", lambda: 2)
+
+    pages = text_ingestion.extract_pdf_pages(str(pdf_path))
+
+    assert len(pages) == 12
+    assert pools == [2]
@@ -0,0 +1,104 @@
+import threading
+from typing import List
+
+import pytest
+import scripts.ingest as ingest_script
+from ingestion import record_store
+from ingestion.pipeline import Stage, StagedPipeline
+
+
+def square(x: int) -> int:  # module-level so the process pool can pickle it
+    return x * x
+
+
+def test_staged_pipeline_runs_process_and_thread_stages():
+    seen: List[int] = []
+    lock = threading.Lock()
+
+    def collect(x: int) -> int:
+        with lock:
+            seen.append(x)
+        return x
+
+    def drop_odd(x: int):
+        if x % 2:
+            return None
+        return x
+
+    pipeline = StagedPipeline(
+        [
+            Stage("square", square, workers=2, kind="process"),
+            Stage("filter", drop_odd, workers=3),
+            Stage("collect", collect, workers=1),
+        ],
+        queue_size=1,  # forces backpressure between every stage
+    )
+    summary = pipeline.run(range(20))
+
+    assert sorted(seen) == [x * x for x in range(0, 20, 2)]
+    stages = {s["stage"]: s for s in summary["stages"]}
+    assert stages["square"]["processed"] == 20
+    assert stages["square"]["workers"] == 2
+    assert stages["collect"]["processed"] == 10
+    assert summary["errors"] == 0
+
+
+def test_staged_pipeline_records_failures_and_keeps_going():
+    def explode_on_three(x: int) -> int:
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    pipeline = StagedPipeline([Stage("check", explode_on_three, workers=2)])
+    summary = pipeline.run(range(5))
+
+    assert summary["errors"] == 1
+    assert summary["stages"][0]["processed"] == 4
+    assert summary["stages"][0]["failed"] == 1
+    assert pipeline.errors[0]["item"] == 3
+
+
+def test_ingest_main_runs_all_corpora_through_pipeline(tmp_path, monkeypatch):
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    (text_dir / "bulbasaur_notes.txt").write_text("Bulbasaur notes ", encoding="utf-8")
+    (text_dir / "charmander_notes.txt").write_text("Charmander notes", encoding="utf-8")
+    (text_dir / "ignored.csv").write_text("x", encoding="utf-8")
+
+    monkeypatch.setattr(
+        ingest_script,
+        "CORPORA",
+        [
+            ("text", text_dir, {".pdf", ".txt"}),
+            ("audio", tmp_path / "missing", {".mp3"}),
+        ],
+    )
+    monkeypatch.setattr(ingest_script, "INGEST_EXTRACT_WORKERS", 1)
+    monkeypatch.setattr(ingest_script, "embed_text", lambda text: [0.0] * 1536)
+
+    upserts: List[str] = []
+    monkeypatch.setattr(
+        ingest_script,
+        "upsert_document",
+        lambda doc_id, vector, metadata: upserts.append(doc_id),
+    )
+
+    summary = ingest_script.main()
+    written = list(record_store.iter_records())
+
+    assert sorted(upserts) == ["text:bulbasaur_notes.txt", "text:charmander_notes.txt"]
+    assert sorted(r["pokemon"] for r in written) == ["Bulbasaur", "Charmander"]
+    assert {r["text"] for r in written} == {"Bulbasaur notes", "Charmander notes"}
+    assert [s["processed"] for s in summary["stages"]] == [2, 2, 2, 2, 2]
+
+
+def test_ingest_main_raises_when_items_fail(tmp_path, monkeypatch):
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    (text_dir / "unknown_creature.txt").write_text("???", encoding="utf-8")
+
+    monkeypatch.setattr(ingest_script, "CORPORA", [("text", text_dir, {".txt"})])
+    monkeypatch.setattr(ingest_script, "INGEST_EXTRACT_WORKERS", 1)
+
+    with pytest.raises(RuntimeError, match="1 failed items"):
+        ingest_script.main()
@@ -0,0 +1,63 @@
+import json
+from typing import Any, Dict, List
+
+from ingestion import record_store
+
+
+def _record(media_id: str, modality: str = "text", text: str = "") -> Dict[str, Any]:
+    return {
+        "id": media_id,
+        "modality": modality,
+        "source_path": f"data/raw/{modality}/{media_id}",
+        "text": text or f"{media_id} text",
+        "pokemon": "Bulbasaur",
+    }
+
+
+def test_upsert_get_iter_and_delete():
+    record_store.upsert_records(
+        [_record("a"), _record("b", "image"), _record("c", "audio")]
+    )
+    record_store.upsert_records([_record("b", "image", text="updated")])
+
+    assert record_store.get_record("b")["text"] == "updated"
+    assert record_store.get_record("missing") is None
+    assert [r["id"] for r in record_store.iter_records()] == ["a", "b", "c"]
+    assert [r["id"] for r in record_store.iter_records("audio")] == ["c"]
+    assert set(record_store.get_records(["a", "c", "missing"])) == {"a", "c"}
+
+    assert record_store.delete_records(["a", "missing"]) == 1
+    assert [r["id"] for r in record_store.iter_records()] == ["b", "c"]
+
+
+def test_record_writer_commits_in_batches():
+    committed: List[List[str]] = []
+    writer = record_store.RecordWriter(
+        batch_size=2, on_commit=lambda batch: committed.append([r["id"] for r in batch])
+    )
+
+    with writer:
+        for media_id in ["a", "b", "c"]:
+            writer.add(_record(media_id))
+        assert committed == [["a", "b"]]
+
+    assert committed == [["a", "b"], ["c"]]
+    assert len(list(record_store.iter_records())) == 3
+
+
+def test_migrate_legacy_jsonl_keeps_latest_duplicate(tmp_path):
+    jsonl = tmp_path / "text.jsonl"
+    jsonl.write_text(
+        "\n".join(
+            json.dumps(r)
+            for r in [_record("a", text="old"), _record("b"), _record("a", text="new")]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+    assert record_store.migrate_legacy_jsonl([jsonl]) == 2
+    assert record_store.get_record("a")["text"] == "new"
+    assert not jsonl.exists()
+    assert (tmp_path / "text.jsonl.migrated").exists()
+    assert record_store.migrate_legacy_jsonl([jsonl]) == 0
@@ -0,0 +1,206 @@
+import numpy as np
+from api.main import app
+from api.routes import llm as chat_routes
+from fastapi.testclient import TestClient
+from processing.llm_providers import AsyncFakeLLMClient, fake_embedding
+from processing.semantic_cache import SemanticCache, data_version
+
+
+def unit(seed: int, dim: int = 64) -> np.ndarray:
+    vector = np.random.RandomState(seed).standard_normal(dim)
+    return vector / np.linalg.norm(vector)
+
+
+def test_lookup_returns_nearest_question_above_threshold():
+    cache = SemanticCache(threshold=0.9)
+    base = unit(1)
+    cache.store(base, "v1", "grass and poison")
+    cache.store(unit(2), "v1", "fire")
+
+    paraphrase = base + 0.1 * unit(3)
+    hit = cache.lookup(paraphrase, "v1")
+    assert hit["value"] == "grass and poison"
+    assert hit["similarity"] > 0.9
+
+    assert cache.lookup(unit(4), "v1") is None
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_lookup_only_returns_entries_about_the_same_entities():
+    cache = SemanticCache(threshold=0.9)
+    cache.store(unit(1), "v1", "Grass/Poison", key=frozenset({"Ivysaur"}))
+
+    assert cache.lookup(unit(1), "v1", key=frozenset({"Venusaur"})) is None
+    assert cache.lookup(unit(1), "v1", key=frozenset({"Ivysaur"}))["value"] == (
+        "Grass/Poison"
+    )
+
+
+def test_stale_versions_expired_and_least_recent_entries_are_dropped():
+    cache = SemanticCache(threshold=0.9, max_entries=2, ttl_seconds=10)
+    cache.store(unit(1), "v1", "a", now=0)
+    assert cache.lookup(unit(1), "v2", now=1) is None
+    assert len(cache) == 0
+
+    cache.store(unit(1), "v1", "a", now=0)
+    assert cache.lookup(unit(1), "v1", now=11) is None
+
+    cache.store(unit(1), "v1", "a", now=100)
+    cache.store(unit(2), "v1", "b", now=100)
+    cache.lookup(unit(1), "v1", now=101)  # "a" is now the most recent
+    cache.store(unit(3), "v1", "c", now=102)
+    assert cache.lookup(unit(2), "v1", now=103) is None
+    assert cache.lookup(unit(1), "v1", now=103)["value"] == "a"
+
+    metrics = cache.metrics()
+    assert metrics["invalidations"] == 1
+    assert metrics["expirations"] == 1
+    assert metrics["evictions"] == 1
+
+
+def test_data_version_changes_when_records_are_written():
+    from ingestion import record_store
+
+    before = data_version()
+    record_store.upsert_records([{"id": "bulbasaur_notes", "text": "x"}])
+    assert data_version() != before
+
+
+def test_chat_serves_paraphrases_from_cache(monkeypatch):
+    calls = []
+
+    class CountingClient(AsyncFakeLLMClient):
+        def __init__(self):
+            super().__init__()
+            create = self.responses.create
+
+            async def counted(**kwargs):
+                calls.append(kwargs)
+                return await create(**kwargs)
+
+            self.responses.create = counted
+
+    async def embed(message):
+        return fake_embedding(message)
+
+    async def vector_context(message, query_vector=None):
+        return {"context": "", "sources": []}
+
+    monkeypatch.setattr(chat_routes, "semantic_cache", SemanticCache())
+    monkeypatch.setattr(chat_routes, "openai_client", CountingClient())
+    monkeypatch.setattr(chat_routes, "embed_text_async", embed)
+    monkeypatch.setattr(chat_routes, "build_vector_context_async", vector_context)
+    monkeypatch.setattr(
+        chat_routes,
+        "build_graph_context",
+        lambda message, lookup=None: {
+            "context": "facts",
+            "node": {"name": "Bulbasaur"},
+        },
+    )
+    logged = []
+    monkeypatch.setattr(chat_routes, "log_evaluation", lambda **kw: logged.append(kw))
+
+    client = TestClient(app)
+    first = client.post("/chat", data={"message": "What type is Bulbasaur?"}).json()
+    second = client.post("/chat", data={"message": "what type is bulbasaur"}).json()
+    client.post("/chat", data={"message": "Where does Charmander live?"})
+
+    assert second == first
+    assert len(calls) == 2
+    assert [e["evaluation_scores"]["cache_hit"] for e in logged] == [
+        False,
+        True,
+        False,
+    ]
+
+    metrics = client.get("/chat/cache/metrics").json()
+    assert metrics["hits"] == 1 and metrics["entries"] == 2
+
+
+def test_chat_does_not_share_answers_between_entities(monkeypatch):
+    calls = []
+
+    class NamingClient(AsyncFakeLLMClient):
+        def __init__(self):
+            super().__init__()
+            create = self.responses.create
+
+            async def answer(**kwargs):
+                calls.append(kwargs)
+                return await create(**kwargs)
+
+            self.responses.create = answer
+
+    # A template question whose embedding barely depends on the name.
+    async def embed(message):
+        return fake_embedding("what type is")
+
+    async def vector_context(message, query_vector=None):
+        return {"context": "", "sources": []}
+
+    monkeypatch.setattr(chat_routes, "semantic_cache", SemanticCache())
+    monkeypatch.setattr(chat_routes, "openai_client", NamingClient())
+    monkeypatch.setattr(chat_routes, "embed_text_async", embed)
+    monkeypatch.setattr(chat_routes, "build_vector_context_async", vector_context)
+    monkeypatch.setattr(chat_routes, "lookup_question", lambda message: ([], {}))
+    monkeypatch.setattr(
+        chat_routes,
+        "build_graph_context",
+        lambda message, lookup=None: {
+            "context": "facts",
+            "node": {"name": message.split()[-1]},
+        },
+    )
+    monkeypatch.setattr(chat_routes, "log_evaluation", lambda **kw: None)
+
+    client = TestClient(app)
+    ivysaur = client.post("/chat", data={"message": "what type is Ivysaur"}).json()
+    venusaur = client.post("/chat", data={"message": "what type is Venusaur"}).json()
+    client.post("/chat", data={"message": "What type is Ivysaur?"})
+
+    assert ivysaur["node"] == {"name": "Ivysaur"}
+    assert venusaur["node"] == {"name": "Venusaur"}
+    assert len(calls) == 2
+    assert client.get("/chat/cache/metrics").json()["hits"] == 1
+
+
+def test_chat_reads_the_graph_once_per_question(monkeypatch):
+    from processing import graph_store
+
+    graph = {
+        "pokemon_nodes": [
+            {
+                "name": "Bulbasaur",
+                "generation": 1,
+                "primary_type": "Grass",
+                "secondary_type": "Poison",
+            }
+        ],
+        "pokemon_type_edges": [{"from_pokemon": "Bulbasaur", "to_type": "Grass"}],
+    }
+    loads = []
+
+    def load_graph():
+        loads.append(1)
+        return graph
+
+    async def embed(message):
+        return fake_embedding(message)
+
+    async def vector_context(message, query_vector=None):
+        return {"context": "", "sources": []}
+
+    monkeypatch.setattr(graph_store, "GRAPH_BACKEND", "json")
+    monkeypatch.setattr(graph_store, "load_graph", load_graph)
+    monkeypatch.setattr(chat_routes, "semantic_cache", SemanticCache())
+    monkeypatch.setattr(chat_routes, "openai_client", AsyncFakeLLMClient())
+    monkeypatch.setattr(chat_routes, "embed_text_async", embed)
+    monkeypatch.setattr(chat_routes, "build_vector_context_async", vector_context)
+    monkeypatch.setattr(chat_routes, "log_evaluation", lambda **kw: None)
+
+    resp = TestClient(app).post("/chat", data={"message": "What type is Bulbasaur?"})
+
+    assert resp.json()["node"]["name"] == "Bulbasaur"
+    assert len(loads) == 1
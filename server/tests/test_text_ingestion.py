@@ -1,9 +1,9 @@
-import json
 import unicodedata
 from pathlib import Path
 from typing import Any, Dict
 
 import scripts.ingest_text_corpus as ingest_corpus
+from ingestion import record_store
 from ingestion.text_ingestion import (
     extract_text_from_pdf,
     ingest_pdf,
@@ -49,7 +49,7 @@ def test_ingest_pdf_returns_expected_schema(monkeypatch):
         str(PDF_PATH), pokemon="Bulbasaur", generation=1, types=["Grass", "Poison"]
     )
 
-    assert record["id"] == PDF_PATH.stem
+    assert record["id"] == f"text:{PDF_PATH.name}"
     assert record["modality"] == "text"
     assert record["source_path"].endswith(PDF_PATH.name)
     assert record["pokemon"] == "Bulbasaur"
@@ -79,7 +79,7 @@ def test_ingest_txt_with_tmp_file(tmp_path, monkeypatch):
         str(txt_path), pokemon="Charmander", generation=1, types=["Fire"]
     )
 
-    assert record["id"] == "charmander"
+    assert record["id"] == "text:charmander.txt"
     assert record["modality"] == "text"
     assert record["source_path"].endswith("charmander.txt")
     assert record["pokemon"] == "Charmander"
@@ -91,10 +91,7 @@ def test_ingest_txt_with_tmp_file(tmp_path, monkeypatch):
     assert "Fire-type" in record["text"]
 
 
-def test_write_textrecord_creates_valid_jsonl(tmp_path, monkeypatch):
-    temp_jsonl = tmp_path / "text.jsonl"
-    monkeypatch.setattr("ingestion.text_ingestion.TEXT_JSONL", temp_jsonl)
-
+def test_write_text_record_upserts_into_record_store():
     record = {
         "id": "bulbasaur_test",
         "modality": "text",
@@ -107,12 +104,12 @@ def test_write_textrecord_creates_valid_jsonl(tmp_path, monkeypatch):
     }
 
     write_text_record(record)
+    write_text_record(record)  # upsert: writing again must not duplicate
 
-    assert temp_jsonl.exists()
-    lines = temp_jsonl.read_text(encoding="utf-8").splitlines()
-    assert len(lines) == 1
+    records = list(record_store.iter_records())
+    assert len(records) == 1
 
-    loaded = json.loads(lines[0])
+    loaded = record_store.get_record("bulbasaur_test")
     assert loaded["id"] == "bulbasaur_test"
     assert loaded["pokemon"] == "Bulbasaur"
     assert "Bulbasaur" in loaded["text"]
@@ -129,7 +126,9 @@ def test_add_text_pdf_moves_file_and_ingests(tmp_path, monkeypatch):
 
     calls: Dict[str, Any] = {}
 
-    def fake_ingest_pdf(path: str, pokemon: str, generation: int, types: list[str]):
+    def fake_ingest_pdf(
+        path: str, pokemon: str, generation: int, types: list[str], content_hash=None
+    ):
         calls["ingest_args"] = ("pdf", Path(path), pokemon, generation, types)
         return {
             "id": "squirtle_guide",
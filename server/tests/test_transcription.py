@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from ingestion import transcription
+
+SR = transcription.SAMPLE_RATE
+
+
+def _tone(seconds: float, freq: float = 220.0) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+
+def test_split_on_silence_cuts_in_pauses_and_respects_max_length():
+    # 3 x 10 s of speech-like tone separated by 1 s pauses, with silent edges.
+    audio = np.concatenate(
+        [_silence(2), _tone(10), _silence(1), _tone(10), _silence(1), _tone(10)]
+        + [_silence(2)]
+    )
+
+    segments = transcription.split_on_silence(audio, max_seconds=15, min_seconds=2)
+
+    assert len(segments) == 3
+    assert all((end - start) / SR <= 15 for start, end in segments)
+    # Cuts land inside the pauses, and leading/trailing silence is dropped.
+    assert abs(segments[0][0] / SR - 2) < 0.05
+    assert 12 <= segments[0][1] / SR <= 13
+    assert abs(segments[-1][1] / SR - 34) < 0.05
+
+
+def test_split_on_silence_hard_cuts_audio_without_pauses():
+    segments = transcription.split_on_silence(_tone(70), max_seconds=28)
+
+    assert [round((end - start) / SR) for start, end in segments] == [28, 28, 14]
+    assert transcription.split_on_silence(_silence(5)) == []
+
+
+def test_pool_transcribes_segments_in_parallel_and_stitches_in_order(monkeypatch):
+    class FakeSegmentModel:
+        def transcribe(self, segment, fp16):
+            assert fp16 is False
+            # Each tone segment has its own frequency; report which one.
+            spectrum = np.abs(np.fft.rfft(segment))
+            freq = round(np.argmax(spectrum) * SR / len(segment) / 100) * 100
+            return {"text": f" part{freq} "}
+
+    monkeypatch.setattr(transcription, "_worker_model", FakeSegmentModel())
+    # Too long for one segment, so it is cut at both pauses.
+    audio = np.concatenate(
+        [_tone(20, 300), _silence(1), _tone(20, 500), _silence(1), _tone(20, 700)]
+    )
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pool = transcription.TranscriptionPool(executor=executor)
+        text = pool.transcribe_array(audio)
+
+    assert text == "part300 part500 part700"
+
+
+def test_quantize_linear_layers_replaces_whisper_linears():
+    import torch
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+    from whisper.model import ModelDimensions, Whisper
+
+    dims = ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=1500,
+        n_audio_state=64,
+        n_audio_head=2,
+        n_audio_layer=1,
+        n_vocab=51865,
+        n_text_ctx=448,
+        n_text_state=64,
+        n_text_head=2,
+        n_text_layer=1,
+    )
+    torch.manual_seed(0)
+    model = Whisper(dims)
+    # Whisper leaves the decoder positional embedding as torch.empty.
+    for param in model.parameters():
+        torch.nn.init.normal_(param, std=0.02)
+    model = transcription.quantize_linear_layers(model)
+
+    quantized = [m for m in model.modules() if isinstance(m, DynamicLinear)]
+    assert quantized
+    assert not any(type(m) is torch.nn.Linear for m in model.modules())
+    # Still runs end to end (random weights, so the text itself is noise).
+    mel = torch.zeros(1, 80, 3000)
+    tokens = torch.tensor([[50258]])
+    assert model(mel, tokens).shape[-1] == 51865
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+from processing import vector_store
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qm
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.calls: List[str] = []
+
+    async def collection_exists(self, name):
+        self.calls.append("collection_exists")
+        return False
+
+    async def create_collection(self, collection_name, vectors_config):
+        self.calls.append("create_collection")
+
+    async def query_points(self, **kwargs):
+        self.calls.append("query_points")
+        point = SimpleNamespace(id="p1", score=0.9, payload={"media_id": "text:a"})
+        return SimpleNamespace(points=[point])
+
+    async def close(self):
+        self.calls.append("close")
+
+
+def test_async_searches_share_one_client(monkeypatch):
+    clients: List[FakeAsyncClient] = []
+
+    def make_client():
+        clients.append(FakeAsyncClient())
+        return clients[-1]
+
+    monkeypatch.setattr(vector_store, "get_async_qdrant_client", make_client)
+
+    async def scenario():
+        vector_store.open_async_client()
+        first = await vector_store.search_similar_async([0.1, 0.2])
+        await vector_store.search_similar_async([0.1, 0.2])
+        await vector_store.close_async_client()
+        return first
+
+    hits = asyncio.run(scenario())
+
+    assert hits == [{"id": "p1", "score": 0.9, "payload": {"media_id": "text:a"}}]
+    assert len(clients) == 1
+    assert clients[0].calls == [
+        "collection_exists",
+        "create_collection",
+        "query_points",
+        "query_points",
+        "close",
+    ]
+
+
+def test_delete_documents_removes_points_with_legacy_ids(monkeypatch):
+    client = QdrantClient(":memory:")
+    monkeypatch.setattr(vector_store, "get_qdrant_client", lambda: client)
+    monkeypatch.setattr(vector_store, "EMBED_DIM", 2)
+    vector_store.ensure_collection()
+    client.upsert(
+        collection_name=vector_store.COLLECTION_NAME,
+        points=[
+            # Written before point_id, under abs(hash(doc_id)).
+            qm.PointStruct(id=12345, vector=[0.1, 0.2], payload={"media_id": "a"}),
+        ],
+    )
+    vector_store.upsert_document("b", [0.2, 0.1], {"media_id": "b"})
+    vector_store.upsert_document("c", [0.3, 0.1], {"media_id": "c"})
+
+    vector_store.delete_documents(["a", "b"])
+
+    (left,) = client.scroll(vector_store.COLLECTION_NAME)[0]
+    assert left.payload == {"media_id": "c"}
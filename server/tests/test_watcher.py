@@ -0,0 +1,192 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import scripts.watch as watch_script
+from ingestion import manifest, record_store
+from ingestion.watcher import Debouncer, InotifyWatcher, PollingWatcher
+from processing import graph_builder, graph_store
+
+
+def test_debouncer_waits_for_quiet_period(tmp_path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    debouncer = Debouncer(quiet_seconds=2)
+
+    debouncer.add([a], now=0)
+    debouncer.add([b], now=1)
+    debouncer.add([a], now=1.5)  # a was written again
+
+    assert debouncer.ready(now=2.5) == []
+    assert debouncer.ready(now=3) == [b]
+    assert debouncer.ready(now=3.5) == [a]
+    assert len(debouncer) == 0
+
+
+def test_polling_watcher_reports_added_changed_and_removed(tmp_path):
+    existing = tmp_path / "existing.txt"
+    existing.write_text("v1", encoding="utf-8")
+    watcher = PollingWatcher([tmp_path], interval=0)
+
+    added = tmp_path / "added.txt"
+    added.write_text("new", encoding="utf-8")
+    existing.write_text("v2 with more bytes", encoding="utf-8")
+    assert watcher.poll(0) == {added, existing}
+
+    added.unlink()
+    assert watcher.poll(0) == {added}
+    assert watcher.poll(0) == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux")
+def test_inotify_watcher_reports_written_renamed_and_deleted(tmp_path):
+    watcher = InotifyWatcher([tmp_path])
+    try:
+        written = tmp_path / "written.txt"
+        written.write_text("hello", encoding="utf-8")
+        assert written in watcher.poll(1)
+
+        partial = tmp_path / ".upload-1.part"
+        partial.write_bytes(b"data")
+        renamed = tmp_path / "renamed.txt"
+        partial.rename(renamed)
+        written.unlink()
+
+        changed = set()
+        for _ in range(5):
+            changed |= watcher.poll(0.2)
+        assert {renamed, written} <= changed
+    finally:
+        watcher.close()
+
+
+def test_process_paths_ingests_changed_files_and_updates_graph(tmp_path, monkeypatch):
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    monkeypatch.setattr(watch_script.ingest, "CORPORA", [("text", text_dir, {".txt"})])
+
+    added = []
+
+    def fake_add_text(path, content_hash=None, file_state=None):
+        added.append((path.name, content_hash))
+        record = {"id": path.stem, "modality": "text", "source_path": str(path)}
+        record_store.upsert_records([record])
+        manifest.mark_ingested(
+            path, "text", path.stem, content_hash=content_hash, state=file_state
+        )
+        return record
+
+    updates = []
+    tombstoned = []
+    monkeypatch.setitem(watch_script.ADDERS, "text", fake_add_text)
+    monkeypatch.setattr(
+        watch_script.graph_builder, "update_graph", lambda ids: updates.append(ids)
+    )
+    monkeypatch.setattr(
+        watch_script.ingest,
+        "tombstone",
+        lambda entries: tombstoned.extend(e["record_id"] for e in entries),
+    )
+
+    notes = text_dir / "bulbasaur_notes.txt"
+    notes.write_text("Bulbasaur", encoding="utf-8")
+    ignored = [text_dir / ".upload-x.part", text_dir / "notes.csv"]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # An upload that is ingesting the file itself has claimed it.
+        manifest.claim(notes)
+        watch_script.process_paths([notes], executor)
+        assert added == []
+        manifest.release(notes)
+
+        summary = watch_script.process_paths([notes, *ignored], executor)
+        assert summary == {"ingested": 1, "deleted": 0, "failed": 0}
+        assert [name for name, _hash in added] == ["bulbasaur_notes.txt"]
+        assert added[0][1] is not None
+        assert updates == [["bulbasaur_notes"]]
+
+        # An event for an unchanged file is a no-op.
+        watch_script.process_paths([notes], executor)
+        assert len(added) == 1
+
+        # A sidecar event is an event for the file it describes.
+        sidecar = text_dir / "bulbasaur_notes.txt.meta.json"
+        sidecar.write_text('{"pokemon": "Ivysaur"}', encoding="utf-8")
+        watch_script.process_paths([watch_script.raw_path(sidecar)], executor)
+        assert len(added) == 2
+
+        notes.unlink()
+        summary = watch_script.process_paths([notes], executor)
+        assert summary["deleted"] == 1
+        assert tombstoned == ["bulbasaur_notes"]
+
+
+def test_update_graph_replaces_mentions_of_changed_records(tmp_path, monkeypatch):
+    graph_dir = tmp_path / "graph"
+    monkeypatch.setattr(graph_builder, "GRAPH_DIR", graph_dir)
+    monkeypatch.setattr(graph_builder, "NODES_DIR", graph_dir / "nodes")
+    monkeypatch.setattr(graph_builder, "EDGES_DIR", graph_dir / "edges")
+    monkeypatch.setattr(graph_builder, "GRAPH_JSON", graph_dir / "graph.json")
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_dir / "graph.json")
+    monkeypatch.setattr(graph_store, "GRAPH_DB", graph_dir / "graph.db")
+    monkeypatch.setattr(graph_store, "GRAPH_BACKEND", "json")
+
+    graph_dir.mkdir()
+    (graph_dir / "graph.json").write_text(
+        json.dumps(
+            {
+                "pokemon_nodes": [
+                    {
+                        "name": "Charmander",
+                        "generation": 1,
+                        "primary_type": "Fire",
+                        "secondary_type": None,
+                    }
+                ],
+                "type_nodes": [{"name": "Fire"}],
+                "pokemon_type_edges": [],
+                "evolution_edges": [],
+                "mentions_edges": [
+                    {"from_media_id": "notes", "to_pokemon": "Charmander"},
+                    {"from_media_id": "other", "to_pokemon": "Charmander"},
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+    record_store.upsert_records(
+        [{"id": "notes", "modality": "text", "text": "Now about Bulbasaur"}]
+    )
+
+    extracted = []
+
+    def fake_extract_fragments(documents):
+        for doc in documents:
+            extracted.append(doc["media_id"])
+            yield {
+                "pokemon_nodes": [
+                    {
+                        "name": "Bulbasaur",
+                        "generation": 1,
+                        "primary_type": "Grass",
+                        "secondary_type": "Poison",
+                    }
+                ],
+                "type_nodes": [{"name": "Grass"}],
+                "pokemon_type_edges": [],
+                "evolution_edges": [],
+                "mentions_edges": [
+                    {"from_media_id": doc["media_id"], "to_pokemon": "Bulbasaur"}
+                ],
+            }
+
+    monkeypatch.setattr(graph_builder, "_extract_fragments", fake_extract_fragments)
+
+    graph = graph_builder.update_graph(["notes"])
+
+    assert extracted == ["notes"]
+    assert {n["name"] for n in graph["pokemon_nodes"]} == {"Charmander", "Bulbasaur"}
+    assert sorted(
+        (e["from_media_id"], e["to_pokemon"]) for e in graph["mentions_edges"]
+    ) == [("notes", "Bulbasaur"), ("other", "Charmander")]
+    assert json.loads((graph_dir / "graph.json").read_text(encoding="utf-8")) == graph
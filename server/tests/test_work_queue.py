@@ -0,0 +1,126 @@
+import os
+
+import scripts.distributed_ingest as distributed
+from ingestion import manifest, record_store, sqlite_journal, work_queue
+from ingestion.work_queue import SqliteWorkQueue, make_work_queue
+
+
+def test_lease_is_exclusive_until_it_expires(tmp_path):
+    queue = SqliteWorkQueue(tmp_path / "q.db")
+    queue.enqueue([("a", {"n": 1}, "v1")])
+
+    first = queue.lease("w1", visibility_seconds=60)
+    assert first["payload"] == {"n": 1}
+    assert queue.lease("w2", visibility_seconds=60) is None
+
+    assert queue.extend("a", first["lease_id"], visibility_seconds=-1)
+    second = queue.lease("w2", visibility_seconds=60)
+    assert second["key"] == "a" and second["attempts"] == 2
+
+    # The first worker's lease is gone: it cannot complete the item.
+    assert not queue.complete("a", first["lease_id"])
+    assert queue.complete("a", second["lease_id"])
+    assert queue.stats() == {"pending": 0, "leased": 0, "done": 1, "failed": 0}
+
+
+def test_failed_items_retry_until_max_attempts(tmp_path):
+    queue = SqliteWorkQueue(tmp_path / "q.db", max_attempts=2)
+    queue.enqueue([("a", {}, "v1")])
+
+    for _ in range(2):
+        item = queue.lease("w1")
+        assert queue.fail("a", item["lease_id"], "boom")
+
+    assert queue.lease("w1") is None
+    assert queue.stats()["failed"] == 1
+
+
+def test_enqueue_skips_queued_items_and_requeues_new_versions(tmp_path):
+    queue = make_work_queue("sqlite", path=tmp_path / "q.db")
+    assert queue.enqueue([("a", {}, "v1"), ("b", {}, "v1")]) == 2
+    assert queue.enqueue([("a", {}, "v1")]) == 0
+
+    item = queue.lease("w1")
+    queue.complete(item["key"], item["lease_id"])
+    assert queue.enqueue([("a", {}, "v2")]) == 1
+    assert queue.stats() == {"pending": 2, "leased": 0, "done": 0, "failed": 0}
+
+
+def test_queue_on_a_network_filesystem_uses_a_rollback_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_journal, "SQLITE_JOURNAL_MODE", "auto")
+    monkeypatch.setattr(sqlite_journal, "filesystem_type", lambda directory: "nfs4")
+    queue = SqliteWorkQueue(tmp_path / "q.db")
+    queue.enqueue([("a", {}, "v1")])
+
+    with queue._db() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert queue.lease("w1")["key"] == "a"
+
+
+def test_journal_mode_is_wal_on_local_disk_unless_forced(monkeypatch, tmp_path):
+    monkeypatch.setattr(sqlite_journal, "SQLITE_JOURNAL_MODE", "auto")
+    monkeypatch.setattr(sqlite_journal, "filesystem_type", lambda directory: "ext4")
+    assert sqlite_journal.journal_mode(tmp_path / "a.db") == "wal"
+
+    monkeypatch.setattr(sqlite_journal, "SQLITE_JOURNAL_MODE", "delete")
+    assert sqlite_journal.journal_mode(tmp_path / "a.db") == "delete"
+
+
+def test_workers_drain_queue_written_by_coordinator(tmp_path, monkeypatch):
+    text_dir = tmp_path / "text"
+    text_dir.mkdir()
+    (text_dir / "bulbasaur_notes.txt").write_text("Bulbasaur notes", encoding="utf-8")
+    (text_dir / "charmander_notes.txt").write_text("Charmander notes", encoding="utf-8")
+
+    monkeypatch.setattr(distributed.ingest, "CORPORA", [("text", text_dir, {".txt"})])
+    monkeypatch.setattr(distributed.ingest, "embed_text", lambda text: [0.0] * 1536)
+    upserts = []
+    monkeypatch.setattr(
+        distributed.ingest,
+        "upsert_document",
+        lambda doc_id, vector, metadata: upserts.append(doc_id),
+    )
+
+    summary = distributed.coordinate()
+    assert summary["queued"] == 2
+
+    results = [
+        distributed.run_worker(worker_id=f"w{i}", exit_when_drained=True)
+        for i in range(2)
+    ]
+
+    assert [r["processed"] for r in results] == [2, 0]
+    assert sorted(upserts) == ["text:bulbasaur_notes.txt", "text:charmander_notes.txt"]
+    assert sorted(r["id"] for r in record_store.iter_records()) == [
+        "text:bulbasaur_notes.txt",
+        "text:charmander_notes.txt",
+    ]
+    with manifest.manifest_db() as conn:
+        assert manifest.check_file(conn, text_dir / "bulbasaur_notes.txt") is None
+    assert distributed.coordinate()["queued"] == 0
+    assert work_queue.make_work_queue().stats()["done"] == 2
+
+
+def test_worker_processes_get_a_single_whisper_process(monkeypatch):
+    from ingestion import transcription
+
+    monkeypatch.setattr(transcription, "WHISPER_WORKERS", 8)
+    monkeypatch.setattr(transcription, "WHISPER_THREADS", 1)
+    monkeypatch.setenv("WHISPER_WORKERS", "8")
+    monkeypatch.setenv("WHISPER_THREADS", "1")
+    monkeypatch.setattr(distributed, "run_worker", lambda **kwargs: None)
+
+    distributed._worker_process(exit_when_drained=True, cpus=4)
+
+    assert transcription.TranscriptionPool().workers == 1
+    assert transcription.WHISPER_THREADS == 4
+    assert os.environ["WHISPER_THREADS"] == "4"
+
+
+def test_default_worker_processes_fit_in_memory(monkeypatch):
+    pages = {"SC_PHYS_PAGES": 3 * 1024, "SC_PAGE_SIZE": 1024 * 1024}
+    monkeypatch.setattr(os, "sysconf", pages.__getitem__)
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(distributed, "DISTRIBUTED_WORKER_MEMORY_MB", 1024)
+
+    assert distributed.default_worker_processes() == 3